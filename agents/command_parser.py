@@ -0,0 +1,146 @@
+import re
+from typing import Optional
+
+# Words that only make sense with conversational context; leave them to the LLM
+_CONTEXT_WORDS = {"it", "this", "that", "there", "here", "them", "previous",
+                  "same", "again", "then"}
+_FILLER = r"(?:please\s+)?(?:can you\s+|could you\s+)?"
+_ARTICLE = r"(?:the\s+|a\s+|an\s+|my\s+)?"
+_TARGET_SUFFIX = r"(?:\s+(?:button|link|field|input|box|text\s?box|tab|icon))?"
+_MAX_TARGET_WORDS = 5
+# Values are a single token or a quoted string; anything longer is ambiguous
+_VALUE = r"(?P<value>\"[^\"]+\"|'[^']+'|\S+)"
+# A value or target made of these is a misparse of a longer sentence
+_CONNECTIVES = {"in", "into", "inside", "on", "to", "and", "with"}
+_NOT_VALUES = _CONNECTIVES | {"the", "a", "an", "my", "field", "box", "input"}
+# "press enter" is a key press, not a widget to click
+_KEY_NAMES = {"enter", "return", "tab", "escape", "esc", "space", "spacebar",
+              "backspace", "delete", "up", "down", "left", "right", "home",
+              "end", "page_up", "page_down", "key"}
+
+_CLICK = re.compile(
+    rf"^{_FILLER}(?P<verb>click|press|tap|select|hit)(?:\s+on)?\s+{_ARTICLE}"
+    rf"(?P<target>.+?){_TARGET_SUFFIX}$", re.IGNORECASE)
+_TYPE_INTO = re.compile(
+    rf"^{_FILLER}(?:type|enter|write|input)\s+{_VALUE}\s+"
+    rf"(?:in|into|in\s+to|inside|on)\s+{_ARTICLE}(?P<target>.+?){_TARGET_SUFFIX}$",
+    re.IGNORECASE)
+_FILL_WITH = re.compile(
+    rf"^{_FILLER}(?:fill(?:\s+in)?|set)\s+{_ARTICLE}(?P<target>.+?){_TARGET_SUFFIX}"
+    rf"\s+(?:with|to)\s+{_VALUE}$", re.IGNORECASE)
+_TYPE = re.compile(rf"^{_FILLER}(?:type|write)\s+{_VALUE}$", re.IGNORECASE)
+_WAIT = re.compile(rf"^{_FILLER}(?:wait|hold on|pause)"
+                   rf"(?:\s+(?:a\s+)?(?:moment|second|bit|\d+\s+seconds?))?$", re.IGNORECASE)
+_CLAUSE_SPLIT = re.compile(r"\s*(?:,\s*and\s+then|,\s*then|\band\s+then\b|\bthen\b|,\s*and\b|;|\.\s+)\s*",
+                           re.IGNORECASE)
+# Quoted values are kept whole even when they contain "then" or "and"
+_QUOTED = re.compile(r"(?<!\w)(?:\"[^\"]+\"|'[^']+')(?!\w)")
+
+
+def _clean(text: str) -> str:
+    text = text.strip().strip(".!?").strip()
+    return " ".join(text.split())
+
+
+def _target_name(raw: str) -> Optional[str]:
+    words = re.sub(r"[^\w\s-]", " ", raw.lower()).split()
+    if not words or len(words) > _MAX_TARGET_WORDS or \
+            any(word in _CONTEXT_WORDS or word in _CONNECTIVES for word in words):
+        return None
+    return "_".join(words)
+
+
+def _strip_quotes(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def _value(match) -> Optional[str]:
+    """The matched value in its original casing, or None if it looks misparsed."""
+    raw = match.group("value")
+    value = _strip_quotes(raw)
+    if value == raw and value.lower() in _NOT_VALUES:
+        return None
+    return value
+
+
+def _parse_clause(clause: str) -> Optional[list]:
+    clause = _clean(clause)
+
+    if _WAIT.match(clause):
+        return [{"action": "wait"}]
+
+    for pattern in (_TYPE_INTO, _FILL_WITH):
+        match = pattern.match(clause)
+        if match:
+            target = _target_name(match.group("target"))
+            # Matching is case-insensitive, the value keeps the transcript's casing
+            value = _value(match)
+            if target is None or value is None:
+                return None
+            return [{"action": "detect", "target": target},
+                    {"action": "click", "target": target},
+                    {"action": "type", "target": target, "value": value}]
+
+    match = _CLICK.match(clause)
+    if match:
+        target = _target_name(match.group("target"))
+        if target is None:
+            return None
+        if match.group("verb").lower() in ("press", "hit") and \
+                (target in _KEY_NAMES or target.endswith("_key")):
+            return None
+        return [{"action": "detect", "target": target},
+                {"action": "click", "target": target}]
+
+    match = _TYPE.match(clause)
+    if match:
+        value = _value(match)
+        if value is None:
+            return None
+        return [{"action": "type", "value": value}]
+
+    return None
+
+
+def _split_clauses(text: str) -> list:
+    """Split a compound command on its connectives, outside of quoted values."""
+    quoted = [m.span() for m in _QUOTED.finditer(text)]
+    clauses, start = [], 0
+    for separator in _CLAUSE_SPLIT.finditer(text):
+        if any(q_start < separator.end() and separator.start() < q_end
+               for q_start, q_end in quoted):
+            continue
+        clauses.append(text[start:separator.start()])
+        start = separator.end()
+    clauses.append(text[start:])
+    return [c for c in clauses if c.strip()]
+
+
+def parse_command(text: str) -> Optional[list]:
+    """
+    Deterministically parse simple imperative commands into the action list
+    format produced by the DecisionMaker, e.g.
+        "click login" -> [{"action": "detect", "target": "login"},
+                          {"action": "click", "target": "login"}]
+
+    Compound commands ("type x in username and then click login") are split
+    into clauses. Returns None whenever any clause is not understood, in
+    which case the caller should fall back to the LLM.
+    """
+    if not text or not text.strip():
+        return None
+
+    clauses = _split_clauses(_clean(text))
+    if len(clauses) > 1:
+        plan = []
+        for clause in clauses:
+            steps = _parse_clause(clause)
+            if steps is None:
+                break
+            plan.extend(steps)
+        else:
+            return plan
+    return _parse_clause(text)
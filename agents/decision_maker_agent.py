@@ -1,38 +1,25 @@
 import json
 import logging
+import queue
 import re
+import threading
+import time
+from typing import Iterator
 from dotenv import load_dotenv
 
+from agents.command_parser import parse_command
+from agents.plan_cache import PlanCache, DEFAULT_PLAN_CACHE_PATH
+from agents.streaming_json import ActionStreamParser
+from openai_integration.image_encoding import ImageEncodingConfig
 from openai_integration.openai_client import OpenAIClient
+from utils.tracing import span, tracer
 
 logger = logging.getLogger(__name__)
 
 load_dotenv()
 
 
-class DecisionMaker:
-    """
-    DecisionMaker interprets natural language (spoken or written)
-    and decides what UI action should be performed.
-    Example output:
-        {"action": "click", "target": "username_input"}
-    """
-
-    def __init__(self, selenium_driver, model: str = "gpt-4o"):
-        # Load environment variables
-        self.SeleniumExecutorDriver = selenium_driver
-
-        # Initialize OpenAI client
-        self.client = OpenAIClient(model=model)
-
-    def decide(self, text: str) -> dict:
-        """
-        Takes the transcribed text from the user and returns a structured JSON
-        describing what action should be performed on the interface.
-        """
-
-        system_prompt = (
-            """
+SYSTEM_PROMPT = """
         You are the DecisionMaker Agent in an automated UI control system.
 
         Your goal is to analyze a user's spoken instruction and decide the next UI action to perform.
@@ -58,21 +45,95 @@ class DecisionMaker:
             {"action": "click", "target": "username_field"}
         }
         """
-        )
+
+
+class DecisionStreamError(RuntimeError):
+    """The streamed plan failed, was cut off or held no action."""
+
+
+class _StreamFailure:
+    """Queue marker carrying the exception that ended a plan stream."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class DecisionMaker:
+    """
+    DecisionMaker interprets natural language (spoken or written)
+    and decides what UI action should be performed.
+    Example output:
+        {"action": "click", "target": "username_input"}
+    """
+
+    def __init__(self, selenium_driver, model: str = "gpt-4o",
+                 use_plan_cache: bool = True,
+                 plan_cache_path: str = DEFAULT_PLAN_CACHE_PATH,
+                 use_fast_path: bool = True,
+                 image_config: ImageEncodingConfig = None,
+                 client: OpenAIClient = None):
+        # Load environment variables
+        self.SeleniumExecutorDriver = selenium_driver
+
+        # Initialize OpenAI client, unless a shared one is injected
+        self.client = client or OpenAIClient(model=model, image_config=image_config)
+
+        # Plans already made for the same command on the same screen
+        self.plan_cache = PlanCache(plan_cache_path) if use_plan_cache else None
+
+        # Simple commands are parsed locally instead of asking the LLM
+        self.use_fast_path = use_fast_path
+        self.stats = {"decisions": 0, "fast_path_hits": 0,
+                      "plan_cache_hits": 0, "llm_calls": 0,
+                      "fast_path_time_sec": 0.0, "llm_time_sec": 0.0,
+                      "streamed_llm_calls": 0, "first_action_time_sec": 0.0}
+        # Timing of the most recent streamed decision
+        self.last_stream_timing = None
+
+    def decide(self, text: str) -> dict:
+        """
+        Takes the transcribed text from the user and returns a structured JSON
+        describing what action should be performed on the interface.
+        """
+
+        system_prompt = SYSTEM_PROMPT
 
         user_prompt = f"User command: \"{text}\""
+        self.stats["decisions"] += 1
+
+        if self.use_fast_path:
+            start = time.perf_counter()
+            parsed_plan = parse_command(text)
+            self.stats["fast_path_time_sec"] += time.perf_counter() - start
+            if parsed_plan is not None:
+                self.stats["fast_path_hits"] += 1
+                logger.info("Command parsed locally, skipping LLM call")
+                return parsed_plan
 
         try:
             # 🖼️ Capture current screen directly from SeleniumExecutorDriver
             screenshot = self.SeleniumExecutorDriver.screenshot(
                 draw_cursor=True)
 
+            if self.plan_cache is not None:
+                with span("plan_cache_lookup", "agent") as lookup:
+                    cached_plan = self.plan_cache.get(text, screenshot)
+                    lookup.set(hit=cached_plan is not None)
+                if cached_plan is not None:
+                    self.stats["plan_cache_hits"] += 1
+                    logger.info("Plan cache hit, skipping LLM call")
+                    return cached_plan
+
             # 🔍 Send the text + image to GPT
-            response_text = self.client.send_message_with_images(
-                message=user_prompt,
-                images=screenshot,
-                system_prompt=system_prompt
-            ).strip()
+            start = time.perf_counter()
+            self.stats["llm_calls"] += 1
+            with span("decision_llm", "agent"):
+                response_text = self.client.send_message_with_images(
+                    message=user_prompt,
+                    images=screenshot,
+                    system_prompt=system_prompt
+                ).strip()
+            self.stats["llm_time_sec"] += time.perf_counter() - start
 
             # Try parsing JSON output
             clean_response = re.sub(r"^```[a-zA-Z]*\n?", "", response_text.strip())
@@ -86,6 +147,9 @@ class DecisionMaker:
                 if isinstance(parsed, dict):
                     parsed = [parsed]
 
+                if self.plan_cache is not None and self._is_valid_plan(parsed):
+                    self.plan_cache.put(text, screenshot, parsed)
+
             except json.JSONDecodeError:
                 parsed = {"error": "Could not parse JSON",
                           "raw_response": response_text}
@@ -94,3 +158,120 @@ class DecisionMaker:
         except Exception as e:
             logger.error(f"❌ DecisionMaker failed: {e}")
             return {"action": "none", "target": None, "value": None}
+
+    def decide_stream(self, text: str) -> Iterator[dict]:
+        """
+        Streaming variant of decide: yields each action of the plan as soon
+        as the model has finished generating it, so execution can start on
+        the first action while the rest of the plan is still being written.
+        Fast-path and cached plans are yielded at once.
+
+        The stream is drained on a worker thread as fast as the model sends
+        it, independently of how quickly the caller executes the actions, so
+        time to the first action and total decision time (until the last
+        chunk) are model time only. They are recorded in `last_stream_timing`
+        (None when no LLM call was made) and accumulated in `stats`.
+
+        Raises:
+            DecisionStreamError: After the actions already yielded, when the
+                stream raised, was cut off mid-plan or held no action
+        """
+        user_prompt = f"User command: \"{text}\""
+        self.stats["decisions"] += 1
+        self.last_stream_timing = None
+
+        if self.use_fast_path:
+            start = time.perf_counter()
+            parsed_plan = parse_command(text)
+            self.stats["fast_path_time_sec"] += time.perf_counter() - start
+            if parsed_plan is not None:
+                self.stats["fast_path_hits"] += 1
+                logger.info("Command parsed locally, skipping LLM call")
+                yield from parsed_plan
+                return
+
+        screenshot = self.SeleniumExecutorDriver.screenshot(draw_cursor=True)
+        if self.plan_cache is not None:
+            cached_plan = self.plan_cache.get(text, screenshot)
+            if cached_plan is not None:
+                self.stats["plan_cache_hits"] += 1
+                logger.info("Plan cache hit, skipping LLM call")
+                yield from cached_plan
+                return
+        chunks = self.client.stream_message_with_images(
+            message=user_prompt,
+            images=screenshot,
+            system_prompt=SYSTEM_PROMPT
+        )
+
+        self.stats["llm_calls"] += 1
+        self.stats["streamed_llm_calls"] += 1
+        parser = ActionStreamParser()
+        plan = []
+        actions = queue.Queue()
+        threading.Thread(target=self._drain_stream, args=(chunks, parser, actions),
+                         name="decision-stream", daemon=True).start()
+        while True:
+            action = actions.get()
+            if action is None:
+                break
+            if isinstance(action, _StreamFailure):
+                logger.error(f"❌ DecisionMaker stream failed: {action.error}")
+                raise DecisionStreamError(
+                    f"Plan stream failed after {len(plan)} actions") from action.error
+            plan.append(action)
+            yield action
+
+        if not parser.complete:
+            logger.error(f"❌ Plan stream cut off: {parser.text}")
+            raise DecisionStreamError(f"Plan stream ended mid-plan after {len(plan)} actions")
+        if not plan:
+            logger.error(f"Could not parse any action from: {parser.text}")
+            raise DecisionStreamError("Plan stream contained no action")
+        if self.plan_cache is not None and self._is_valid_plan(plan):
+            self.plan_cache.put(text, screenshot, plan)
+
+    def _drain_stream(self, chunks, parser: ActionStreamParser, actions: queue.Queue):
+        """
+        Read the whole model stream, putting each parsed action on `actions`,
+        then a _StreamFailure if the stream raised, and None once it has
+        ended; the stream timing is recorded before the end is signalled.
+        """
+        start = time.perf_counter()
+        first_action_sec = None
+        count = 0
+        try:
+            for chunk in chunks:
+                for action in parser.feed(chunk):
+                    if first_action_sec is None:
+                        first_action_sec = time.perf_counter() - start
+                        logger.info(f"First action after {first_action_sec:.2f}s")
+                    count += 1
+                    actions.put(action)
+        except Exception as e:
+            actions.put(_StreamFailure(e))
+        finally:
+            parser.close()
+            # Timing is final before the consumer sees the end of the plan
+            total_sec = time.perf_counter() - start
+            self.stats["llm_time_sec"] += total_sec
+            if first_action_sec is not None:
+                self.stats["first_action_time_sec"] += first_action_sec
+            self.last_stream_timing = {"first_action_sec": first_action_sec,
+                                       "total_sec": total_sec,
+                                       "actions": count}
+            tracer.record("decision_llm", "agent", start, total_sec,
+                          stream=True, first_action_sec=first_action_sec,
+                          actions=count)
+            actions.put(None)
+
+    def llm_calls_avoided(self) -> int:
+        """Decisions answered by the local parser or the plan cache."""
+        return self.stats["fast_path_hits"] + self.stats["plan_cache_hits"]
+
+    @staticmethod
+    def _is_valid_plan(plan) -> bool:
+        """Only well-formed action lists are worth caching."""
+        return isinstance(plan, list) and len(plan) > 0 and all(
+            isinstance(step, dict) and "action" in step for step in plan)
+
@@ -1,42 +1,104 @@
-import pyautogui
+import json
+import re
 
+import numpy as np
+
+from agents.grounding_map import GroundingMap
 from models.widget_detector import WidgetDetector
+from openai_integration.image_encoding import ImageEncodingConfig
 from openai_integration.openai_client import OpenAIClient
+from selenium_web_interaction.dom_grounding import DomGroundingEngine
 from selenium_web_interaction.selenium_executor_driver import \
     SeleniumExecutorDriver
+from utils.artifact_writer import ArtifactWriter
 from utils.BoundingBox import BoundingBox
+from utils.cassette import Cassette, CassetteMiss
+from utils.tracing import span
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+
 class ExecutorAgent:
     def __init__(self,
-                 execution_driver: SeleniumExecutorDriver):
+                 execution_driver: SeleniumExecutorDriver,
+                 use_dom_grounding: bool = True,
+                 dom_min_score: float = 0.8,
+                 image_config: ImageEncodingConfig = None,
+                 grounding_mode: str = "annotated",
+                 max_montage_crops: int = 20,
+                 full_page_detection: bool = False,
+                 batch_grounding: bool = False,
+                 client: OpenAIClient = None,
+                 cassette: Cassette = None,
+                 artifact_writer: ArtifactWriter = None,
+                 detector: WidgetDetector = None):
         self.execution_driver = execution_driver
-        self.open_ai_agent = OpenAIClient()
-        self.YOLO_detector = WidgetDetector()
+        # Grounding images are written in the background, off the timed path;
+        # a writer created here is owned, and closed, by shutdown()
+        self._owns_artifacts = artifact_writer is None
+        self.artifacts = artifact_writer or ArtifactWriter(
+            execution_driver.test_run_folder)
+        # Records DOM grounding and YOLO results, or replays them without
+        # a browser or a model
+        self.cassette = cassette
+        # Detect over the whole scrollable page once instead of pressing End
+        # and retrying on the visible screen
+        self.full_page_detection = full_page_detection
+        # Ground all detect targets of a plan with one YOLO pass and one LLM
+        # call, and reuse the boxes while their part of the screen is unchanged
+        self.batch_grounding = batch_grounding
+        self.grounding_map = GroundingMap()
+        # "annotated": full screenshot with numbered boxes,
+        # "montage": overview + labeled crops of the detections only
+        if grounding_mode not in ("annotated", "montage"):
+            raise ValueError(f"Unknown grounding mode: {grounding_mode}")
+        self.grounding_mode = grounding_mode
+        self.max_montage_crops = max_montage_crops
+        self.open_ai_agent = client or OpenAIClient(image_config=image_config)
+        # The Coordinator loads (and warms up) the detector in parallel with
+        # the browser and passes it in
+        self.YOLO_detector = detector or WidgetDetector(cassette=cassette)
+        # Ground targets against the live DOM first; YOLO + LLM is the fallback
+        self.dom_grounding = DomGroundingEngine(execution_driver.driver,
+                                                min_score=dom_min_score) \
+            if use_dom_grounding and execution_driver.driver is not None else None
+        self.grounding_stats = {"dom": 0, "yolo": 0, "full_page": 0, "batch": 0}
         self._init_action_set()
-        system_prompt = """
-        You are an Executor Agent that will be responsible of doing and completing actions that are provided in the plan.
-        You have to be simple and concise regarding the future prompts that will be provided in order to complete the actions.
-        You do not plan sequence of  actions or reflect/verify the correctitude of the actions.
-        You will be working in collaboration with a decision maker agent that will provide the needed action information.
-        Constraints:
-        - Respond only with valid outputs expected for current action.
-        - Do not explain or repeat prompts
-        - Do not explain outputs
-        """
-        self.open_ai_agent.send_message(system_prompt)
         self.last_bounding_box = None
         self.action_type = None
         self.target = None
         self.value = None
         self.action_index = None
+        self.planned_actions = []
+        self.executed_actions = []
+
+    def shutdown(self):
+        """Flush and close the artifact writer if this agent created it."""
+        if self._owns_artifacts:
+            self.artifacts.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
 
     def execute(self, actions):
+        """
+        Execute a plan: a list of actions, or any iterable such as the
+        generator of DecisionMaker.decide_stream, in which case each action
+        runs as soon as it arrives (batch grounding lookahead then only sees
+        the actions received so far). The actions consumed are kept in
+        `executed_actions`.
+        """
+        self.executed_actions = []
         try:
+            # Lookahead for batch grounding is only possible on a complete plan
+            self.planned_actions = actions if isinstance(actions, list) else self.executed_actions
             for index, action in enumerate(actions):
+                self.executed_actions.append(action)
                 self.action_index = index
                 self.action_type = action.get('action')
                 self.target = action.get('target')
@@ -54,7 +116,9 @@ class ExecutorAgent:
                 for func in functions:
                     print(f"➡️ Running: {func.__name__}")
                     try:
-                        func()
+                        with span(func.__name__, "executor",
+                                  action=self.action_type, target=self.target):
+                            func()
                     except Exception as e:
                         print(f"Error while executing {func.__name__}: {e}")
                         continue
@@ -73,11 +137,109 @@ class ExecutorAgent:
         self.execution_driver.click()
 
     def wait(self):
-        self.execution_driver.wait(1.5)
+        self.execution_driver.wait_until_ready(1.5, reason=f"after_{self.action_type}")
 
 
-    def detect_ui_using_YOLO(self):
-        detect_ui_prompt = f"""
+    def detect_ui_using_DOM(self) -> bool:
+        """
+        Try to locate the target through the DOM element index.
+        Returns True when a confident match was found.
+        """
+        if self.cassette is not None and self.cassette.replaying and self.target:
+            return self._replay_DOM()
+        if self.dom_grounding is None or not self.target:
+            return False
+        try:
+            with span("dom_grounding", "executor") as grounding:
+                match = self.dom_grounding.ground(self.target)
+                grounding.set(matched=match is not None)
+        except Exception as e:
+            logger.warning(f"DOM grounding failed: {e}")
+            # Recorded as no match so replay stays aligned with the live run
+            if self.cassette is not None:
+                self.cassette.record("dom", self.target, None)
+            return False
+        if self.cassette is not None:
+            self.cassette.record("dom", self.target,
+                                 list(match.bounding_box) if match is not None else None)
+        if match is None:
+            return False
+        print(f"DOM match for '{self.target}': <{match.element['tag']}> "
+              f"score={match.score:.2f}")
+        self.last_bounding_box = match.bounding_box
+        self.grounding_stats["dom"] += 1
+        return True
+
+    def _replay_DOM(self) -> bool:
+        """Recorded DOM grounding answer; False when none was recorded."""
+        try:
+            box = self.cassette.next("dom", self.target)
+        except CassetteMiss:
+            return False
+        if box is None:
+            return False
+        self.last_bounding_box = BoundingBox(*box)
+        self.grounding_stats["dom"] += 1
+        return True
+
+    def _rank_detections(self, boxes, targets=None) -> list:
+        """
+        Order detection IDs for the montage: boxes overlapping DOM elements
+        that loosely match the target (or any of `targets`) first, then by
+        confidence.
+        """
+        candidates = []
+        targets = targets or ([self.target] if self.target else [])
+        if self.dom_grounding is not None:
+            for target in targets:
+                try:
+                    candidates.extend(self.dom_grounding.candidates(target))
+                except Exception as e:
+                    logger.debug(f"No DOM candidates for ranking: {e}")
+        if not candidates or len(boxes) == 0:
+            return boxes.ranked().tolist()
+
+        candidate_xyxy = np.array(
+            [self.execution_driver.screen_to_frame(c.bounding_box).to_xyxy()
+             for c in candidates], dtype=np.float32)
+        scores = np.array([c.score for c in candidates], dtype=np.float32)
+        relevance = (boxes.overlap_fraction(candidate_xyxy) * scores).max(axis=1)
+        # lexsort sorts by the last key first
+        return np.lexsort((-boxes.conf, -relevance)).tolist()
+
+    def _grounding_image(self, boxes, targets=None):
+        """Image sent to the LLM to pick a box, according to the grounding mode."""
+        if self.grounding_mode == "montage":
+            montage, _ = self.YOLO_detector.build_crop_montage(
+                ids=self._rank_detections(boxes, targets),
+                max_crops=self.max_montage_crops)
+            return montage
+        return self.YOLO_detector.attach_bounding_boxes()
+
+    def _grounding_prompt(self, full_page: bool = False) -> str:
+        if full_page:
+            return f"""
+        You are a vision-based detector agent.
+        You will receive one image: a small overview of the whole web page (including the parts
+        that are scrolled out of view) at the top, followed by a grid of crops of detected UI
+        elements. Each crop has its numeric ID written directly above it.
+        The user wants to perform the action: {self.action_type} on target: {self.target}.
+        Return ONLY the numeric ID of the crop corresponding to that target if the target is not on the page, return 'NO VISIBLE'.
+        For example: 1
+        No explanation, no extra text. Don't say a numeric id if you can't see it.
+        """
+        if self.grounding_mode == "montage":
+            return f"""
+        You are a vision-based detector agent.
+        You will receive one image: a small overview of the whole screen at the top,
+        followed by a grid of crops of detected UI elements. Each crop has its numeric ID
+        written directly above it.
+        The user wants to perform the action: {self.action_type} on target: {self.target}.
+        Return ONLY the numeric ID of the crop corresponding to that target if the target is not visible, return 'NO VISIBLE'.
+        For example: 1
+        No explanation, no extra text. Don't say a numeric id if you can't see it.
+        """
+        return f"""
         You are a vision-based detector agent.
         You will receive an image showing several bounding boxes with numeric IDs overlaid.
         The user wants to perform the action: {self.action_type} on target: {self.target}.
@@ -87,33 +249,156 @@ class ExecutorAgent:
         That means that each number corresponds to the box is located on **left side** of the box.
         No explanation, no extra text. Don't say a numeric id if you can't see it.
         """
-        max_retries = 0
-        target_achieved = False
-        while not target_achieved and max_retries < 3:
-            max_retries += 1
-            full_screenshot = self.execution_driver.screenshot()
-            boxes = self.YOLO_detector.predict(full_screenshot)
-            image_with_bbox = self.YOLO_detector.attach_bounding_boxes()
-            self.execution_driver.save_screenshot(image_with_bbox,f'YOLO_detection_{self.action_index}.png')
-            bounding_box = None
+
+    def _ask_for_box_id(self, prompt, image, boxes):
+        """Ask the LLM for the ID of the target box; raise if it gives none."""
+        with span("grounding_llm", "executor", boxes=len(boxes)):
             response = self.open_ai_agent.send_message_with_images(
-                detect_ui_prompt, images=image_with_bbox)
+                prompt, images=image)
+        response = int(response)
+        print(f"Click on ID: {response}")
+        if not 0 <= response < len(boxes):
+            raise ValueError(f"No detection with ID {response}")
+        return boxes.box(response)
+
+    def detect_ui_on_full_page(self) -> bool:
+        """
+        Detect over the whole scrollable page in one pass, then scroll the
+        chosen box into view. The full page is always shown as a crop montage,
+        since a page-tall annotated screenshot is unreadable once downscaled.
+        Returns True when the target was grounded.
+        """
+        page = self.execution_driver.capture_full_page()
+        boxes = self.YOLO_detector.predict_full_page(page)
+        self.grounding_stats["full_page"] += 1
+        if len(boxes) == 0:
+            return False
+        montage, _ = self.YOLO_detector.build_crop_montage(
+            ids=boxes.ranked(), max_crops=self.max_montage_crops)
+        filename = f'YOLO_full_page_{self.action_index}.png'
+        try:
+            bounding_box = self._ask_for_box_id(self._grounding_prompt(full_page=True),
+                                                montage, boxes)
+        except Exception as e:
+            print(f"Target not found on the full page: {e}")
+            self.artifacts.save(montage, filename, failed=True)
+            return False
+        self.artifacts.save(montage, filename)
+        self.last_bounding_box = self.execution_driver.scroll_page_box_into_view(
+            bounding_box)
+        return True
+
+    def _batch_grounding_prompt(self, targets) -> str:
+        if self.grounding_mode == "montage":
+            image_description = ("a small overview of the whole screen at the top, followed by a grid "
+                                 "of crops of detected UI elements, each with its numeric ID written above it")
+        else:
+            image_description = "several bounding boxes with numeric IDs drawn on the left side of each box"
+        return f"""
+        You are a vision-based detector agent.
+        You will receive an image showing {image_description}.
+        The user will act on these targets: {json.dumps(targets)}.
+        Return ONLY a JSON object mapping each target to the numeric ID of its box, or null if the target is not visible.
+        For example: {{"username_field": 3, "login_button": null}}
+        No explanation, no extra text. Don't say a numeric id if you can't see it.
+        """
+
+    def _pending_detect_targets(self) -> list:
+        """Distinct targets of the detect actions from the current one onward."""
+        targets = []
+        for action in self.planned_actions[self.action_index:]:
+            target = action.get('target')
+            if action.get('action') == 'detect' and target and target not in targets:
+                targets.append(target)
+        return targets
+
+    def _ground_batch(self, screenshot, targets):
+        """One YOLO pass and one LLM call resolving every target on the screen."""
+        boxes = self.YOLO_detector.predict(screenshot)
+        mapping = dict.fromkeys(targets)
+        if len(boxes) > 0:
+            image = self._grounding_image(boxes, targets)
+            with span("grounding_llm", "executor", boxes=len(boxes),
+                      targets=len(targets)):
+                response = self.open_ai_agent.send_message_with_images(
+                    self._batch_grounding_prompt(targets), images=image)
+            try:
+                ids = json.loads(re.search(r"\{.*\}", response, re.S).group(0))
+            except (AttributeError, json.JSONDecodeError):
+                logger.warning(f"Could not parse batch grounding response: {response}")
+                ids = {}
+            for target in targets:
+                box_id = ids.get(target)
+                if isinstance(box_id, int) and 0 <= box_id < len(boxes):
+                    mapping[target] = boxes.box(box_id)
+            self.artifacts.save(image, f'YOLO_batch_{self.action_index}.png',
+                                failed=None in mapping.values())
+        print(f"Batch grounded {sum(box is not None for box in mapping.values())}"
+              f"/{len(targets)} targets")
+        self.grounding_map.reset(screenshot, mapping)
+
+    def detect_ui_using_batch(self) -> tuple:
+        """
+        Resolve the target from the batch grounding map, running a new batch
+        pass over the remaining detect targets when the map does not cover it.
+
+        Returns:
+            (True when the target was grounded, the screenshot taken or None),
+            so a failed lookup can hand its screenshot to the YOLO path
+        """
+        if self.target not in self.grounding_map and \
+                len(self._pending_detect_targets()) < 2:
+            return False, None
+        screenshot = self.execution_driver.screenshot()
+        if self.target not in self.grounding_map:
+            self._ground_batch(screenshot, self._pending_detect_targets())
+        bounding_box = self.grounding_map.lookup(self.target, screenshot)
+        if bounding_box is None:
+            return False, screenshot
+        self.last_bounding_box = self.execution_driver.frame_to_screen(bounding_box)
+        self.grounding_stats["batch"] += 1
+        return True, screenshot
+
+    def detect_ui_using_YOLO(self):
+        if self.detect_ui_using_DOM():
+            return
+        screenshot = None
+        if self.batch_grounding and self.target:
+            grounded, screenshot = self.detect_ui_using_batch()
+            if grounded:
+                return
+        self.grounding_stats["yolo"] += 1
+        detect_ui_prompt = self._grounding_prompt()
+        # With full-page detection the visible screen gets one attempt, then
+        # the whole page is searched once instead of scrolling and retrying
+        attempts = 1 if self.full_page_detection else 3
+        for attempt in range(attempts):
+            # The batch lookup's screenshot is the current screen already
+            full_screenshot = screenshot if attempt == 0 and screenshot is not None \
+                else self.execution_driver.screenshot()
+            boxes = self.YOLO_detector.predict(full_screenshot)
+            image_with_bbox = self._grounding_image(boxes)
+            filename = f'YOLO_detection_{self.action_index}.png'
             try:
-                response = int(response)
-                print(f"Click on ID: {response}")
-                for id_b in boxes.keys():
-                    if id_b == response:
-                        bounding_box = boxes[id_b]['bounding_box']
-                        target_achieved = True
-                self.last_bounding_box = BoundingBox(*bounding_box)
+                bounding_box = self._ask_for_box_id(detect_ui_prompt,
+                                                    image_with_bbox, boxes)
+                self.last_bounding_box = self.execution_driver.frame_to_screen(
+                    bounding_box)
+                self.artifacts.save(image_with_bbox, filename)
+                return
             except:
-                pyautogui.press('end')
-                self.execution_driver.wait(1)
-                continue
+                self.artifacts.save(image_with_bbox, filename, failed=True)
+                if self.full_page_detection:
+                    break
+                self.execution_driver.scroll_to_end()
+                self.execution_driver.wait_for_frame_stable(1.0, reason="scroll_retry")
+        if self.full_page_detection:
+            self.detect_ui_on_full_page()
 
     def _init_action_set(self):
         self.action_list = {
             'detect': [self.detect_ui_using_YOLO, self.wait, self.move_cursor_to],
             'click': [self.click, self.wait],
-            'type': [self.type_string_into, self.wait]
+            'type': [self.type_string_into, self.wait],
+            'wait': [self.wait]
         }
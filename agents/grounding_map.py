@@ -0,0 +1,92 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from models.detection_cache import tile_fingerprint
+from utils.BoundingBox import BoundingBox
+
+
+class GroundingMap:
+    """
+    Target -> bounding box map produced by one batch grounding pass.
+
+    A box stays valid while the screen tiles it covers are unchanged since
+    the pass, so typing into one field does not invalidate the boxes of the
+    other fields. A frame of a different size, or one where a large part of
+    the screen changed (navigation, scroll, dialog), drops the whole map.
+    """
+
+    def __init__(self, grid: Tuple[int, int] = (16, 12),
+                 tile_threshold: float = 2.0, max_changed_fraction: float = 0.4):
+        """
+        Args:
+            grid: Number of (columns, rows) tiles of the screen fingerprint
+            tile_threshold: Mean absolute grayscale difference above which a
+                tile counts as changed
+            max_changed_fraction: Above this fraction of changed tiles the
+                screen is considered a different one and the map is dropped
+        """
+        self.grid = grid
+        self.tile_threshold = tile_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self._boxes = {}
+        self._fingerprint = None
+        self._shape = None
+
+    def reset(self, frame, boxes: Dict[str, Optional[BoundingBox]]):
+        """
+        Replace the map with the result of a batch pass on `frame`.
+
+        Args:
+            frame: Screenshot (PIL image or RGB array) the boxes were detected on
+            boxes: Target -> box in frame pixels (None when not visible)
+        """
+        frame = np.asarray(frame)
+        self.batches += 1
+        self._boxes = dict(boxes)
+        self._fingerprint = tile_fingerprint(frame, self.grid)
+        self._shape = frame.shape
+
+    def __contains__(self, target: str) -> bool:
+        return target in self._boxes
+
+    def lookup(self, target: str, frame) -> Optional[BoundingBox]:
+        """Box of the target in frame pixels if still valid on `frame`, else None."""
+        box = self._boxes.get(target)
+        if box is None or self._fingerprint is None:
+            self.misses += 1
+            return None
+        frame = np.asarray(frame)
+        if frame.shape != self._shape:
+            self.invalidate()
+            self.misses += 1
+            return None
+
+        diff = np.abs(tile_fingerprint(frame, self.grid) - self._fingerprint).mean(axis=(2, 3))
+        changed = diff > self.tile_threshold
+        if changed.mean() > self.max_changed_fraction:
+            self.invalidate()
+            self.misses += 1
+            return None
+
+        height, width = frame.shape[:2]
+        tile_w, tile_h = width / self.grid[0], height / self.grid[1]
+        x1, y1, x2, y2 = box.to_xyxy()
+        cols = slice(int(max(0, x1 // tile_w)), int(min(self.grid[0], x2 // tile_w + 1)))
+        rows = slice(int(max(0, y1 // tile_h)), int(min(self.grid[1], y2 // tile_h + 1)))
+        if changed[rows, cols].any():
+            del self._boxes[target]
+            self.misses += 1
+            return None
+        self.hits += 1
+        return box
+
+    def invalidate(self):
+        self._boxes = {}
+        self._fingerprint = None
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,128 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from PIL import Image
+
+from utils.image_hashing import perceptual_hash, hamming_distance
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLAN_CACHE_PATH = os.path.join(".cache", "plans.json")
+
+
+def normalize_command(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace of a transcript."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class PlanCache:
+    """
+    Cache of DecisionMaker plans keyed by the normalized command text and a
+    perceptual hash of the screen the plan was made for.
+
+    A lookup hits when an entry with the same command text has a screen hash
+    within `max_distance` bits of the current one and is younger than
+    `ttl_sec`. Entries are bounded with LRU eviction and persisted as JSON.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_PLAN_CACHE_PATH,
+                 max_distance: int = 10, ttl_sec: float = 7 * 24 * 3600,
+                 max_entries: int = 512):
+        """
+        Args:
+            path: JSON file the cache is persisted to (None keeps it in memory)
+            max_distance: Maximum Hamming distance between screen hashes
+                (out of 256 bits) still considered the same page state
+            ttl_sec: Age after which an entry is no longer used
+            max_entries: Maximum number of stored plans
+        """
+        self.path = path
+        self.max_distance = max_distance
+        self.ttl_sec = ttl_sec
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # (normalized command, screen hash) -> {"plan": [...], "created_at": t}
+        self._entries = OrderedDict()
+        self._load()
+
+    def get(self, text: str, screenshot: Image.Image) -> Optional[list]:
+        """Return a cached plan for the command on this screen, or None."""
+        command = normalize_command(text)
+        screen_hash = perceptual_hash(screenshot)
+        now = time.time()
+        with self._lock:
+            best_key, best_distance = None, None
+            for key, entry in list(self._entries.items()):
+                if now - entry["created_at"] > self.ttl_sec:
+                    del self._entries[key]
+                    continue
+                if key[0] != command:
+                    continue
+                distance = hamming_distance(key[1], screen_hash)
+                if distance <= self.max_distance and \
+                        (best_distance is None or distance < best_distance):
+                    best_key, best_distance = key, distance
+            if best_key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self.hits += 1
+            return self._entries[best_key]["plan"]
+
+    def put(self, text: str, screenshot: Image.Image, plan: list):
+        """Store a plan for the command on this screen and persist the cache."""
+        key = (normalize_command(text), perceptual_hash(screenshot))
+        with self._lock:
+            self._entries[key] = {"plan": plan, "created_at": time.time()}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                records = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable plan cache {self.path}: {e}")
+            return
+        for record in records:
+            key = (record["command"], int(record["screen_hash"], 16))
+            self._entries[key] = {"plan": record["plan"],
+                                  "created_at": record["created_at"]}
+
+    def _save(self):
+        if not self.path:
+            return
+        records = [{"command": command, "screen_hash": f"{screen_hash:x}",
+                    "plan": entry["plan"], "created_at": entry["created_at"]}
+                   for (command, screen_hash), entry in self._entries.items()]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not persist plan cache: {e}")
@@ -0,0 +1,80 @@
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ActionStreamParser:
+    """
+    Incremental parser that extracts action objects from a streamed LLM
+    response as soon as each one is complete.
+
+    Text outside JSON (code fences, prose) is ignored. Every complete object
+    with an "action" key is emitted, whether it sits in a top-level array,
+    stands alone, or is nested in a malformed wrapper; an enclosing object is
+    not emitted again once one of its children was.
+    """
+
+    def __init__(self):
+        self._buffer = []
+        self._in_string = False
+        self._escaped = False
+        # One entry per open object/array: [opening char, start offset,
+        # whether a nested action was already emitted]
+        self._stack = []
+        self._length = 0
+        self.text = ""
+
+    def feed(self, chunk: str) -> list:
+        """Consume a chunk of text and return the action objects it completed."""
+        actions = []
+        for char in chunk:
+            self._buffer.append(char)
+            position = self._length
+            self._length += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if not self._stack and char not in "[{":
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._stack.append([char, position, False])
+            elif char in "]}" and self._stack:
+                opening, start, emitted_child = self._stack.pop()
+                if opening != "{" or emitted_child:
+                    if emitted_child and self._stack:
+                        self._stack[-1][2] = True
+                    continue
+                action = self._decode(start, position + 1)
+                if action is not None:
+                    actions.append(action)
+                    if self._stack:
+                        self._stack[-1][2] = True
+        return actions
+
+    def _decode(self, start: int, end: int):
+        candidate = "".join(self._buffer[start:end])
+        try:
+            value = json.loads(candidate)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(value, dict) and "action" in value:
+            return value
+        return None
+
+    @property
+    def complete(self) -> bool:
+        """False while an object, array or string is still open (a cut-off plan)."""
+        return not self._stack and not self._in_string
+
+    def close(self) -> str:
+        """Return the whole received text once the stream has ended."""
+        self.text = "".join(self._buffer)
+        return self.text
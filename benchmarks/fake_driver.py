@@ -0,0 +1,163 @@
+"""
+Browser stand-in serving recorded screenshots, with the interface of
+SeleniumExecutorDriver used by the Coordinator and both agents.
+"""
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from selenium_web_interaction.readiness import FixedWaiter
+from selenium_web_interaction.screen_capture import CaptureMetrics
+from utils.BoundingBox import BoundingBox
+from utils.cassette import recorded_frame_paths
+from utils.tracing import span
+
+
+class _NoInput:
+    name = "fake"
+
+
+def load_frames(folder: str, limit: Optional[int] = None) -> list:
+    """
+    RGB arrays of the raw screen frames recorded by the cassettes under
+    `folder`, in recording order (not the annotated artifacts beside them).
+    """
+    paths = recorded_frame_paths(folder)
+    frames = []
+    for path in paths[:limit]:
+        with Image.open(path) as image:
+            frames.append(np.asarray(image.convert("RGB")))
+    return frames
+
+
+class FakeExecutorDriver:
+    """
+    Serves a fixed sequence of screenshots: the current frame advances on
+    every click, as if each click navigated to the next recorded screen.
+    Input actions and waits cost `action_latency_sec` and nothing else, so the
+    benchmark measures the pipeline rather than the desktop.
+    """
+
+    def __init__(self, frames: list, test_run_folder: str,
+                 action_latency_sec: float = 0.0, save_screenshots: bool = False,
+                 cassette=None):
+        """
+        Args:
+            frames: RGB arrays served as the screen, in order
+            test_run_folder: Folder of the run (screenshots go there if saved)
+            action_latency_sec: Simulated duration of each input action
+            save_screenshots: Write the grounding images like the real driver
+            cassette: Recording cassette; screenshots and full-page captures
+                are recorded like SeleniumExecutorDriver does
+        """
+        if not frames:
+            raise ValueError("The fake driver needs at least one screenshot")
+        self.frames = frames
+        self.test_run_folder = test_run_folder
+        self.action_latency_sec = action_latency_sec
+        self.save_screenshots = save_screenshots
+        self.cassette = cassette
+        self.driver = None
+        self.frame_index = 0
+        self.capture_mode = "fake"
+        self.input_backend = _NoInput()
+        self.waiter = FixedWaiter()
+        self.capture_metrics = CaptureMetrics()
+        self.action_timings = []
+        self.cursor_position = None
+
+    @property
+    def current_frame(self) -> np.ndarray:
+        return self.frames[min(self.frame_index, len(self.frames) - 1)]
+
+    def _record_action(self, action: str, **details):
+        start = time.perf_counter()
+        with span(f"input.{action}", "input", mode="fake"):
+            if self.action_latency_sec:
+                time.sleep(self.action_latency_sec)
+        self.action_timings.append({"action": action, "mode": "fake",
+                                    "duration_sec": time.perf_counter() - start,
+                                    **details})
+
+    # Browser control
+    def load_url(self, url: str):
+        self.frame_index = 0
+
+    def quit(self):
+        pass
+
+    # Input
+    def move_cursor_to(self, bounding_box: Optional[BoundingBox] = None, **kwargs):
+        if bounding_box:
+            self.cursor_position = bounding_box.center()
+        self._record_action("move")
+
+    def click(self, double_click: bool = False):
+        self._record_action("click")
+        self.frame_index += 1
+
+    def type_string(self, text: str, delay_between_keys: float = None):
+        self._record_action("type", characters=len(text))
+
+    def press_key(self, key: str):
+        self._record_action("key", key=key)
+
+    def scroll_to_end(self):
+        self.press_key("end")
+
+    # Waits return at once: the recorded screens are always ready
+    def wait(self, seconds: float = 2.0):
+        pass
+
+    def wait_until_ready(self, timeout: float = 2.0, reason: str = "") -> float:
+        return 0.0
+
+    def wait_for_frame_stable(self, timeout: float = 1.0, reason: str = "") -> float:
+        # Polls like the real driver, without recording the polled frames
+        self.capture_frame()
+        return 0.0
+
+    # Capture
+    def capture_frame(self, region: Optional[Tuple[float, float, float, float]] = None) -> np.ndarray:
+        start = time.perf_counter()
+        frame = self.current_frame
+        if region is not None:
+            x, y, width, height = (int(v) for v in region)
+            frame = frame[y:y + height, x:x + width]
+        self.capture_metrics.record(time.perf_counter() - start, frame.nbytes)
+        return frame
+
+    def screenshot(self, draw_cursor=False, region=None):
+        with span("screenshot", "capture", mode="fake"):
+            image = Image.fromarray(self.capture_frame(region))
+        if self.cassette is not None:
+            self.cassette.record_frame(np.asarray(image))
+        return image
+
+    def capture_full_page(self) -> np.ndarray:
+        frame = self.capture_frame()
+        if self.cassette is not None:
+            self.cassette.record_frame(frame)
+        return frame
+
+    def scroll_page_box_into_view(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def frame_to_screen(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def screen_to_frame(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def window_geometry(self) -> dict:
+        height, width = self.current_frame.shape[:2]
+        return {"screenX": 0, "screenY": 0, "outerWidth": width,
+                "outerHeight": height, "innerWidth": width, "innerHeight": height,
+                "scrollX": 0, "scrollY": 0, "devicePixelRatio": 1}
+
+    def save_screenshot(self, image, filename: str):
+        if self.save_screenshots:
+            image.save(os.path.join(self.test_run_folder, filename))
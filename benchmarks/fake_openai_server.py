@@ -0,0 +1,214 @@
+"""
+Local stand-in for the OpenAI chat and transcription endpoints.
+
+Answers with canned responses from a scenario after a configurable latency,
+so the whole pipeline can be benchmarked without network or API credits.
+Point the clients at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agents.plan_cache import normalize_command
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_SEC = {"transcription": 0.6, "decision": 1.2,
+                       "grounding": 0.9, "batch_grounding": 1.1}
+
+
+class Scenario:
+    """
+    Canned answers of a benchmark scenario, loaded from JSON:
+
+        {
+          "transcripts": {"1": "type standard_user in the username field", ...},
+          "plans": {"<command text>": [{"action": "detect", ...}, ...]},
+          "grounding": {"<target>": 3, "default": 0}
+        }
+
+    Transcripts are keyed by audio file stem and plans by normalized command
+    text. Unknown commands get a detect/click plan on a generic target.
+    """
+
+    def __init__(self, path: str = None):
+        data = {}
+        if path:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        self.transcripts = data.get("transcripts", {})
+        self.plans = {normalize_command(text): plan
+                      for text, plan in data.get("plans", {}).items()}
+        self.grounding = data.get("grounding", {})
+
+    def transcript(self, filename: str) -> str:
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        return self.transcripts.get(stem, f"open item number {stem}")
+
+    def plan(self, command: str) -> list:
+        plan = self.plans.get(normalize_command(command))
+        if plan is not None:
+            return plan
+        return [{"action": "detect", "target": "primary_button"},
+                {"action": "click", "target": "primary_button"},
+                {"action": "wait"}]
+
+    def box_id(self, target: str) -> int:
+        return self.grounding.get(target, self.grounding.get("default", 0))
+
+
+class FakeOpenAIServer:
+    """
+    Threaded HTTP server speaking the subset of the OpenAI API the clients
+    use: chat completions (plain and streamed, with usage) and audio
+    transcriptions.
+    """
+
+    def __init__(self, scenario: Scenario = None, latency_sec: dict = None,
+                 jitter: float = 0.1, stream_chunk_chars: int = 12,
+                 stream_chunk_sec: float = 0.02, port: int = 0, seed: int = 0):
+        """
+        Args:
+            scenario: Canned answers (default: generic plans and ID 0)
+            latency_sec: Base latency per request kind ("transcription",
+                "decision", "grounding", "batch_grounding")
+            jitter: Relative random variation applied to each latency
+            stream_chunk_chars: Characters per streamed chunk
+            stream_chunk_sec: Delay between streamed chunks
+            port: Listening port (0 picks a free one)
+            seed: Seed of the latency jitter, for repeatable runs
+        """
+        self.scenario = scenario or Scenario()
+        self.latency_sec = dict(DEFAULT_LATENCY_SEC, **(latency_sec or {}))
+        self.jitter = jitter
+        self.stream_chunk_chars = stream_chunk_chars
+        self.stream_chunk_sec = stream_chunk_sec
+        self.requests = {kind: 0 for kind in self.latency_sec}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def start(self) -> "FakeOpenAIServer":
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name="fake-openai", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake OpenAI server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _delay(self, kind: str):
+        with self._lock:
+            self.requests[kind] += 1
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, self.latency_sec[kind] * factor))
+
+    def _chat_answer(self, body: dict) -> tuple:
+        """Return (request kind, answer text) for a chat completion request."""
+        messages = body.get("messages", [])
+        system = " ".join(m["content"] for m in messages
+                          if m["role"] == "system" and isinstance(m["content"], str))
+        user = messages[-1]["content"] if messages else ""
+        if not isinstance(user, str):
+            user = " ".join(part.get("text", "") for part in user
+                            if part.get("type") == "text")
+        if "DecisionMaker" in system:
+            command = re.search(r'User command: "(.*)"', user, re.S)
+            plan = self.scenario.plan(command.group(1) if command else user)
+            return "decision", json.dumps(plan)
+        if "JSON object mapping each target" in user:
+            targets = re.search(r"targets: (\[.*?\])", user, re.S)
+            targets = json.loads(targets.group(1)) if targets else []
+            return "batch_grounding", json.dumps(
+                {target: self.scenario.box_id(target) for target in targets})
+        target = re.search(r"on target: (.*?)\.\n", user)
+        return "grounding", str(self.scenario.box_id(target.group(1) if target else ""))
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+            def _send_json(self, payload: dict):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.endswith("/audio/transcriptions"):
+                    filename = re.search(rb'filename="([^"]+)"', body)
+                    server._delay("transcription")
+                    self._send_json({"text": server.scenario.transcript(
+                        filename.group(1).decode() if filename else "")})
+                elif self.path.endswith("/chat/completions"):
+                    request = json.loads(body)
+                    kind, answer = server._chat_answer(request)
+                    server._delay(kind)
+                    usage = {"prompt_tokens": len(body) // 4,
+                             "completion_tokens": max(1, len(answer) // 4)}
+                    usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+                    if request.get("stream"):
+                        self._stream(request, answer, usage)
+                    else:
+                        self._send_json({
+                            "id": "chatcmpl-fake", "object": "chat.completion",
+                            "created": int(time.time()), "model": request.get("model"),
+                            "choices": [{"index": 0, "finish_reason": "stop",
+                                         "message": {"role": "assistant",
+                                                     "content": answer}}],
+                            "usage": usage})
+                else:
+                    self.send_error(404)
+
+            def _stream(self, request: dict, answer: str, usage: dict):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                base = {"id": "chatcmpl-fake", "object": "chat.completion.chunk",
+                        "created": int(time.time()), "model": request.get("model")}
+                step = server.stream_chunk_chars
+                for i in range(0, len(answer), step):
+                    self._event(dict(base, choices=[{
+                        "index": 0, "finish_reason": None,
+                        "delta": {"content": answer[i:i + step]}}]))
+                    time.sleep(server.stream_chunk_sec)
+                if (request.get("stream_options") or {}).get("include_usage"):
+                    self._event(dict(base, choices=[], usage=usage))
+                self._chunk(b"data: [DONE]\n\n")
+                self._chunk(b"")
+
+            def _event(self, payload: dict):
+                self._chunk(b"data: " + json.dumps(payload).encode("utf-8") + b"\n\n")
+
+            def _chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
@@ -0,0 +1,257 @@
+"""
+Offline end-to-end benchmark of Coordinator.run_voice_flow.
+
+OpenAI and Whisper are replaced by a local fake server with configurable
+latency, and the browser by a fake driver serving the screen frames recorded
+by cassettes; WidgetDetector runs for real. Reports per-stage and end-to-end
+p50/p95 latency, throughput and peak RSS, tagged with the git commit so
+results can be compared across commits.
+
+Usage:
+    python -m benchmarks.run_benchmark --screenshots runs --repeats 3
+    python -m benchmarks.run_benchmark --screenshots runs --compare benchmarks/results/<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from dotenv import load_dotenv
+
+from benchmarks.fake_driver import FakeExecutorDriver, load_frames
+from benchmarks.fake_openai_server import FakeOpenAIServer, Scenario, \
+    DEFAULT_LATENCY_SEC
+from utils.file_utils import get_sorted_audio_files
+from utils.tracing import tracer
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, "benchmarks", "results")
+DEFAULT_SCENARIO = os.path.join(REPO_DIR, "benchmarks", "scenarios", "default.json")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MiB (0.0 when it cannot be measured)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    except ImportError:
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return 0.0
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+
+def resolve_model_paths():
+    """
+    Make the YOLO weights path absolute: repeats run from scratch directories,
+    where a path relative to the launch directory (or the repo) would not resolve.
+    """
+    load_dotenv(os.path.join(REPO_DIR, ".env"))
+    weights = os.getenv("YOLO_WEIGHTS")
+    if not weights or os.path.isabs(weights):
+        return
+    candidates = [os.path.abspath(weights), os.path.join(REPO_DIR, weights)]
+    os.environ["YOLO_WEIGHTS"] = next(
+        (path for path in candidates if os.path.exists(path)), candidates[0])
+
+
+def git_revision() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=REPO_DIR, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+    return {"commit": git("rev-parse", "HEAD"),
+            "subject": git("log", "-1", "--format=%s"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def percentiles(values: list) -> dict:
+    values_ms = 1000 * np.asarray(values)
+    return {"count": len(values),
+            "p50_ms": float(np.percentile(values_ms, 50)),
+            "p95_ms": float(np.percentile(values_ms, 95)),
+            "mean_ms": float(values_ms.mean())}
+
+
+def run_once(args, frames: list, commands: list) -> dict:
+    """One full session on a fresh Coordinator; returns the spans and timings."""
+    # Imported here so OPENAI_BASE_URL is set before any client is built
+    from coordination.coordinator import Coordinator
+    from openai_integration.image_encoding import ImageEncodingConfig
+
+    start = time.perf_counter()
+    driver = FakeExecutorDriver(frames, test_run_folder=os.getcwd(),
+                                action_latency_sec=args.action_latency)
+    coordinator = Coordinator(
+        start_url=None,
+        pipelined=args.pipelined,
+        image_config=ImageEncodingConfig.compact() if args.compact_images else None,
+        grounding_mode=args.grounding_mode,
+        batch_grounding=args.batch_grounding,
+        streaming=args.streaming,
+        execution_driver=driver,
+        playback=False,
+        dom_grounding=False,
+        artifact_policy=args.artifacts,
+    )
+    driver.test_run_folder = coordinator.test_run_folder
+    startup_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    coordinator.run_voice_flow(commands)
+    session_sec = time.perf_counter() - start
+    spans = list(tracer.spans)
+    coordinator.shutdown()
+    return {"startup_sec": startup_sec, "session_sec": session_sec,
+            "time_to_first_command_sec": coordinator.time_to_first_command_sec or 0.0,
+            "spans": spans}
+
+
+def detection_cache_stats(spans: list) -> dict:
+    """
+    Detection cache hit rate over the yolo_predict spans, with the latency of
+    each cache result ("hit", "partial", "miss", "disabled"), since the
+    yolo_predict stage mixes cached and uncached frames.
+    """
+    latencies = {}
+    for s in spans:
+        if s.name == "yolo_predict":
+            latencies.setdefault(s.attributes.get("cache", "disabled"), []).append(s.wall_sec)
+    lookups = sum(len(latencies.get(kind, [])) for kind in ("hit", "partial", "miss"))
+    return {"hit_rate": len(latencies.get("hit", [])) / lookups if lookups else 0.0,
+            "results": {kind: percentiles(values)
+                        for kind, values in sorted(latencies.items())}}
+
+
+def summarize(runs: list, commands: int) -> dict:
+    stages = {}
+    for run in runs:
+        for s in run["spans"]:
+            stages.setdefault(s.name, []).append(s.wall_sec)
+    total_sec = sum(run["session_sec"] for run in runs)
+    return {
+        "end_to_end": percentiles(stages.get("voice_command", [0.0])),
+        "session": percentiles([run["session_sec"] for run in runs]),
+        "startup": percentiles([run["startup_sec"] for run in runs]),
+        "time_to_first_command": percentiles([run["time_to_first_command_sec"]
+                                              for run in runs]),
+        "commands_per_minute": 60 * commands * len(runs) / total_sec if total_sec else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "detection_cache": detection_cache_stats(
+            [s for run in runs for s in run["spans"]]),
+        "stages": {name: percentiles(values) for name, values in sorted(stages.items())},
+    }
+
+
+def print_report(result: dict, baseline: dict = None):
+    summary = result["summary"]
+    revision = result["revision"]
+    print(f"\nCommit {revision['commit']}{' (dirty)' if revision['dirty'] else ''}: "
+          f"{revision['subject']}")
+    print(f"{'stage':<28} {'n':>5} {'p50 ms':>9} {'p95 ms':>9}"
+          + (f" {'Δp50 %':>8}" if baseline else ""))
+    rows = [("end_to_end", summary["end_to_end"])] + list(summary["stages"].items())
+    for name, stats in rows:
+        line = f"{name:<28} {stats['count']:>5} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f}"
+        if baseline:
+            old = baseline["summary"]["stages"].get(name) if name != "end_to_end" \
+                else baseline["summary"]["end_to_end"]
+            if old and old["p50_ms"]:
+                line += f" {100 * (stats['p50_ms'] / old['p50_ms'] - 1):>+8.1f}"
+        print(line)
+    print(f"Throughput: {summary['commands_per_minute']:.1f} commands/min, "
+          f"startup p50 {summary['startup']['p50_ms']:.0f} ms, "
+          f"first command p50 {summary['time_to_first_command']['p50_ms']:.0f} ms, "
+          f"peak RSS {summary['peak_rss_mb']:.0f} MiB")
+    cache = summary.get("detection_cache")
+    if cache and cache["results"]:
+        print(f"Detection cache hit rate {100 * cache['hit_rate']:.0f}%: " + ", ".join(
+            f"{kind} n={stats['count']} p50 {stats['p50_ms']:.1f} ms"
+            for kind, stats in cache["results"].items()))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark.")
+    parser.add_argument("--screenshots", default="runs",
+                        help="Folder searched recursively for cassettes; their recorded "
+                             "frames are served by the fake driver")
+    parser.add_argument("--commands", default="voice_commands",
+                        help="Folder of the .wav voice commands")
+    parser.add_argument("--scenario", default=DEFAULT_SCENARIO,
+                        help="JSON of canned transcripts, plans and grounding answers")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiplier of the fake server's default latencies")
+    parser.add_argument("--action-latency", type=float, default=0.0,
+                        help="Simulated seconds per input action")
+    parser.add_argument("--pipelined", action="store_true")
+    parser.add_argument("--streaming", action="store_true")
+    parser.add_argument("--batch-grounding", action="store_true")
+    parser.add_argument("--compact-images", action="store_true")
+    parser.add_argument("--grounding-mode", default="annotated",
+                        choices=("annotated", "montage"))
+    parser.add_argument("--artifacts", default="none",
+                        choices=("all", "on-failure", "none"),
+                        help="Grounding screenshots written to the run folder")
+    parser.add_argument("--warm", action="store_true",
+                        help="Keep transcription and plan caches across repeats "
+                             "(default: every repeat starts cold)")
+    parser.add_argument("--label", default="", help="Free-form label stored with the results")
+    parser.add_argument("--compare", help="Earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    frames = load_frames(args.screenshots)
+    if not frames:
+        raise SystemExit(f"No cassette frames found under {args.screenshots} "
+                         f"(record a run with CASSETTE_MODE=record)")
+    commands = [os.path.abspath(path) for path in get_sorted_audio_files(args.commands)]
+    latency = {kind: value * args.latency_scale
+               for kind, value in DEFAULT_LATENCY_SEC.items()}
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+    resolve_model_paths()
+
+    with FakeOpenAIServer(Scenario(args.scenario), latency_sec=latency) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        runs = []
+        for repeat in range(args.repeats):
+            # Caches (.cache/) and run folders live in a scratch directory,
+            # a fresh one per repeat unless --warm
+            if repeat == 0 or not args.warm:
+                os.chdir(tempfile.mkdtemp(prefix="voice-bench-"))
+            runs.append(run_once(args, frames, commands))
+
+    result = {
+        "label": args.label,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "platform": {"python": platform.python_version(), "system": platform.platform(),
+                     "processor": platform.processor()},
+        "config": {key: value for key, value in vars(args).items() if key != "compare"},
+        "commands": len(commands),
+        "server_requests": server.requests,
+        "summary": summarize(runs, len(commands)),
+    }
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    name = f"{datetime.now():%Y-%m-%d_%H-%M-%S}-{(result['revision']['commit'] or 'nogit')[:8]}.json"
+    with open(os.path.join(RESULTS_DIR, name), "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    baseline = None
+    if compare_path:
+        with open(compare_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+    print(f"Results written to {os.path.join(RESULTS_DIR, name)}")
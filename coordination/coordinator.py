@@ -1,12 +1,22 @@
 from openai_integration.whisper_client import WhisperService
+from openai_integration.api_session import ApiSession, ApiSessionConfig
+from openai_integration.image_encoding import ImageEncodingConfig
+from openai_integration.openai_client import OpenAIClient
 from agents.decision_maker_agent import DecisionMaker
 from agents.executor_agent import ExecutorAgent
+from models.widget_detector import WidgetDetector
 import json
 from selenium_web_interaction.selenium_executor_driver import SeleniumExecutorDriver
+from selenium_web_interaction.replay_driver import ReplayExecutorDriver
 import time
 import logging
 from utils.AudioPlayer import play_audio
+from utils.artifact_writer import ArtifactWriter
+from utils.cassette import Cassette
+from utils.session_journal import SessionJournal, iter_records
+from utils.tracing import span, tracer
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import os
 
 logging.basicConfig(level=logging.INFO)
@@ -16,30 +26,174 @@ class Coordinator:
     Whisper -> DecisionMaker -> ChromeController -> ExecutorAgent
     """
 
-    def __init__(self, start_url: str):
+    def __init__(self, start_url: str, pipelined: bool = False,
+                 transcription_workers: int = 4, input_mode: str = "human",
+                 capture_mode: str = "desktop",
+                 image_config: ImageEncodingConfig = None,
+                 grounding_mode: str = "annotated",
+                 full_page_detection: bool = False,
+                 batch_grounding: bool = False,
+                 api_config: ApiSessionConfig = None,
+                 streaming: bool = False,
+                 execution_driver: SeleniumExecutorDriver = None,
+                 playback: bool = True,
+                 dom_grounding: bool = True,
+                 cassette_mode: str = None,
+                 cassette_path: str = None,
+                 artifact_policy: str = None,
+                 artifact_format: str = "PNG"):
         """
-        Initialize browser session and AI agents.
+        Initialize browser session and AI agents. The browser, the YOLO
+        model (with its warm-up inference) and the API clients start
+        concurrently; nothing is sent to the API before the first command.
+
+        Args:
+            start_url: URL opened in the controlled browser
+            pipelined: Transcribe all audio commands concurrently up front so
+                command N+1's transcript is ready while command N executes
+            transcription_workers: Size of the transcription worker pool used
+                in pipelined mode
+            input_mode: "human" (PyAutoGUI) or "fast" (CDP) input injection
+            capture_mode: "desktop" or "viewport" (CDP, page content only)
+                screenshots
+            image_config: Image encoding (downscale, format, byte budget,
+                detail) of model requests; defaults to lossless PNG
+            grounding_mode: "annotated" (full screenshot with numbered boxes)
+                or "montage" (overview + labeled crops) grounding images
+            full_page_detection: When the target is not on screen, detect over
+                the whole scrollable page once and scroll to it, instead of
+                pressing End and retrying
+            batch_grounding: Ground all detect targets of a plan with one YOLO
+                pass and one LLM call, reusing the boxes until the screen changes
+            api_config: Timeouts, retries, concurrency, rate limit and hedging
+                of the OpenAI session shared by Whisper and both agents
+            streaming: Stream the plan from the model and start executing
+                each action as soon as it is generated
+            execution_driver: Driver to use instead of launching Chrome (e.g.
+                the benchmark's fake driver); start_url is then not loaded
+            playback: Play each voice command aloud before executing it
+            dom_grounding: Ground targets on the DOM before falling back to
+                YOLO + LLM
+            cassette_mode: "record" saves every transcript, model answer,
+                detection and screenshot of the run to <run folder>/cassette;
+                "replay" reruns a recorded session from `cassette_path` with
+                no browser, network, model weights, playback or waits. The
+                plan cache is off in both modes so the cassette alone decides
+                what the model is asked.
+            cassette_path: Cassette folder (or the run folder holding it) to
+                replay
+            artifact_policy: Which grounding screenshots are written to the
+                run folder, in the background: "all", "on-failure" or "none"
+                (default: "all", "none" when replaying)
+            artifact_format: Image format of the artifacts ("PNG", "JPEG",
+                "WEBP")
         """
+        init_start = time.perf_counter()
+        if cassette_mode not in (None, "record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {cassette_mode}")
+        replay = cassette_mode == "replay"
         self.start_url = start_url
+        self.streaming = streaming
+        self.playback = playback and not replay
+        self.pipelined = pipelined
+        self.transcription_workers = max(1, transcription_workers)
         current_dir = os.getcwd()
         now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         self.test_run_folder = os.path.join(current_dir, f'runs/{now}')
         os.makedirs(self.test_run_folder, exist_ok=True)
-        self.execution_driver = SeleniumExecutorDriver(
-            chromedriver_path="./chromedriver-win32/chromedriver.exe",
-            chrome_binary_path="./chrome-win32/chrome.exe",
-            start_url=self.start_url,
-            test_run_folder=self.test_run_folder,
-        )
-        print("⏳ Waiting 5 seconds for browser to load...")
-        time.sleep(5)
-        # Initialize agents
-        self.whisper_agent = WhisperService()
-        self.decision_maker = DecisionMaker(selenium_driver=self.execution_driver)
-        self.executor_agent = ExecutorAgent(self.execution_driver)
-        # Keep a full flow log for session summary
-        self.session_actions = []
+        # Spans of this run (and stage profiles) go to the run folder
+        tracer.start_run(self.test_run_folder)
+        self.cassette = None
+        if cassette_mode == "record":
+            self.cassette = Cassette(os.path.join(self.test_run_folder, "cassette"), "record")
+        elif replay:
+            if cassette_path is None:
+                raise ValueError("Replay needs the cassette_path of a recorded run")
+            if os.path.isdir(os.path.join(cassette_path, "cassette")):
+                cassette_path = os.path.join(cassette_path, "cassette")
+            self.cassette = Cassette(cassette_path, "replay")
+            execution_driver = execution_driver or ReplayExecutorDriver(
+                self.cassette, self.test_run_folder)
+        self.artifact_writer = ArtifactWriter(
+            self.test_run_folder,
+            policy=artifact_policy or ("none" if replay else "all"),
+            image_format=artifact_format)
+
+        # Chrome, the YOLO model and the API clients do not depend on each
+        # other, so each starts on its own thread
+        self.startup_timings = {}
+        with ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup") as startup:
+            browser = startup.submit(self._start_browser, execution_driver,
+                                     input_mode, capture_mode)
+            detector = startup.submit(self._start_detector)
+            clients = startup.submit(self._start_clients, api_config, image_config,
+                                     replay)
+            self.execution_driver = browser.result()
+            yolo_detector = detector.result()
+            clients.result()
+
+        self.decision_maker = DecisionMaker(selenium_driver=self.execution_driver,
+                                            client=self.llm_client,
+                                            use_plan_cache=self.cassette is None)
+        self.executor_agent = ExecutorAgent(self.execution_driver,
+                                            client=self.llm_client,
+                                            grounding_mode=grounding_mode,
+                                            full_page_detection=full_page_detection,
+                                            batch_grounding=batch_grounding,
+                                            use_dom_grounding=dom_grounding,
+                                            cassette=self.cassette,
+                                            artifact_writer=self.artifact_writer,
+                                            detector=yolo_detector)
+        # Crash-safe per-command log of the session, also the source of
+        # final_results.json
+        self.journal = SessionJournal(self.test_run_folder)
         self.session_start_time = None
+        self.init_start = init_start
+        self.time_to_first_command_sec = None
+        self.startup_timings["total"] = time.perf_counter() - init_start
+        logger.info(f"🚀 Startup: {self.startup_timings}")
+
+    # --------------------------------------------------------
+    # 🚀 Startup tasks (run concurrently)
+    # --------------------------------------------------------
+    def _start_browser(self, execution_driver, input_mode: str, capture_mode: str):
+        """Launch Chrome (unless a driver is injected) and wait for the start page."""
+        with span("startup.browser", "startup") as stage:
+            driver = execution_driver or SeleniumExecutorDriver(
+                chromedriver_path="./chromedriver-win32/chromedriver.exe",
+                chrome_binary_path="./chrome-win32/chrome.exe",
+                start_url=self.start_url,
+                test_run_folder=self.test_run_folder,
+                input_mode=input_mode,
+                capture_mode=capture_mode,
+                cassette=self.cassette,
+            )
+            print("⏳ Waiting up to 5 seconds for browser to load...")
+            driver.wait_until_ready(5.0, reason="startup")
+        self.startup_timings["browser"] = stage.wall_sec
+        return driver
+
+    def _start_detector(self) -> WidgetDetector:
+        """Load the YOLO weights and run the warm-up inference."""
+        with span("startup.detector", "startup") as stage:
+            detector = WidgetDetector(cassette=self.cassette)
+        self.startup_timings["detector"] = stage.wall_sec
+        return detector
+
+    def _start_clients(self, api_config: ApiSessionConfig,
+                       image_config: ImageEncodingConfig, replay: bool):
+        """
+        Build Whisper and the LLM client over one pooled API session (no
+        session at all when answers come from a cassette).
+        """
+        with span("startup.clients", "startup") as stage:
+            self.api_session = None if replay else ApiSession(config=api_config)
+            self.whisper_agent = WhisperService(session=self.api_session,
+                                                cassette=self.cassette)
+            self.llm_client = OpenAIClient(image_config=image_config,
+                                           session=self.api_session,
+                                           cassette=self.cassette)
+        self.startup_timings["clients"] = stage.wall_sec
 
     # --------------------------------------------------------
     # 🔁 Multi-command voice flow
@@ -48,56 +202,184 @@ class Coordinator:
         """
         Run a sequence of voice commands (audio files) within the same browser session.
         Each audio file is transcribed, parsed, and executed sequentially.
+        In pipelined mode all transcriptions are started at once on a bounded
+        worker pool and consumed in order as the commands are executed.
         """
 
         self.session_start_time = time.time()
         logger.info("🎬 Starting multi-command voice flow...")
+        self.journal.write("session_start", session=self.session_start_time,
+                           commands=len(audio_commands), pipelined=self.pipelined,
+                           streaming=self.streaming,
+                           cassette=self.cassette.mode if self.cassette else None,
+                           startup=self.startup_timings)
 
-        for i, audio_path in enumerate(audio_commands, start=1):
-            logger.info(f"\n=== Executing voice command {i}/{len(audio_commands)} ===")
-
-            # Step 1: Transcribe voice
-            text = self.whisper_agent.transcribe_audio(audio_path)
-            logger.info(f"Command text: {text}")
-
-            # Step 2: Playing audio file
-            play_audio(audio_path)
-
-            # Step 3: Parse command into actions
-            actions = self.decision_maker.decide(text)
-            logger.info(f"Parsed actions:\n{json.dumps(actions, indent=2)}")
-
-            # Step 4: Execute actions
-            results = self.executor_agent.execute(actions)
+        transcription_pool = None
+        pending_transcripts = []
+        if self.pipelined and audio_commands:
+            transcription_pool = ThreadPoolExecutor(
+                max_workers=min(self.transcription_workers, len(audio_commands)),
+                thread_name_prefix="whisper")
+            pending_transcripts = [
+                transcription_pool.submit(self.whisper_agent.transcribe_audio, audio_path)
+                for audio_path in audio_commands
+            ]
+            logger.info(f"Prefetching {len(pending_transcripts)} transcriptions...")
 
-            # Log result
-            self.session_actions.append({
-                "audio_file": audio_path,
-                "command_text": text,
-                "actions": actions,
-                "results": results
-            })
+        try:
+            for i, audio_path in enumerate(audio_commands, start=1):
+                start = time.perf_counter()
+                try:
+                    with span("voice_command", "coordinator", index=i, audio=audio_path):
+                        record = self._run_voice_command(i, audio_path, len(audio_commands),
+                                                         pending_transcripts)
+                except Exception as e:
+                    self.journal.write("command", session=self.session_start_time,
+                                       index=i, audio_file=audio_path,
+                                       error=f"{type(e).__name__}: {e}",
+                                       timings={"total": time.perf_counter() - start})
+                    raise
+                record["timings"]["total"] = time.perf_counter() - start
+                if self.time_to_first_command_sec is None:
+                    self.time_to_first_command_sec = time.perf_counter() - self.init_start
+                    logger.info(f"⏱️ Time to first command: "
+                                f"{self.time_to_first_command_sec:.2f}s "
+                                f"(startup {self.startup_timings['total']:.2f}s)")
+                self.journal.write("command", session=self.session_start_time,
+                                   index=i, **record)
+        finally:
+            if transcription_pool is not None:
+                transcription_pool.shutdown(wait=False, cancel_futures=True)
 
         total_time = time.time() - self.session_start_time
         logger.info(f"Completed {len(audio_commands)} voice commands in {total_time:.2f}s.")
+        logger.info(f"Decision stats: {self.decision_maker.stats} "
+                    f"(LLM calls avoided: {self.decision_maker.llm_calls_avoided()})")
+        logger.info(f"Wait stats: {self.execution_driver.waiter.summary()}")
+        input_time = sum(t["duration_sec"] for t in self.execution_driver.action_timings)
+        logger.info(f"Input actions: {len(self.execution_driver.action_timings)} "
+                    f"in {input_time:.2f}s ({self.execution_driver.input_backend.name} mode)")
+        logger.info(f"Capture stats: {self.execution_driver.capture_metrics.summary()}")
+        logger.info(f"Grounding stats: {self.executor_agent.grounding_stats}")
+        if self.api_session is not None:
+            logger.info(f"API session stats: {self.api_session.stats()}")
+        logger.info(f"Artifact stats: {self.artifact_writer.stats()}")
+        if self.cassette is not None:
+            logger.info(f"📼 Cassette ({self.cassette.mode}): {dict(self.cassette.counts)}"
+                        + (f", unused: {self.cassette.remaining()}"
+                           if self.cassette.replaying and self.cassette.remaining() else ""))
+        if self.executor_agent.batch_grounding:
+            logger.info(f"Grounding map stats: {self.executor_agent.grounding_map.stats()}")
+        detection_cache = self.executor_agent.YOLO_detector.detection_cache
+        if detection_cache is not None:
+            logger.info(f"Detection cache stats: {detection_cache.stats()}")
+        transcription_cache = self.whisper_agent.cache
+        transcription_cache_stats = transcription_cache.stats() \
+            if transcription_cache is not None else None
+        if transcription_cache_stats is not None:
+            logger.info(f"Transcription cache stats: {transcription_cache_stats}")
+        self.journal.write("session_end", session=self.session_start_time,
+                           duration_sec=total_time,
+                           time_to_first_command_sec=self.time_to_first_command_sec,
+                           decision_stats=self.decision_maker.stats,
+                           grounding_stats=self.executor_agent.grounding_stats,
+                           transcription_cache_stats=transcription_cache_stats,
+                           token_usage=self.llm_client.token_usage)
+        executed = [{key: record[key] for key in
+                     ("audio_file", "command_text", "actions", "results")}
+                    for record in iter_records([self.test_run_folder], "command")
+                    if record.get("session") == self.session_start_time]
         log_actions = {
             "total_commands": len(audio_commands),
             "session_duration_sec": total_time,
-            "executed": self.session_actions
+            "transcription_cache": transcription_cache_stats,
+            "executed": executed
         }
-        log_actions.copy()
 
         log_file = os.path.join(self.test_run_folder, f"final_results.json")
         with open(log_file, "w") as f:
             json.dump(log_actions, f, indent=2)
+        logger.info(f"Stage timings: {json.dumps(tracer.summary(), indent=2)}")
+        logger.info(f"Token usage: {self.llm_client.token_usage}")
+        tracer.export(self.test_run_folder)
         return log_actions
 
-        # --------------------------------------------------------
-        # Shutdown
-        # --------------------------------------------------------
+    def _run_voice_command(self, index: int, audio_path: str, total: int,
+                           pending_transcripts: list):
+        """
+        Transcribe (or collect the prefetched transcript of), play, plan and
+        execute a single voice command.
+
+        Returns:
+            The journal record of the command, with per-stage timings
+        """
+        logger.info(f"\n=== Executing voice command {index}/{total} ===")
+
+        timings = {}
+
+        # Step 1: Transcribe voice
+        with span("transcription", "coordinator",
+                  prefetched=bool(pending_transcripts)) as stage:
+            if pending_transcripts:
+                text = pending_transcripts[index - 1].result()
+            else:
+                text = self.whisper_agent.transcribe_audio(audio_path)
+        timings["transcription"] = stage.wall_sec
+        logger.info(f"Command text: {text}")
+
+        # Step 2: Playing audio file
+        if self.playback:
+            with span("audio_playback", "coordinator") as stage:
+                play_audio(audio_path)
+            timings["audio_playback"] = stage.wall_sec
+
+        if self.streaming:
+            # Steps 3 + 4: Execute each action while the plan is streamed
+            with span("execute", "coordinator", streaming=True) as stage:
+                results = self.executor_agent.execute(self.decision_maker.decide_stream(text))
+            timings["execute"] = stage.wall_sec
+            actions = self.executor_agent.executed_actions
+            logger.info(f"Streamed actions:\n{json.dumps(actions, indent=2)}")
+            timing = self.decision_maker.last_stream_timing
+            if timing is not None and timing["first_action_sec"] is not None:
+                timings["first_action"] = timing["first_action_sec"]
+                logger.info(f"Time to first action: {timing['first_action_sec']:.2f}s "
+                            f"(decision total {timing['total_sec']:.2f}s)")
+        else:
+            # Step 3: Parse command into actions
+            with span("decide", "coordinator") as stage:
+                actions = self.decision_maker.decide(text)
+            timings["decide"] = stage.wall_sec
+            logger.info(f"Parsed actions:\n{json.dumps(actions, indent=2)}")
+
+            # Step 4: Execute actions
+            with span("execute", "coordinator") as stage:
+                results = self.executor_agent.execute(actions)
+            timings["execute"] = stage.wall_sec
+
+        # Journal entry of the command
+        return {
+            "audio_file": audio_path,
+            "command_text": text,
+            "actions": actions,
+            "results": results,
+            "timings": timings
+        }
+
+    # --------------------------------------------------------
+    # Shutdown
+    # --------------------------------------------------------
 
     def shutdown(self):
         """Close the browser session and clean up resources."""
         logger.info("Shutting down browser session...")
+        # Write out the artifacts still queued before anything is torn down
+        self.executor_agent.shutdown()
+        self.artifact_writer.close()
         self.execution_driver.quit()
+        if self.api_session is not None:
+            self.api_session.close()
+        if self.cassette is not None:
+            self.cassette.close()
+        self.journal.close()
         logger.info("Coordinator shutdown complete.")
\ No newline at end of file
@@ -1,10 +1,16 @@
 from coordination.coordinator import Coordinator
 import json
+import os
 from utils.file_utils import get_sorted_audio_files
 
 if __name__ == "__main__":
     coordinator = Coordinator(
-        start_url="https://www.saucedemo.com/v1/index.html")
+        start_url="https://www.saucedemo.com/v1/index.html",
+        pipelined=True,
+        # CASSETTE_MODE=record saves the run for replay;
+        # CASSETTE_MODE=replay CASSETTE_PATH=runs/<timestamp> reruns it offline
+        cassette_mode=os.getenv("CASSETTE_MODE") or None,
+        cassette_path=os.getenv("CASSETTE_PATH"))
 
     commands = get_sorted_audio_files()
 
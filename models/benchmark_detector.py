@@ -0,0 +1,92 @@
+"""
+Micro-benchmark of WidgetDetector inference latency per backend.
+
+Runs on the raw screen frames recorded by cassettes (Coordinator with
+cassette_mode="record"), not on the annotated grounding artifacts that share
+the run folders.
+
+Usage:
+    python -m models.benchmark_detector --images runs --backends torch onnx openvino
+"""
+import argparse
+import time
+
+import numpy as np
+from PIL import Image
+
+from models.widget_detector import WidgetDetector, BACKENDS
+from utils.cassette import recorded_frame_paths
+
+
+def load_screenshots(folder: str, limit: int) -> list:
+    """Raw frames of the cassettes under `folder`, at most `limit`."""
+    paths = recorded_frame_paths(folder)[:limit]
+    images = []
+    for path in paths:
+        with Image.open(path) as image:
+            images.append(image.convert("RGB"))
+    return images
+
+
+def benchmark(backend: str, images: list, repeats: int, **detector_kwargs) -> dict:
+    # Repeats of the same screenshot would otherwise be served by the
+    # detection cache and measure the cache, not the backend
+    detector_kwargs.setdefault("use_detection_cache", False)
+    start = time.perf_counter()
+    detector = WidgetDetector(backend=backend, **detector_kwargs)
+    init_sec = time.perf_counter() - start
+
+    latencies = []
+    for _ in range(repeats):
+        for image in images:
+            start = time.perf_counter()
+            detector.predict(image)
+            latencies.append(time.perf_counter() - start)
+    latencies_ms = 1000 * np.asarray(latencies)
+    return {
+        "backend": detector.backend,
+        "requested_backend": backend,
+        "imgsz": detector.imgsz,
+        "init_sec": init_sec,
+        "runs": len(latencies),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "mean_ms": float(latencies_ms.mean()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark YOLO backends.")
+    parser.add_argument("--images", default="runs",
+                        help="Folder searched recursively for cassettes; their "
+                             "recorded frames are the benchmark images")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS),
+                        choices=BACKENDS)
+    parser.add_argument("--limit", type=int, default=20,
+                        help="Maximum number of screenshots used")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--imgsz", type=int, default=None)
+    parser.add_argument("--half-resolution", action="store_true")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    screenshots = load_screenshots(args.images, args.limit)
+    if not screenshots:
+        raise SystemExit(f"No cassette frames found under {args.images} "
+                         f"(record a run with CASSETTE_MODE=record)")
+
+    print(f"{len(screenshots)} screenshots x {args.repeats} repeats")
+    print(f"{'backend':<10} {'imgsz':>6} {'init s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for name in args.backends:
+        try:
+            result = benchmark(name, screenshots, args.repeats, imgsz=args.imgsz,
+                               half_resolution=args.half_resolution,
+                               threads=args.threads)
+        except Exception as e:
+            print(f"{name:<10} failed: {e}")
+            continue
+        label = result['backend'] if result['backend'] == name \
+            else f"{name}->{result['backend']}"
+        print(f"{label:<10} {result['imgsz']:>6} "
+              f"{result['init_sec']:>8.2f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f}")
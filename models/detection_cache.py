@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from models.detection_set import DetectionSet
+
+
+def tile_fingerprint(frame: np.ndarray, grid: Tuple[int, int] = (16, 12),
+                     block: int = 8) -> np.ndarray:
+    """
+    Fast frame fingerprint: a grayscale thumbnail of `grid` tiles, each
+    downsampled to block x block pixels.
+
+    Returns:
+        int16 array of shape (rows, cols, block, block)
+    """
+    cols, rows = grid
+    small = Image.fromarray(frame).convert("L").resize((cols * block, rows * block),
+                                                       Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    return pixels.reshape(rows, block, cols, block).transpose(0, 2, 1, 3)
+
+
+@dataclass
+class CacheDecision:
+    """What the detector should do with a new frame."""
+    kind: str  # "hit", "partial" or "miss"
+    detections: Optional[DetectionSet] = None
+    # (x1, y1, x2, y2) in frame pixels that must be re-detected on "partial"
+    region: Optional[Tuple[int, int, int, int]] = None
+
+
+class DetectionCache:
+    """
+    Reuses the previous YOLO detections when the screen did not change.
+
+    The frame is fingerprinted tile by tile. When no tile changed the cached
+    detections are returned as-is; when only some tiles changed, only their
+    bounding region needs to be re-detected and merged with the cached boxes
+    outside of it.
+    """
+
+    def __init__(self, grid: Tuple[int, int] = (16, 12),
+                 tile_threshold: float = 2.0, max_changed_fraction: float = 0.4):
+        """
+        Args:
+            grid: Number of (columns, rows) tiles of the fingerprint
+            tile_threshold: Mean absolute grayscale difference above which a
+                tile counts as changed
+            max_changed_fraction: Above this fraction of the frame area, the
+                partial region is not worth it and the whole frame is detected
+        """
+        self.grid = grid
+        self.tile_threshold = tile_threshold
+        self.max_changed_fraction = max_changed_fraction
+        self.hits = 0
+        self.partial_hits = 0
+        self.misses = 0
+        self.yolo_time_saved_sec = 0.0
+        self._fingerprint = None
+        self._pending = None
+        self._shape = None
+        self._params = None
+        self._detections = None
+        self._full_pass_sec = None
+
+    def lookup(self, frame: np.ndarray, params: tuple) -> CacheDecision:
+        """
+        Compare a frame (RGB array) against the cached one.
+
+        Args:
+            params: Detection parameters; the cache only applies when equal
+        """
+        fingerprint = tile_fingerprint(frame, self.grid)
+        self._pending = fingerprint
+        if self._fingerprint is None or frame.shape != self._shape \
+                or params != self._params:
+            return CacheDecision("miss")
+
+        diff = np.abs(fingerprint - self._fingerprint).mean(axis=(2, 3))
+        changed = diff > self.tile_threshold
+        if not changed.any():
+            return CacheDecision("hit", detections=self._detections)
+
+        rows, cols = np.nonzero(changed)
+        height, width = frame.shape[:2]
+        tile_w, tile_h = width / self.grid[0], height / self.grid[1]
+        # One tile of margin so boxes at the border are detected whole
+        x1 = int(max(0, (cols.min() - 1) * tile_w))
+        y1 = int(max(0, (rows.min() - 1) * tile_h))
+        x2 = int(min(width, (cols.max() + 2) * tile_w))
+        y2 = int(min(height, (rows.max() + 2) * tile_h))
+        # Grow the region to fully include cached boxes it cuts through
+        cut = self._detections.intersects_region(x1, y1, x2, y2)
+        if cut.any():
+            cut_xyxy = self._detections.xyxy[cut]
+            x1 = int(max(0, min(x1, cut_xyxy[:, 0].min())))
+            y1 = int(max(0, min(y1, cut_xyxy[:, 1].min())))
+            x2 = int(min(width, max(x2, np.ceil(cut_xyxy[:, 2].max()))))
+            y2 = int(min(height, max(y2, np.ceil(cut_xyxy[:, 3].max()))))
+
+        if (x2 - x1) * (y2 - y1) > self.max_changed_fraction * width * height:
+            return CacheDecision("miss")
+        kept = self._detections[~self._detections.intersects_region(x1, y1, x2, y2)]
+        return CacheDecision("partial", detections=kept, region=(x1, y1, x2, y2))
+
+    def store(self, frame: np.ndarray, params: tuple, detections: DetectionSet,
+              decision: CacheDecision, elapsed_sec: float):
+        """Remember the detections of a frame and account for the time saved."""
+        if decision.kind == "hit":
+            self.hits += 1
+            self.yolo_time_saved_sec += self._full_pass_sec or 0.0
+        elif decision.kind == "partial":
+            self.partial_hits += 1
+            if self._full_pass_sec is not None:
+                self.yolo_time_saved_sec += max(0.0, self._full_pass_sec - elapsed_sec)
+        else:
+            self.misses += 1
+            # Running average of a full YOLO pass, to estimate savings
+            self._full_pass_sec = elapsed_sec if self._full_pass_sec is None \
+                else 0.8 * self._full_pass_sec + 0.2 * elapsed_sec
+        self._fingerprint = self._pending
+        self._shape = frame.shape
+        self._params = params
+        self._detections = detections
+
+    def invalidate(self):
+        self._fingerprint = None
+        self._detections = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.partial_hits + self.misses
+        return {
+            "lookups": lookups,
+            "hits": self.hits,
+            "partial_hits": self.partial_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "yolo_time_saved_sec": self.yolo_time_saved_sec,
+        }
@@ -0,0 +1,218 @@
+from typing import Iterable, Optional
+
+import numpy as np
+
+from utils.BoundingBox import BoundingBox
+
+
+class DetectionSet:
+    """
+    Compact set of detections stored as contiguous NumPy arrays:
+    `xyxy` (N, 4) float32 corners, `conf` (N,) float32 confidences and
+    `cls` (N,) int32 class ids. Detection IDs are the row indices.
+
+    Geometry (IoU, NMS, containment, nearest box, region tests) is
+    vectorized so large pages cost no per-box Python overhead.
+    """
+    __slots__ = ("xyxy", "conf", "cls")
+
+    def __init__(self, xyxy, conf, cls=None):
+        self.xyxy = np.ascontiguousarray(xyxy, dtype=np.float32).reshape(-1, 4)
+        self.conf = np.ascontiguousarray(conf, dtype=np.float32).reshape(-1)
+        self.cls = np.zeros(len(self.conf), dtype=np.int32) if cls is None \
+            else np.ascontiguousarray(cls, dtype=np.int32).reshape(-1)
+
+    @classmethod
+    def empty(cls) -> "DetectionSet":
+        return cls(np.zeros((0, 4)), np.zeros(0))
+
+    @classmethod
+    def from_results(cls, results, offset=(0, 0)) -> "DetectionSet":
+        """Build from ultralytics results, shifting boxes by `offset`."""
+        parts = []
+        for r in results:
+            boxes = r.boxes
+            if boxes is None or len(boxes) == 0:
+                continue
+            xyxy = boxes.xyxy.cpu().numpy()
+            xyxy[:, [0, 2]] += offset[0]
+            xyxy[:, [1, 3]] += offset[1]
+            parts.append(cls(xyxy, boxes.conf.cpu().numpy(),
+                             boxes.cls.cpu().numpy()))
+        return cls.concatenate(parts)
+
+    @classmethod
+    def concatenate(cls, sets: Iterable["DetectionSet"]) -> "DetectionSet":
+        sets = list(sets)
+        if not sets:
+            return cls.empty()
+        return cls(np.concatenate([s.xyxy for s in sets]),
+                   np.concatenate([s.conf for s in sets]),
+                   np.concatenate([s.cls for s in sets]))
+
+    # ----------------------------------------------------------
+    # Container protocol
+    # ----------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.conf)
+
+    def __getitem__(self, index) -> "DetectionSet":
+        """Subset by boolean mask, index array or slice."""
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return DetectionSet(self.xyxy[index], self.conf[index], self.cls[index])
+
+    def __repr__(self):
+        return f"DetectionSet(n={len(self)})"
+
+    def box(self, index: int) -> BoundingBox:
+        """BoundingBox view (x_min, y_min, width, height) of one detection."""
+        x1, y1, x2, y2 = self.xyxy[index].tolist()
+        return BoundingBox(x1, y1, int(x2 - x1), int(y2 - y1))
+
+    def boxes(self) -> list:
+        return [self.box(i) for i in range(len(self))]
+
+    @property
+    def xywh(self) -> np.ndarray:
+        """(N, 4) array of x_min, y_min, width, height."""
+        out = self.xyxy.copy()
+        out[:, 2:] -= out[:, :2]
+        return out
+
+    @property
+    def centers(self) -> np.ndarray:
+        return (self.xyxy[:, :2] + self.xyxy[:, 2:]) / 2
+
+    @property
+    def areas(self) -> np.ndarray:
+        return _areas(self.xyxy)
+
+    # ----------------------------------------------------------
+    # Geometry
+    # ----------------------------------------------------------
+
+    def shift(self, dx: float, dy: float) -> "DetectionSet":
+        xyxy = self.xyxy + np.array([dx, dy, dx, dy], dtype=np.float32)
+        return DetectionSet(xyxy, self.conf, self.cls)
+
+    def iou(self, other_xyxy: Optional[np.ndarray] = None) -> np.ndarray:
+        """(N, M) IoU matrix against other boxes (default: against itself)."""
+        other = self.xyxy if other_xyxy is None else \
+            np.asarray(other_xyxy, dtype=np.float32).reshape(-1, 4)
+        inter = _intersection(self.xyxy, other)
+        union = self.areas[:, None] + _areas(other)[None, :] - inter
+        return inter / np.maximum(union, 1e-9)
+
+    def overlap_fraction(self, other_xyxy) -> np.ndarray:
+        """(N, M) intersection area divided by the smaller of the two areas."""
+        other = np.asarray(other_xyxy, dtype=np.float32).reshape(-1, 4)
+        inter = _intersection(self.xyxy, other)
+        smaller = np.minimum(self.areas[:, None], _areas(other)[None, :])
+        return inter / np.maximum(smaller, 1e-9)
+
+    def nms(self, iou_threshold: float = 0.5,
+            overlap_threshold: Optional[float] = None) -> "DetectionSet":
+        """
+        Greedy non-maximum suppression, keeping the most confident boxes.
+        With `overlap_threshold`, a box mostly covered by (or covering) a kept
+        box is suppressed too, which removes fragments cut at tile borders.
+        """
+        if len(self) == 0:
+            return self
+        order = np.argsort(-self.conf)
+        ious = self.iou()
+        overlaps = self.overlap_fraction(self.xyxy) if overlap_threshold else None
+        suppressed = np.zeros(len(self), dtype=bool)
+        keep = []
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            duplicate = ious[i] > iou_threshold
+            if overlaps is not None:
+                duplicate |= overlaps[i] > overlap_threshold
+            suppressed |= duplicate & (self.cls == self.cls[i])
+        return self[np.asarray(keep)]
+
+    def contains_point(self, x: float, y: float) -> np.ndarray:
+        """Indices of the boxes containing the point."""
+        mask = (self.xyxy[:, 0] <= x) & (x <= self.xyxy[:, 2]) & \
+               (self.xyxy[:, 1] <= y) & (y <= self.xyxy[:, 3])
+        return np.flatnonzero(mask)
+
+    def contains(self, other_xyxy) -> np.ndarray:
+        """(N, M) boolean matrix: box i fully contains other box j."""
+        other = np.asarray(other_xyxy, dtype=np.float32).reshape(-1, 4)
+        a = self.xyxy[:, None, :]
+        b = other[None, :, :]
+        return (a[..., 0] <= b[..., 0]) & (a[..., 1] <= b[..., 1]) & \
+               (a[..., 2] >= b[..., 2]) & (a[..., 3] >= b[..., 3])
+
+    def intersects_region(self, x1: float, y1: float, x2: float, y2: float) -> np.ndarray:
+        """Boolean mask of the boxes overlapping the region."""
+        return (self.xyxy[:, 0] < x2) & (self.xyxy[:, 2] > x1) & \
+               (self.xyxy[:, 1] < y2) & (self.xyxy[:, 3] > y1)
+
+    def nearest_to_point(self, x: float, y: float) -> Optional[int]:
+        """Index of the box closest to the point (0 distance if inside)."""
+        if len(self) == 0:
+            return None
+        dx = np.maximum(np.maximum(self.xyxy[:, 0] - x, 0), x - self.xyxy[:, 2])
+        dy = np.maximum(np.maximum(self.xyxy[:, 1] - y, 0), y - self.xyxy[:, 3])
+        return int(np.argmin(dx * dx + dy * dy))
+
+    def ranked(self) -> np.ndarray:
+        """Detection IDs sorted by decreasing confidence."""
+        return np.argsort(-self.conf, kind="stable")
+
+    def to_dict(self) -> dict:
+        """Legacy {id: {'bounding_box': [x, y, w, h], 'conf': c}} format."""
+        return {i: {'bounding_box': list(self.box(i)), 'conf': float(self.conf[i])}
+                for i in range(len(self))}
+
+
+class GridIndex:
+    """
+    Uniform-grid spatial index over a DetectionSet for fast hit tests.
+    Each cell lists the boxes overlapping it, so a point query only checks
+    the few boxes of its cell.
+    """
+
+    def __init__(self, detections: DetectionSet, cell_size: int = 128):
+        self.detections = detections
+        self.cell_size = cell_size
+        self.cells = {}
+        if len(detections) == 0:
+            return
+        cells = np.floor(detections.xyxy / cell_size).astype(np.int64)
+        for index, (cx1, cy1, cx2, cy2) in enumerate(cells.tolist()):
+            for cx in range(cx1, cx2 + 1):
+                for cy in range(cy1, cy2 + 1):
+                    self.cells.setdefault((cx, cy), []).append(index)
+        self.cells = {key: np.asarray(value) for key, value in self.cells.items()}
+
+    def hit_test(self, x: float, y: float) -> np.ndarray:
+        """Indices of the boxes containing the point, smallest box first."""
+        candidates = self.cells.get((int(x // self.cell_size),
+                                     int(y // self.cell_size)))
+        if candidates is None:
+            return np.zeros(0, dtype=np.int64)
+        xyxy = self.detections.xyxy[candidates]
+        mask = (xyxy[:, 0] <= x) & (x <= xyxy[:, 2]) & \
+               (xyxy[:, 1] <= y) & (y <= xyxy[:, 3])
+        hits = candidates[mask]
+        return hits[np.argsort(self.detections.areas[hits], kind="stable")]
+
+
+def _areas(xyxy: np.ndarray) -> np.ndarray:
+    return np.clip(xyxy[:, 2] - xyxy[:, 0], 0, None) * \
+        np.clip(xyxy[:, 3] - xyxy[:, 1], 0, None)
+
+
+def _intersection(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    size = np.clip(bottom_right - top_left, 0, None)
+    return size[..., 0] * size[..., 1]
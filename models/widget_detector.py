@@ -1,49 +1,359 @@
-from ultralytics import YOLO
 from dotenv import load_dotenv
+import logging
 import os
-import cv2
+import shutil
+import time
+import numpy as np
 from PIL import Image
+
+from models.detection_cache import DetectionCache
+from models.detection_set import DetectionSet
+from utils.cassette import Cassette
+from utils.tracing import span, tracer
 load_dotenv()
 weights_path = os.getenv("YOLO_WEIGHTS")
 
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "onnx", "openvino")
+EXPORT_CACHE_DIR = os.path.join(".cache", "yolo")
+
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def _tile_starts(length, tile_size, step):
+    """Tile offsets along one axis; the last tile is aligned to the end."""
+    if length <= tile_size:
+        return [0]
+    starts = list(range(0, length - tile_size, step))
+    starts.append(length - tile_size)
+    return starts
+
+
 class WidgetDetector:
-    def __init__(self, device='cpu'):
+    def __init__(self, device='cpu', backend=None, imgsz=None,
+                 half_resolution=False, threads=None, warmup=True,
+                 use_detection_cache=True, cassette: Cassette = None):
+        """
+        Args:
+            device: Inference device
+            backend: "torch" (default), "onnx" or "openvino". Optimized
+                backends export the weights once and reuse the cached export,
+                and fall back to torch when they cannot be loaded.
+                Defaults to the YOLO_BACKEND environment variable.
+            imgsz: Inference input size (default: YOLO_IMGSZ or 640)
+            half_resolution: Run at half of imgsz for faster, coarser passes
+            threads: CPU threads used for inference (default: YOLO_THREADS or
+                the runtime's default)
+            warmup: Run one dummy inference at construction so the first real
+                call does not pay the lazy initialization
+            use_detection_cache: Reuse detections of unchanged screen regions
+                instead of re-running YOLO on identical frames
+            cassette: Records every prediction, or replays recorded
+                predictions without loading the model
+        """
         self.YOLO_weights = weights_path
         self.device = device
+        self.backend = backend or os.getenv("YOLO_BACKEND", "torch")
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown YOLO backend: {self.backend}")
+        self.imgsz = imgsz or _env_int("YOLO_IMGSZ") or 640
+        if half_resolution:
+            self.imgsz = max(32, (self.imgsz // 2) // 32 * 32)
+        self.threads = threads or _env_int("YOLO_THREADS")
         self.last_detections = None
         self.last_annotations = None
         self.last_orig_img = None
-        self.model = YOLO(self.YOLO_weights)
+        self.detection_cache = DetectionCache() if use_detection_cache else None
+        self.cassette = cassette
+        if cassette is not None and cassette.replaying:
+            self.model = None
+            return
+        if self.threads:
+            import torch
+            torch.set_num_threads(self.threads)
+        try:
+            self.model = self._load_model()
+        except Exception as e:
+            if self.backend == "torch":
+                raise
+            # onnx/openvino export needs optional packages; keep the detector usable
+            logger.warning(f"Could not load the {self.backend} backend ({e}), "
+                           f"falling back to torch")
+            self.backend = "torch"
+            self.model = self._load_model()
+        if warmup:
+            self.warmup()
+
+    def _load_model(self):
+        # Imported on first use: ultralytics pulls in torch and takes seconds
+        from ultralytics import YOLO
+        if self.backend == "torch":
+            return YOLO(self.YOLO_weights)
+        return YOLO(self._exported_weights(), task="detect")
+
+    def _exported_weights(self) -> str:
+        """Export the weights for the selected backend once and cache the result."""
+        from ultralytics import YOLO
+        stem = os.path.splitext(os.path.basename(self.YOLO_weights))[0]
+        version = int(os.path.getmtime(self.YOLO_weights))
+        suffix = ".onnx" if self.backend == "onnx" else "_openvino_model"
+        cached = os.path.join(EXPORT_CACHE_DIR,
+                              f"{stem}-{version}-{self.imgsz}{suffix}")
+        if os.path.exists(cached):
+            return cached
+        logger.info(f"Exporting {self.YOLO_weights} to {self.backend} "
+                    f"(imgsz={self.imgsz})...")
+        exported = YOLO(self.YOLO_weights).export(format=self.backend,
+                                                  imgsz=self.imgsz)
+        os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+        shutil.move(str(exported), cached)
+        return cached
+
+    def warmup(self):
+        """Run one inference on a blank frame to initialize the runtime."""
+        blank = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+        self.model.predict(source=blank, device=self.device, imgsz=self.imgsz,
+                           verbose=False)
+        self._apply_thread_limit()
+
+    def _apply_thread_limit(self):
+        """ONNX Runtime ignores torch's thread setting; rebuild its session."""
+        if not self.threads or self.backend != "onnx":
+            return
+        backend = getattr(getattr(self.model, "predictor", None), "model", None)
+        if backend is None or not hasattr(backend, "session"):
+            return
+        try:
+            import onnxruntime as ort
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            backend.session = ort.InferenceSession(
+                self.model.ckpt_path or self._exported_weights(), options,
+                providers=["CPUExecutionProvider"])
+        except Exception as e:
+            logger.warning(f"Could not limit ONNX Runtime threads: {e}")
 
     def predict(self, image, confidence_threshold=0.5, iou_threshold=0.3):
-        results = self.model.predict(source=image,
-                                     conf=confidence_threshold,
-                                     device=self.device,
-                                     iou=iou_threshold)
-        self.last_orig_img = image
-        self.last_detections = {}
-        self.last_orig_img = results[0].orig_img.copy()
-
-        for r in results:
-            for idx, box in enumerate(r.boxes):
-                x1, y1, x2, y2 = box.xyxy[0].tolist()
-                x_min, y_min = x1, y1
-                width, height = int(x2-x1), int(y2-y1)
-                self.last_detections[idx] = {
-                    'bounding_box': [x_min, y_min, width, height],
-                    'conf': float(box.conf)
-                }
+        """
+        Detect widgets on a PIL image or an RGB NumPy array (such as the
+        frames returned by SeleniumExecutorDriver.capture_frame).
+        With the detection cache, unchanged frames reuse the previous
+        detections and partially changed frames only re-detect the region
+        that changed.
+        """
+        if isinstance(image, Image.Image):
+            image = np.asarray(image.convert("RGB") if image.mode != "RGB" else image)
+        # Ultralytics expects BGR arrays; a reversed channel view avoids a copy
+        bgr = image[..., ::-1]
+        params = (confidence_threshold, iou_threshold, self.imgsz)
+
+        with span("yolo_predict", "detector", backend=self.backend) as predict_span:
+            if self._replaying:
+                detections, cache_result = self._replay(), "replay"
+            else:
+                detections, cache_result = self._predict_cached(image, bgr, params)
+                self._record(detections)
+            predict_span.set(boxes=len(detections), cache=cache_result)
+
+        self.last_orig_img = np.ascontiguousarray(bgr)
+        self.last_detections = detections
         return self.last_detections
 
+    def _predict_cached(self, image, bgr, params):
+        """Return (detections, cache result: "disabled", "hit", "partial" or "miss")."""
+        confidence_threshold, iou_threshold, _ = params
+        start = time.perf_counter()
+        if self.detection_cache is None:
+            return self._run_model(bgr, confidence_threshold, iou_threshold), "disabled"
+        decision = self.detection_cache.lookup(image, params)
+        if decision.kind == "hit":
+            detections = decision.detections
+        elif decision.kind == "partial":
+            x1, y1, x2, y2 = decision.region
+            fresh = self._run_model(bgr[y1:y2, x1:x2], confidence_threshold,
+                                    iou_threshold, offset=(x1, y1))
+            detections = DetectionSet.concatenate([decision.detections, fresh])
+        else:
+            detections = self._run_model(bgr, confidence_threshold, iou_threshold)
+        self.detection_cache.store(image, params, detections, decision,
+                                   time.perf_counter() - start)
+        return detections, decision.kind
+
+    def predict_full_page(self, image, tile_size=None, overlap=0.25, batch_size=8,
+                          confidence_threshold=0.5, iou_threshold=0.3):
+        """
+        Detect widgets on a full-page capture, taller than any viewport.
+
+        The page is cut into overlapping tiles that go through the model in
+        batches of `batch_size` (one predict call per batch). Tile boxes are
+        shifted to page coordinates and merged with NMS, which also drops the
+        fragments of widgets cut by a tile border.
+
+        Args:
+            image: PIL image or RGB NumPy array of the whole page
+            tile_size: Tile side in pixels (default: 2 * imgsz, so text stays
+                legible after YOLO's resize)
+            overlap: Fraction of a tile shared with its neighbours
+            batch_size: Tiles per inference call
+
+        Returns:
+            DetectionSet in page pixel coordinates
+        """
+        if isinstance(image, Image.Image):
+            image = np.asarray(image.convert("RGB") if image.mode != "RGB" else image)
+        bgr = np.ascontiguousarray(image[..., ::-1])
+        if self._replaying:
+            self.last_orig_img = bgr
+            self.last_detections = self._replay()
+            return self.last_detections
+        tile_size = tile_size or 2 * self.imgsz
+        height, width = bgr.shape[:2]
+        step = max(1, int(tile_size * (1 - overlap)))
+        origins = [(x, y)
+                   for y in _tile_starts(height, tile_size, step)
+                   for x in _tile_starts(width, tile_size, step)]
+
+        start = time.perf_counter()
+        parts = []
+        for first in range(0, len(origins), max(1, batch_size)):
+            batch = origins[first:first + max(1, batch_size)]
+            tiles = [bgr[y:y + tile_size, x:x + tile_size] for x, y in batch]
+            with span("yolo_inference", "detector", tiles=len(tiles)):
+                results = self.model.predict(source=tiles,
+                                             conf=confidence_threshold,
+                                             device=self.device,
+                                             iou=iou_threshold,
+                                             imgsz=self.imgsz,
+                                             batch=len(tiles),
+                                             verbose=False)
+            parts.extend(DetectionSet.from_results([result], offset=origin)
+                         for result, origin in zip(results, batch))
+        detections = DetectionSet.concatenate(parts).nms(iou_threshold,
+                                                         overlap_threshold=0.8)
+        elapsed = time.perf_counter() - start
+        logger.info(f"Full-page detection: {len(origins)} tiles, {len(detections)} "
+                    f"boxes in {elapsed:.2f}s")
+        tracer.record("yolo_full_page", "detector", start, elapsed,
+                      tiles=len(origins), boxes=len(detections))
+
+        self._record(detections)
+
+        self.last_orig_img = bgr
+        self.last_detections = detections
+        return detections
+
+    @property
+    def _replaying(self) -> bool:
+        return self.cassette is not None and self.cassette.replaying
+
+    def _replay(self) -> DetectionSet:
+        """Next recorded prediction; predictions are replayed in call order."""
+        record = self.cassette.next("yolo")
+        return DetectionSet(np.asarray(record["xyxy"], dtype=np.float32),
+                            record["conf"], record["cls"])
+
+    def _record(self, detections: DetectionSet):
+        if self.cassette is not None:
+            self.cassette.record("yolo", None, {
+                "xyxy": np.round(detections.xyxy, 2).tolist(),
+                "conf": np.round(detections.conf, 4).tolist(),
+                "cls": detections.cls.tolist()})
+
+    def _run_model(self, bgr, confidence_threshold, iou_threshold, offset=(0, 0)):
+        """Run YOLO on a BGR array and return boxes shifted by `offset`."""
+        with span("yolo_inference", "detector", height=bgr.shape[0], width=bgr.shape[1]):
+            results = self.model.predict(source=bgr,
+                                         conf=confidence_threshold,
+                                         device=self.device,
+                                         iou=iou_threshold,
+                                         imgsz=self.imgsz)
+        return DetectionSet.from_results(results, offset=offset)
+
     def attach_bounding_boxes(self):
+        import cv2
         if self.last_detections is None:
             raise Exception('No prediction has been made or no widgets have been detected')
         img = self.last_orig_img.copy()
-        for det_id, det in self.last_detections.items():
-            x_min, y_min, w, h = det['bounding_box']
-            x1, y1, x2, y2 = int(x_min), int(y_min), int(x_min + w), int(y_min + h)
+        for det_id, (x1, y1, x2, y2) in enumerate(self.last_detections.xyxy.astype(int).tolist()):
             cv2.rectangle(img, (x1, y1), (x2, y2), (255, 0, 0), 2)
             cv2.putText(img, str(det_id), (x1-20, (y1 + y2) // 2), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 0, 0), 2)
         img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
         pil = Image.fromarray(img_rgb)
-        return pil
\ No newline at end of file
+        return pil
+
+    def build_crop_montage(self, ids=None, max_crops=20, cell_size=(200, 90),
+                           padding=6, columns=None, overview_width=480):
+        """
+        Build a compact grounding image from the last prediction: a small
+        downscaled overview of the screen on top, followed by a grid of the
+        detected crops, each labeled with its ID.
+
+        Args:
+            ids: Detection IDs to include, in priority order (default: all,
+                ranked by confidence)
+            max_crops: Maximum number of crops in the grid
+            cell_size: (width, height) of each crop cell in pixels
+            padding: Context pixels kept around each detected box
+            columns: Grid columns (default: about square)
+            overview_width: Width of the overview strip, 0 to omit it
+
+        Returns:
+            Tuple of (PIL montage image, list of the IDs it contains)
+        """
+        import cv2
+        if self.last_detections is None:
+            raise Exception('No prediction has been made or no widgets have been detected')
+        if ids is None:
+            ids = self.last_detections.ranked()
+        ids = [int(i) for i in ids if 0 <= i < len(self.last_detections)][:max_crops]
+
+        img = self.last_orig_img
+        img_h, img_w = img.shape[:2]
+        cell_w, cell_h = cell_size
+        label_h = 24
+        columns = columns or (max(1, int(np.ceil(np.sqrt(len(ids))))) if ids else 1)
+        rows = int(np.ceil(len(ids) / columns)) if ids else 0
+
+        overview = None
+        if overview_width:
+            overview_h = max(1, int(img_h * overview_width / img_w))
+            overview = cv2.resize(img, (overview_width, overview_h),
+                                  interpolation=cv2.INTER_AREA)
+
+        grid_w = columns * cell_w
+        width = max(grid_w, overview.shape[1] if overview is not None else 0)
+        top = overview.shape[0] + 4 if overview is not None else 0
+        height = top + rows * (cell_h + label_h)
+        montage = np.full((max(height, 1), max(width, 1), 3), 255, dtype=np.uint8)
+        if overview is not None:
+            montage[:overview.shape[0], :overview.shape[1]] = overview
+
+        for n, det_id in enumerate(ids):
+            bx1, by1, bx2, by2 = self.last_detections.xyxy[det_id].astype(int).tolist()
+            x1 = max(0, bx1 - padding)
+            y1 = max(0, by1 - padding)
+            x2 = min(img_w, bx2 + padding)
+            y2 = min(img_h, by2 + padding)
+            crop = img[y1:y2, x1:x2]
+            if crop.size == 0:
+                continue
+            scale = min(cell_w / crop.shape[1], cell_h / crop.shape[0], 2.0)
+            crop = cv2.resize(crop, (max(1, int(crop.shape[1] * scale)),
+                                     max(1, int(crop.shape[0] * scale))),
+                              interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR)
+            cell_x = (n % columns) * cell_w
+            cell_y = top + (n // columns) * (cell_h + label_h)
+            cv2.putText(montage, str(det_id), (cell_x + 4, cell_y + label_h - 6),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+            montage[cell_y + label_h:cell_y + label_h + crop.shape[0],
+                    cell_x:cell_x + crop.shape[1]] = crop
+            cv2.rectangle(montage, (cell_x, cell_y),
+                          (cell_x + cell_w - 1, cell_y + label_h + cell_h - 1),
+                          (200, 200, 200), 1)
+
+        img_rgb = cv2.cvtColor(montage, cv2.COLOR_BGR2RGB)
+        return Image.fromarray(img_rgb), ids
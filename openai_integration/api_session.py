@@ -0,0 +1,306 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, \
+    wait as wait_futures
+from dataclasses import dataclass
+from typing import Optional
+
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: transport failures, timeouts, 429 and 5xx
+RETRYABLE_ERRORS = (openai.APIConnectionError, openai.APITimeoutError,
+                    openai.RateLimitError, openai.InternalServerError)
+
+
+@dataclass
+class ApiSessionConfig:
+    """
+    Connection, retry and rate-limit policy of the shared OpenAI session.
+
+    Hedging is off by default: with `hedge_after_sec` set, a request still
+    unanswered after that delay is sent a second time and the first answer
+    wins, trading extra API usage for a shorter latency tail.
+    """
+    timeout_sec: float = 60.0
+    connect_timeout_sec: float = 10.0
+    max_connections: int = 16
+    max_keepalive_connections: int = 8
+    max_concurrency: int = 4
+    max_retries: int = 3
+    backoff_base_sec: float = 0.5
+    backoff_max_sec: float = 8.0
+    requests_per_sec: Optional[float] = None
+    burst: int = 4
+    hedge_after_sec: Optional[float] = None
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self):
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self):
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class ApiSession:
+    """
+    One pooled HTTP session to the OpenAI API shared by every client.
+
+    Wraps a synchronous and an asynchronous OpenAI client over pooled httpx
+    connections with explicit timeouts, and runs every call through the same
+    policy: token-bucket rate limit, concurrency limit, jittered exponential
+    backoff on retryable errors and optional hedging.
+
+    An httpx.AsyncClient and an asyncio.Semaphore are bound to the event loop
+    they are first used on, so the async client and semaphore are created
+    per event loop (e.g. per asyncio.run of a prefetch worker).
+    """
+
+    def __init__(self, api_key: str = None, config: ApiSessionConfig = None,
+                 base_url: str = None):
+        """
+        Args:
+            api_key: OpenAI API key (if None, reads OPENAI_API_KEY)
+            config: Connection and retry policy (default: ApiSessionConfig())
+            base_url: API endpoint (if None, the OpenAI library reads
+                OPENAI_BASE_URL or uses the public API)
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("API key must be provided or set in OPENAI_API_KEY environment variable")
+        self.config = config or ApiSessionConfig()
+        cfg = self.config
+        timeout = httpx.Timeout(cfg.timeout_sec, connect=cfg.connect_timeout_sec)
+        limits = httpx.Limits(max_connections=cfg.max_connections,
+                              max_keepalive_connections=cfg.max_keepalive_connections)
+        # Retries are handled here, not by the OpenAI library
+        self.client = OpenAI(api_key=self.api_key, base_url=base_url,
+                             max_retries=0, timeout=timeout,
+                             http_client=httpx.Client(timeout=timeout, limits=limits))
+        self._base_url = base_url
+        self._timeout = timeout
+        self._limits = limits
+        self.rate_limiter = TokenBucket(cfg.requests_per_sec, cfg.burst) \
+            if cfg.requests_per_sec else None
+        self._semaphore = threading.BoundedSemaphore(cfg.max_concurrency)
+        # Event loop -> (AsyncOpenAI client, asyncio.Semaphore)
+        self._loop_state = weakref.WeakKeyDictionary()
+        self._loop_lock = threading.Lock()
+        self._hedge_pool = None
+        self._stats_lock = threading.Lock()
+        self.counts = {"requests": 0, "retries": 0, "errors": 0,
+                       "hedges": 0, "hedge_wins": 0}
+
+    # ----------------------------------------------------------
+    # Synchronous calls
+    # ----------------------------------------------------------
+
+    def chat(self, **kwargs):
+        """chat.completions.create through the session policy."""
+        return self.call(self.client.chat.completions.create, **kwargs)
+
+    def transcribe(self, **kwargs):
+        """audio.transcriptions.create through the session policy."""
+        return self.call(self.client.audio.transcriptions.create, **kwargs)
+
+    def call(self, fn, **kwargs):
+        """Run an OpenAI client call with rate limit, retries and hedging."""
+        if not self.config.hedge_after_sec:
+            return self._call_with_retries(fn, kwargs)
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(
+                max_workers=2 * self.config.max_concurrency,
+                thread_name_prefix="openai-hedge")
+        primary = self._hedge_pool.submit(self._call_with_retries, fn, kwargs)
+        done, _ = wait_futures([primary], timeout=self.config.hedge_after_sec)
+        if done:
+            return primary.result()
+        self._count("hedges")
+        hedge = self._hedge_pool.submit(self._call_with_retries, fn, kwargs)
+        done, _ = wait_futures([primary, hedge], return_when=FIRST_COMPLETED)
+        winner = done.pop()
+        if winner is hedge:
+            self._count("hedge_wins")
+        # The loser cannot be interrupted; its answer is ignored
+        return winner.result()
+
+    def _call_with_retries(self, fn, kwargs):
+        for attempt in range(self.config.max_retries + 1):
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self._count("requests")
+            try:
+                with self._semaphore:
+                    return fn(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.config.max_retries:
+                    self._count("errors")
+                    raise
+                delay = self._backoff(attempt)
+                self._count("retries")
+                logger.warning(f"OpenAI call failed ({type(e).__name__}), "
+                               f"retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+    # ----------------------------------------------------------
+    # Asynchronous calls
+    # ----------------------------------------------------------
+
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async client of the running event loop."""
+        return self._async_state()[0]
+
+    def _async_state(self) -> tuple:
+        loop = asyncio.get_running_loop()
+        with self._loop_lock:
+            state = self._loop_state.get(loop)
+            if state is None:
+                client = AsyncOpenAI(
+                    api_key=self.api_key, base_url=self._base_url, max_retries=0,
+                    timeout=self._timeout,
+                    http_client=httpx.AsyncClient(timeout=self._timeout,
+                                                  limits=self._limits))
+                state = self._loop_state[loop] = (
+                    client, asyncio.Semaphore(self.config.max_concurrency))
+            return state
+
+    async def chat_async(self, **kwargs):
+        return await self.call_async(self.async_client.chat.completions.create, **kwargs)
+
+    async def transcribe_async(self, **kwargs):
+        return await self.call_async(self.async_client.audio.transcriptions.create,
+                                     **kwargs)
+
+    async def call_async(self, fn, **kwargs):
+        """Async counterpart of call(); a hedge loser is cancelled."""
+        if not self.config.hedge_after_sec:
+            return await self._call_with_retries_async(fn, kwargs)
+        primary = asyncio.ensure_future(self._call_with_retries_async(fn, kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self.config.hedge_after_sec)
+        if done:
+            return primary.result()
+        self._count("hedges")
+        hedge = asyncio.ensure_future(self._call_with_retries_async(fn, kwargs))
+        done, pending = await asyncio.wait({primary, hedge},
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        winner = done.pop()
+        if winner is hedge:
+            self._count("hedge_wins")
+        return winner.result()
+
+    async def _call_with_retries_async(self, fn, kwargs):
+        semaphore = self._async_state()[1]
+        for attempt in range(self.config.max_retries + 1):
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async()
+            self._count("requests")
+            try:
+                async with semaphore:
+                    return await fn(**kwargs)
+            except RETRYABLE_ERRORS as e:
+                if attempt == self.config.max_retries:
+                    self._count("errors")
+                    raise
+                delay = self._backoff(attempt)
+                self._count("retries")
+                logger.warning(f"OpenAI call failed ({type(e).__name__}), "
+                               f"retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    # ----------------------------------------------------------
+    # Helpers
+    # ----------------------------------------------------------
+
+    def _backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        cap = min(self.config.backoff_max_sec,
+                  self.config.backoff_base_sec * 2 ** attempt)
+        return random.uniform(0, cap)
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.counts[name] += 1
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self.counts)
+
+    def close(self):
+        """
+        Close the sync client and the async clients of loops that are still
+        open (closed loops took their connections with them).
+        """
+        self.client.close()
+        if self._hedge_pool is not None:
+            self._hedge_pool.shutdown(wait=False)
+        with self._loop_lock:
+            states = list(self._loop_state.items())
+            self._loop_state.clear()
+        for loop, (client, _) in states:
+            if loop.is_closed():
+                continue
+            try:
+                if loop.is_running():
+                    asyncio.run_coroutine_threadsafe(client.close(), loop).result(timeout=5)
+                else:
+                    loop.run_until_complete(client.close())
+            except Exception as e:
+                logger.debug(f"Could not close async OpenAI client: {e}")
+
+    async def aclose(self):
+        """Close the async client of the running event loop."""
+        with self._loop_lock:
+            state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_session() -> ApiSession:
+    """Process-wide session used by clients that are not given one."""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = ApiSession()
+        return _shared_session
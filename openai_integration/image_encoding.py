@@ -0,0 +1,109 @@
+import base64
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from PIL import Image
+
+LOSSY_FORMATS = ("JPEG", "WEBP")
+
+
+@dataclass
+class ImageEncodingConfig:
+    """
+    How images are encoded before being sent to the model.
+
+    The default (lossless PNG at full resolution) matches the original
+    behaviour; lower `max_long_edge`, a lossy format and a `max_bytes` budget
+    trade grounding accuracy for smaller and faster requests.
+    """
+    image_format: str = "PNG"
+    quality: int = 85
+    min_quality: int = 40
+    max_long_edge: Optional[int] = None
+    max_bytes: Optional[int] = None
+    detail: str = "auto"
+
+    @classmethod
+    def compact(cls) -> "ImageEncodingConfig":
+        """A preset for latency-sensitive requests."""
+        return cls(image_format="JPEG", quality=80, max_long_edge=1600,
+                   max_bytes=400_000)
+
+    @property
+    def is_passthrough(self) -> bool:
+        return self.image_format == "PNG" and self.max_long_edge is None \
+            and self.max_bytes is None
+
+
+@dataclass
+class EncodedImage:
+    data: str
+    mime_type: str
+    n_bytes: int
+    width: int
+    height: int
+    quality: Optional[int]
+    encode_sec: float
+
+
+def _downscale(image: Image.Image, long_edge: int) -> Image.Image:
+    width, height = image.size
+    scale = long_edge / max(width, height)
+    if scale >= 1:
+        return image
+    return image.resize((max(1, round(width * scale)),
+                         max(1, round(height * scale))), Image.LANCZOS)
+
+
+def _save(image: Image.Image, image_format: str, quality: int) -> bytes:
+    buffer = BytesIO()
+    if image_format in LOSSY_FORMATS:
+        image.save(buffer, format=image_format, quality=quality)
+    else:
+        image.save(buffer, format=image_format, optimize=False)
+    return buffer.getvalue()
+
+
+def encode_image(image: Image.Image, config: ImageEncodingConfig) -> EncodedImage:
+    """
+    Downscale and encode a PIL image according to `config`.
+
+    If the result exceeds `config.max_bytes`, lossy formats first step the
+    quality down to `min_quality`, then the image is downscaled by 25% at a
+    time until it fits (or becomes tiny).
+    """
+    start = time.perf_counter()
+    image_format = config.image_format.upper()
+    if image_format == "JPG":
+        image_format = "JPEG"
+    if image_format == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    if config.max_long_edge:
+        image = _downscale(image, config.max_long_edge)
+
+    lossy = image_format in LOSSY_FORMATS
+    quality = config.quality
+    payload = _save(image, image_format, quality)
+    while config.max_bytes and len(payload) > config.max_bytes:
+        if lossy and quality > config.min_quality:
+            quality = max(config.min_quality, quality - 10)
+        elif max(image.size) > 256:
+            image = _downscale(image, int(max(image.size) * 0.75))
+        else:
+            break
+        payload = _save(image, image_format, quality)
+
+    return EncodedImage(
+        data=base64.b64encode(payload).decode("utf-8"),
+        mime_type=f"image/{image_format.lower()}",
+        n_bytes=len(payload),
+        width=image.width,
+        height=image.height,
+        quality=quality if lossy else None,
+        encode_sec=time.perf_counter() - start,
+    )
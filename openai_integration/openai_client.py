@@ -1,30 +1,58 @@
-import os
-from openai import OpenAI
+import asyncio
+import logging
+import time
 import base64
-from typing import List, Union
+from typing import Iterator, List, Union
 from PIL import Image
 from io import BytesIO
+import numpy as np
 from dotenv import load_dotenv
 
+from openai_integration.api_session import ApiSession, get_shared_session
+from openai_integration.image_encoding import ImageEncodingConfig, encode_image
+from utils.cassette import Cassette, request_key
+from utils.tracing import span, tracer
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 
 class OpenAIClient:
-    def __init__(self, api_key: str = None, model: str = "gpt-4o"):
+    def __init__(self, api_key: str = None, model: str = "gpt-4o",
+                 image_config: ImageEncodingConfig = None,
+                 session: ApiSession = None, cassette: Cassette = None):
         """
         Initialize the OpenAI client.
 
         Args:
             api_key: OpenAI API key (if None, reads from OPENAI_API_KEY env variable)
             model: Model to use (default: gpt-4o, which supports vision)
+            image_config: How images are downscaled/encoded before sending
+                (default: lossless PNG at full resolution)
+            session: Pooled API session with the timeout, retry, rate-limit
+                and hedging policy (default: a session with `api_key`, or the
+                process-wide shared session)
+            cassette: Records every answer, or replays recorded answers
+                without touching the network (no session is opened)
         """
         self.chat = None
-        self.api_key = os.getenv("OPENAI_API_KEY")
-        if not self.api_key:
-            raise ValueError("API key must be provided or set in OPENAI_API_KEY environment variable")
-
-        self.client = OpenAI(api_key=self.api_key)
+        self.cassette = cassette
+        if cassette is not None and cassette.replaying:
+            self.session = None
+            self.api_key = None
+            self.client = None
+        else:
+            self.session = session or (ApiSession(api_key=api_key) if api_key
+                                       else get_shared_session())
+            self.api_key = self.session.api_key
+            self.client = self.session.client
         self.model = model
+        self.image_config = image_config or ImageEncodingConfig()
+        # Encode time and payload size of each image request
+        self.request_stats = []
+        # Tokens used by all calls of this client
+        self.token_usage = {"prompt_tokens": 0, "completion_tokens": 0}
 
     def send_message(self, message: str, system_prompt: str = None) -> str:
         """
@@ -37,24 +65,31 @@ class OpenAIClient:
         Returns:
             The assistant's response as a string
         """
-        messages = []
-
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        messages.append({"role": "user", "content": message})
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages
-        )
-
-        return response.choices[0].message.content
+        if self._replaying:
+            return self._replay(message, system_prompt)
+        messages = self._build_messages(message, system_prompt)
+        with span("openai.chat", "llm", model=self.model,
+                  payload_bytes=_payload_bytes(messages)) as call:
+            response = self.session.chat(
+                model=self.model,
+                messages=messages
+            )
+            self._record_usage(call, response)
+
+        return self._record(message, system_prompt, response.choices[0].message.content)
+
+    async def send_message_async(self, message: str, system_prompt: str = None) -> str:
+        """Async variant of send_message."""
+        if self._replaying:
+            return self._replay(message, system_prompt)
+        messages = self._build_messages(message, system_prompt)
+        return self._record(message, system_prompt, await self._chat_async(messages))
 
     def send_message_with_images(
             self,
             message: str,
-            images: Union[str, Image.Image, List[Union[str, Image.Image]]],
+            images: Union[str, Image.Image, np.ndarray,
+                          List[Union[str, Image.Image, np.ndarray]]],
             system_prompt: str = None
     ) -> str:
         """
@@ -65,60 +100,197 @@ class OpenAIClient:
             images: Can be:
                 - A string (file path)
                 - A PIL Image object
-                - A list of strings (file paths) and/or PIL Image objects
+                - An RGB NumPy array
+                - A list of file paths, PIL Image objects and/or arrays
             system_prompt: Optional system prompt to set context
 
         Returns:
             The assistant's response as a string
         """
+        if self._replaying:
+            return self._replay(message, system_prompt)
+        messages = self._build_image_messages(message, images, system_prompt)
+        with span("openai.chat", "llm", model=self.model,
+                  payload_bytes=_payload_bytes(messages)) as call:
+            response = self.session.chat(
+                model=self.model,
+                messages=messages
+            )
+            self._record_usage(call, response)
+
+        return self._record(message, system_prompt, response.choices[0].message.content)
+
+    def stream_message_with_images(
+            self,
+            message: str,
+            images: Union[str, Image.Image, np.ndarray,
+                          List[Union[str, Image.Image, np.ndarray]]],
+            system_prompt: str = None
+    ) -> Iterator[str]:
+        """
+        Streaming variant of send_message_with_images: yields the text of the
+        response chunk by chunk as the model generates it. Retries only cover
+        opening the stream.
+        """
+        if self._replaying:
+            yield self._replay(message, system_prompt)
+            return
+        messages = self._build_image_messages(message, images, system_prompt)
+        start = time.perf_counter()
+        stream = self.session.chat(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        parts = []
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk
+                if chunk.choices and chunk.choices[0].delta.content:
+                    parts.append(chunk.choices[0].delta.content)
+                    yield parts[-1]
+            self._record(message, system_prompt, "".join(parts))
+        finally:
+            # The stream interleaves with other stages, so it is recorded
+            # as a measured span rather than an open block
+            call = tracer.record("openai.chat", "llm", start,
+                                 time.perf_counter() - start, model=self.model,
+                                 stream=True, payload_bytes=_payload_bytes(messages))
+            if usage is not None:
+                self._record_usage(call, usage)
+
+    async def send_message_with_images_async(
+            self,
+            message: str,
+            images: Union[str, Image.Image, np.ndarray,
+                          List[Union[str, Image.Image, np.ndarray]]],
+            system_prompt: str = None
+    ) -> str:
+        """
+        Async variant of send_message_with_images. Image encoding runs in a
+        worker thread so the event loop stays free.
+        """
+        if self._replaying:
+            return self._replay(message, system_prompt)
+        messages = await asyncio.to_thread(self._build_image_messages,
+                                           message, images, system_prompt)
+        return self._record(message, system_prompt, await self._chat_async(messages))
+
+    async def _chat_async(self, messages: list) -> str:
+        # Coroutines interleave on one thread, so the call is recorded as a
+        # measured span instead of an open block
+        start = time.perf_counter()
+        response = await self.session.chat_async(model=self.model,
+                                                 messages=messages)
+        call = tracer.record("openai.chat", "llm", start,
+                             time.perf_counter() - start, model=self.model,
+                             payload_bytes=_payload_bytes(messages))
+        self._record_usage(call, response)
+        return response.choices[0].message.content
+
+    @property
+    def _replaying(self) -> bool:
+        return self.cassette is not None and self.cassette.replaying
+
+    def _replay(self, message: str, system_prompt: str = None) -> str:
+        """Recorded answer to a request; images are not part of the key."""
+        with span("openai.chat", "llm", model=self.model, replay=True):
+            return self.cassette.next("chat", request_key(self.model, system_prompt, message))
+
+    def _record(self, message: str, system_prompt: str, answer: str) -> str:
+        if self.cassette is not None:
+            self.cassette.record("chat", request_key(self.model, system_prompt, message),
+                                 answer)
+        return answer
+
+    def _record_usage(self, call, response):
+        """Attach the token usage of a response to its span and the totals."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        call.set(prompt_tokens=usage.prompt_tokens,
+                 completion_tokens=usage.completion_tokens)
+        self.token_usage["prompt_tokens"] += usage.prompt_tokens
+        self.token_usage["completion_tokens"] += usage.completion_tokens
+
+    def _build_messages(self, message, system_prompt: str = None) -> list:
+        messages = []
+
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+
+        messages.append({"role": "user", "content": message})
+        return messages
+
+    def _build_image_messages(self, message: str, images, system_prompt: str = None) -> list:
+        """Encode the images and build the chat messages of an image request."""
         # Convert single image to list
-        if isinstance(images, (str, Image.Image)):
+        if isinstance(images, (str, Image.Image, np.ndarray)):
             images = [images]
+        with span("image_encode", "llm", images=len(images)) as encode_span:
+            content, payload_bytes = self._encode_images(message, images)
+            encode_span.set(payload_bytes=payload_bytes)
+        return self._build_messages(content, system_prompt)
 
+    def _encode_images(self, message: str, images: list) -> tuple:
+        """Return the content array of the text and encoded images, and its image bytes."""
         # Build the content array with text and images
         content = [{"type": "text", "text": message}]
 
+        encode_start = time.perf_counter()
+        payload_bytes = 0
         for image in images:
             # Encode image (handles both file paths and PIL images)
             image_data, mime_type = self._process_image(image)
+            payload_bytes += len(image_data)
 
             content.append({
                 "type": "image_url",
                 "image_url": {
-                    "url": f"data:{mime_type};base64,{image_data}"
+                    "url": f"data:{mime_type};base64,{image_data}",
+                    "detail": self.image_config.detail
                 }
             })
-
-        messages = []
-
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-
-        messages.append({"role": "user", "content": content})
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages
-        )
-
-        return response.choices[0].message.content
-
-    def _process_image(self, image: Union[str, Image.Image]) -> tuple[str, str]:
+        encode_sec = time.perf_counter() - encode_start
+        self.request_stats.append({"images": len(images),
+                                   "payload_bytes": payload_bytes,
+                                   "encode_sec": encode_sec})
+        logger.info(f"Encoded {len(images)} image(s): {payload_bytes / 1024:.0f} KiB "
+                    f"base64 in {encode_sec * 1000:.0f} ms "
+                    f"({self.image_config.image_format}, detail={self.image_config.detail})")
+        return content, payload_bytes
+
+    def _process_image(self, image: Union[str, Image.Image, np.ndarray]) -> tuple[str, str]:
         """
         Process an image (either file path or PIL Image) and return base64 encoding.
 
         Args:
-            image: Either a file path (str) or PIL Image object
+            image: A file path (str), PIL Image object or RGB NumPy array
 
         Returns:
             Tuple of (base64_encoded_string, mime_type)
         """
+        if not self.image_config.is_passthrough:
+            if isinstance(image, str):
+                with Image.open(image) as opened:
+                    encoded = encode_image(opened, self.image_config)
+            else:
+                if isinstance(image, np.ndarray):
+                    image = Image.fromarray(image)
+                encoded = encode_image(image, self.image_config)
+            return encoded.data, encoded.mime_type
+
         if isinstance(image, str):
             # It's a file path
             return self._encode_image_from_path(image)
         elif isinstance(image, Image.Image):
             # It's a PIL Image
             return self._encode_pil_image(image)
+        elif isinstance(image, np.ndarray):
+            return self._encode_pil_image(Image.fromarray(image))
         else:
             raise ValueError(f"Unsupported image type: {type(image)}")
 
@@ -188,3 +360,17 @@ class OpenAIClient:
             'webp': 'image/webp'
         }
         return mime_types.get(extension.lower(), 'image/jpeg')
+
+
+def _payload_bytes(messages: list) -> int:
+    """Approximate request size: the text and base64 image data sent."""
+    total = 0
+    for message in messages:
+        content = message["content"]
+        if isinstance(content, str):
+            total += len(content)
+            continue
+        for part in content:
+            total += len(part["text"]) if part["type"] == "text" \
+                else len(part["image_url"]["url"])
+    return total
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "transcriptions")
+
+
+class TranscriptionCache:
+    """
+    Persistent, content-addressed cache of Whisper transcripts.
+
+    Entries are keyed by a SHA-256 of the audio bytes plus the model,
+    language and audio preprocessing used, and stored as one small JSON file each. The total size on
+    disk is bounded; the least recently used entries are evicted first.
+    Empty transcripts (failed or silent uploads) are never cached.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = 16 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Folder holding the cache entries (created if missing)
+            max_bytes: Upper bound for the total size of all entries on disk
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # key -> entry size in bytes, ordered from least to most recently used
+        self._index = OrderedDict()
+        self._total_bytes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def make_key(audio_bytes: bytes, model: str, language: str,
+                 preprocessing: str = "") -> str:
+        """
+        Return the cache key for a piece of audio and transcription settings.
+
+        Args:
+            preprocessing: Description of the preprocessing applied before
+                upload (sample rate, trimming, codec), since it changes what
+                Whisper hears
+        """
+        digest = hashlib.sha256(audio_bytes)
+        digest.update(f"|{model}|{language}".encode("utf-8"))
+        if preprocessing:
+            digest.update(f"|{preprocessing}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached transcript for key, or None on a miss."""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            path = self._entry_path(key)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    text = json.load(f)["text"]
+                if not text.strip():
+                    raise ValueError("empty transcript")
+                os.utime(path)
+            except (OSError, ValueError, KeyError, AttributeError):
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: str, text: str):
+        """Store a transcript and evict old entries if over the size bound."""
+        if not text or not text.strip():
+            return
+        payload = json.dumps({"text": text}).encode("utf-8")
+        with self._lock:
+            path = self._entry_path(key)
+            tmp_path = f"{path}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    f.write(payload)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not write transcription cache entry: {e}")
+                return
+            if key in self._index:
+                self._total_bytes -= self._index[key]
+            self._index[key] = len(payload)
+            self._index.move_to_end(key)
+            self._total_bytes += len(payload)
+            self._evict()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current cache footprint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+            }
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        # Oldest modification time first, i.e. least recently used first
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            self._drop(key)
+            self.evictions += 1
+
+    def _drop(self, key: str):
+        self._total_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
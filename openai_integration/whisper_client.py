@@ -1,7 +1,16 @@
+import asyncio
 import os
-from openai import OpenAI
+import threading
+import time
 from dotenv import load_dotenv
 
+from openai_integration.api_session import ApiSession, get_shared_session
+from openai_integration.transcription_cache import TranscriptionCache, \
+    DEFAULT_CACHE_DIR
+from utils.audio_preprocessing import preprocess_audio, TARGET_SAMPLE_RATE
+from utils.cassette import Cassette
+from utils.tracing import span, tracer
+
 load_dotenv()
 
 
@@ -10,14 +19,46 @@ class WhisperService:
     Class for speech to text.
     """
 
-    def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-
-        if not api_key:
-            raise ValueError("OPEN_AI_KEY missing.")
+    def __init__(self, model: str = "whisper-1", language: str = "en",
+                 use_cache: bool = True, cache_dir: str = DEFAULT_CACHE_DIR,
+                 cache_max_bytes: int = 16 * 1024 * 1024,
+                 preprocess: bool = True, compress_format: str = None,
+                 session: ApiSession = None, cassette: Cassette = None):
+        """
+        Args:
+            model: Whisper model used for transcription
+            language: Spoken language passed to Whisper
+            use_cache: Reuse transcripts of previously seen audio from disk
+            cache_dir: Folder of the persistent transcription cache
+            cache_max_bytes: Size bound of the transcription cache
+            preprocess: Downmix, resample to 16 kHz and trim silence before
+                uploading the audio
+            compress_format: Optional compressed upload format ("FLAC" or
+                "OGG"), used only when preprocessing is enabled
+            session: Pooled API session (default: the process-wide shared one)
+            cassette: Records every transcript, or replays recorded
+                transcripts without touching the network
+        """
+        self.cassette = cassette
+        if cassette is not None and cassette.replaying:
+            self.session = None
+            self.client = None
+        else:
+            if session is None and not os.getenv("OPENAI_API_KEY"):
+                raise ValueError("OPEN_AI_KEY missing.")
 
-        # initialize the client
-        self.client = OpenAI(api_key=api_key)
+            # initialize the client
+            self.session = session or get_shared_session()
+            self.client = self.session.client
+        self.model = model
+        self.language = language
+        self.preprocess = preprocess
+        self.compress_format = compress_format
+        self.cache = TranscriptionCache(cache_dir, cache_max_bytes) \
+            if use_cache else None
+        self.bytes_saved_total = 0
+        # Uploads are prepared on prefetch worker threads
+        self._stats_lock = threading.Lock()
 
     def transcribe_audio(self, audio_path: str) -> str:
         """
@@ -25,13 +66,120 @@ class WhisperService:
         """
         try:
             with open(audio_path, "rb") as audio_file:
-                transcript = self.client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    language="en"
+                audio_bytes = audio_file.read()
+
+            if self.cassette is not None and self.cassette.replaying:
+                return self._replay(audio_bytes)
+
+            cache_key, cached_text = self._cached_transcript(audio_bytes)
+            if cached_text is not None:
+                return cached_text
+
+            upload = self._prepare_upload(audio_path, audio_bytes)
+            with span("openai.transcribe", "llm", model=self.model,
+                      payload_bytes=len(upload[1])):
+                transcript = self.session.transcribe(
+                    model=self.model,
+                    file=upload,
+                    language=self.language
                 )
-            print(f"Whisper: {transcript.text}")
-            return transcript.text
+            return self._finish(transcript.text, cache_key, audio_bytes)
+        except Exception as e:
+            print(f"Error while transcribing: {e}")
+            return ""
+
+    async def transcribe_audio_async(self, audio_path: str) -> str:
+        """
+        Async variant of transcribe_audio. File reading and preprocessing run
+        in a worker thread so the event loop stays free.
+        """
+        try:
+            with open(audio_path, "rb") as audio_file:
+                audio_bytes = await asyncio.to_thread(audio_file.read)
+
+            if self.cassette is not None and self.cassette.replaying:
+                return self._replay(audio_bytes)
+
+            cache_key, cached_text = self._cached_transcript(audio_bytes)
+            if cached_text is not None:
+                return cached_text
+
+            upload = await asyncio.to_thread(self._prepare_upload, audio_path,
+                                             audio_bytes)
+            start = time.perf_counter()
+            transcript = await self.session.transcribe_async(
+                model=self.model,
+                file=upload,
+                language=self.language
+            )
+            tracer.record("openai.transcribe", "llm", start,
+                          time.perf_counter() - start, model=self.model,
+                          payload_bytes=len(upload[1]))
+            return self._finish(transcript.text, cache_key, audio_bytes)
         except Exception as e:
             print(f"Error while transcribing: {e}")
             return ""
+
+    def _cached_transcript(self, audio_bytes: bytes) -> tuple:
+        """Return (cache key, cached transcript or None)."""
+        if self.cache is None:
+            return None, None
+        cache_key = TranscriptionCache.make_key(audio_bytes, self.model, self.language,
+                                                self._preprocessing_tag())
+        cached_text = self.cache.get(cache_key)
+        if cached_text is not None:
+            print(f"Whisper (cached): {cached_text}")
+            self._record(audio_bytes, cached_text)
+        return cache_key, cached_text
+
+    def _preprocessing_tag(self) -> str:
+        """Preprocessing settings that shape the uploaded audio, for the cache key."""
+        if not self.preprocess:
+            return "raw"
+        return f"{TARGET_SAMPLE_RATE}Hz|trim|{(self.compress_format or 'wav').lower()}"
+
+    def _finish(self, text: str, cache_key, audio_bytes: bytes) -> str:
+        print(f"Whisper: {text}")
+        # An empty transcript is a failed or silent upload, not worth replaying
+        if cache_key is not None and text.strip():
+            self.cache.put(cache_key, text)
+        self._record(audio_bytes, text)
+        return text
+
+    def _replay(self, audio_bytes: bytes) -> str:
+        """Recorded transcript of the audio, matched by content."""
+        key = TranscriptionCache.make_key(audio_bytes, self.model, self.language)
+        with span("openai.transcribe", "llm", model=self.model, replay=True):
+            text = self.cassette.next("whisper", key)
+        print(f"Whisper (replay): {text}")
+        return text
+
+    def _record(self, audio_bytes: bytes, text: str):
+        if self.cassette is not None:
+            self.cassette.record(
+                "whisper",
+                TranscriptionCache.make_key(audio_bytes, self.model, self.language),
+                text)
+
+    def _prepare_upload(self, audio_path: str, audio_bytes: bytes) -> tuple:
+        """
+        Return the (filename, bytes, mime type) tuple uploaded to Whisper,
+        preprocessed when enabled. Falls back to the raw file on failure.
+        """
+        if self.preprocess:
+            try:
+                with span("audio_preprocess", "audio"):
+                    processed = preprocess_audio(
+                        audio_path, audio_bytes,
+                        compress_format=self.compress_format)
+                with self._stats_lock:
+                    self.bytes_saved_total += processed.bytes_saved
+                print(f"Preprocessed {audio_path}: {processed.original_bytes} -> "
+                      f"{processed.processed_bytes} bytes "
+                      f"(saved {processed.bytes_saved}, "
+                      f"{processed.original_duration_sec:.2f}s -> "
+                      f"{processed.duration_sec:.2f}s)")
+                return processed.filename, processed.data, processed.mime_type
+            except Exception as e:
+                print(f"Audio preprocessing failed, uploading original: {e}")
+        return os.path.basename(audio_path), audio_bytes, "audio/wav"
@@ -1,54 +1,104 @@
+import argparse
 import sounddevice as sd
 from scipy.io.wavfile import write
 import numpy as np
 import os
+import re
 import time
 
+from utils.streaming_recorder import StreamingRecorder
+
 SAMPLE_RATE = 44100
 OUTPUT_DIR = "voice_commands"
-os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-print("🎤 Voice Recorder Ready!")
-print("Press ENTER to start recording.")
-print("Speak your command, then press CTRL+C to stop recording.")
-print("Type 'exit' and press ENTER to quit.\n")
 
-counter = 3
+def record_interactive(counter: int = 3):
+    """
+    Record one command per ENTER press, stopped manually with Ctrl+C.
+    """
+    print("🎤 Voice Recorder Ready!")
+    print("Press ENTER to start recording.")
+    print("Speak your command, then press CTRL+C to stop recording.")
+    print("Type 'exit' and press ENTER to quit.\n")
+
+    while True:
+        cmd = input(f"▶️ Press ENTER to record command #{counter}, or type 'exit' to quit: ").strip().lower()
+        if cmd == "exit":
+            print("👋 Exiting recorder.")
+            break
+
+        print("🎙️ Recording... Speak now (press Ctrl+C to stop).")
+
+        try:
+            # Start recording
+            recording = []
+            sd.default.samplerate = SAMPLE_RATE
+            sd.default.channels = 1
+
+            def callback(indata, frames, time_info, status):
+                recording.append(indata.copy())
+
+            with sd.InputStream(callback=callback):
+                try:
+                    while True:
+                        time.sleep(0.1)
+                except KeyboardInterrupt:
+                    print("🛑 Stopped recording.")
+
+            # Combine all recorded chunks
+            if len(recording) > 0:
+                audio = np.concatenate(recording, axis=0)
+                filename = os.path.join(OUTPUT_DIR, f"{counter}.wav")
+                write(filename, SAMPLE_RATE, audio)
+                print(f"✅ Saved: {filename}\n")
+                counter += 1
+            else:
+                print("⚠️ No audio captured, skipping.\n")
 
-while True:
-    cmd = input(f"▶️ Press ENTER to record command #{counter}, or type 'exit' to quit: ").strip().lower()
-    if cmd == "exit":
-        print("👋 Exiting recorder.")
-        break
+        except Exception as e:
+            print(f"❌ Recording failed: {e}\n")
+            continue
 
-    print("🎙️ Recording... Speak now (press Ctrl+C to stop).")
 
+def record_streaming(start_index: int):
+    """
+    Record continuously and save every utterance detected by the VAD as the
+    next numbered file, without any key presses between commands.
+    """
+    print("🎤 Streaming recorder ready. Speak your commands, pausing between them.")
+    print("Press CTRL+C to stop.\n")
+
+    recorder = StreamingRecorder(sample_rate=SAMPLE_RATE, output_dir=OUTPUT_DIR,
+                                 start_index=start_index)
     try:
-        # Start recording
-        recording = []
-        sd.default.samplerate = SAMPLE_RATE
-        sd.default.channels = 1
-
-        def callback(indata, frames, time_info, status):
-            recording.append(indata.copy())
-
-        with sd.InputStream(callback=callback):
-            try:
-                while True:
-                    time.sleep(0.1)
-            except KeyboardInterrupt:
-                print("🛑 Stopped recording.")
-
-        # Combine all recorded chunks
-        if len(recording) > 0:
-            audio = np.concatenate(recording, axis=0)
-            filename = os.path.join(OUTPUT_DIR, f"{counter}.wav")
-            write(filename, SAMPLE_RATE, audio)
-            print(f"✅ Saved: {filename}\n")
-            counter += 1
-        else:
-            print("⚠️ No audio captured, skipping.\n")
-
-    except Exception as e:
-        print(f"❌ Recording failed: {e}\n")
-        continue
\ No newline at end of file
+        with recorder:
+            while True:
+                utterance = recorder.utterances.get()
+                print(f"✅ Saved: {utterance.path} ({utterance.duration_sec:.2f}s)")
+    except KeyboardInterrupt:
+        print("🛑 Stopped recording.")
+    while not recorder.utterances.empty():
+        utterance = recorder.utterances.get()
+        print(f"✅ Saved: {utterance.path} ({utterance.duration_sec:.2f}s)")
+
+
+def next_free_index(folder_name: str = OUTPUT_DIR) -> int:
+    """Return the number following the highest numbered .wav in the folder."""
+    numbers = [int(m.group()) for f in os.listdir(folder_name)
+               if f.endswith(".wav") and (m := re.search(r'\d+', f))]
+    return max(numbers, default=0) + 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record voice commands.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Continuous capture with automatic utterance segmentation")
+    parser.add_argument("--start-index", type=int, default=None,
+                        help="Number of the first recorded command")
+    args = parser.parse_args()
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    if args.stream:
+        record_streaming(args.start_index or next_free_index())
+    else:
+        record_interactive(args.start_index or 3)
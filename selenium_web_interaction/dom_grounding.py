@@ -0,0 +1,232 @@
+import logging
+import re
+from dataclasses import dataclass
+from difflib import SequenceMatcher
+from typing import Optional
+
+from selenium_web_interaction.viewport_geometry import WINDOW_GEOMETRY_JS, \
+    viewport_to_screen
+from utils.BoundingBox import BoundingBox
+
+logger = logging.getLogger(__name__)
+
+# Cheap fingerprint of the page state used to decide whether to rebuild the index
+PAGE_STATE_JS = """
+return [location.href, document.getElementsByTagName('*').length,
+        window.scrollX, window.scrollY, window.innerWidth, window.innerHeight].join('|');
+"""
+
+# Collects every visible interactive element in one round trip. Nodes are kept
+# in window.__groundingNodes so a match can be scrolled into view by index.
+DOM_INDEX_JS = """
+const selector = 'a, button, input, select, textarea, label, summary, ' +
+    '[role=button], [role=link], [role=checkbox], [role=radio], [role=tab], ' +
+    '[role=menuitem], [role=option], [onclick], [contenteditable=true], [tabindex]';
+const nodes = [];
+const elements = [];
+for (const el of document.querySelectorAll(selector)) {
+    const rect = el.getBoundingClientRect();
+    if (rect.width < 2 || rect.height < 2) continue;
+    const style = window.getComputedStyle(el);
+    if (style.visibility === 'hidden' || style.display === 'none' ||
+        parseFloat(style.opacity) === 0) continue;
+    if (el.type === 'hidden') continue;
+    let labelText = '';
+    if (el.labels && el.labels.length) labelText = el.labels[0].innerText;
+    nodes.push(el);
+    elements.push({
+        tag: el.tagName.toLowerCase(),
+        type: el.getAttribute('type') || '',
+        role: el.getAttribute('role') || '',
+        id: el.id || '',
+        name: el.getAttribute('name') || '',
+        text: (el.innerText || '').trim().slice(0, 120),
+        placeholder: el.getAttribute('placeholder') || '',
+        aria: el.getAttribute('aria-label') || '',
+        title: el.getAttribute('title') || '',
+        alt: el.getAttribute('alt') || '',
+        value: (el.tagName === 'INPUT' && /^(submit|button|reset)$/i.test(el.type))
+            ? (el.value || '') : '',
+        label: labelText.trim(),
+        dataTest: el.getAttribute('data-test') || el.getAttribute('data-testid') || '',
+        x: rect.left, y: rect.top, w: rect.width, h: rect.height
+    });
+}
+window.__groundingNodes = nodes;
+const geometry = (function() { %s })();
+return {elements: elements, geometry: geometry};
+""" % WINDOW_GEOMETRY_JS
+
+SCROLL_INTO_VIEW_JS = """
+const el = (window.__groundingNodes || [])[arguments[0]];
+if (!el) return null;
+el.scrollIntoView({block: 'center', inline: 'center'});
+const rect = el.getBoundingClientRect();
+return {x: rect.left, y: rect.top, w: rect.width, h: rect.height};
+"""
+
+_DESCRIPTOR_FIELDS = ("text", "aria", "placeholder", "label", "value", "id",
+                      "name", "dataTest", "title", "alt")
+# Words describing the kind of widget rather than which one it is
+_GENERIC_WORDS = {"field", "button", "btn", "input", "box", "link", "textbox",
+                  "text", "icon", "the", "tab", "area"}
+_ROLE_WORDS = {
+    "button": {"button", "submit"},
+    "btn": {"button", "submit"},
+    "link": {"a", "link"},
+    "field": {"input", "textarea", "select"},
+    "input": {"input", "textarea"},
+    "checkbox": {"checkbox"},
+}
+
+
+def _tokens(value: str) -> list:
+    # Split camelCase, snake_case, kebab-case and spaces
+    value = re.sub(r"([a-z])([A-Z])", r"\1 \2", value)
+    return [t for t in re.split(r"[^a-z0-9]+", value.lower()) if t]
+
+
+@dataclass
+class DomMatch:
+    index: int
+    score: float
+    element: dict
+    bounding_box: BoundingBox
+
+
+class DomGroundingEngine:
+    """
+    Grounds a target name (e.g. "username_field") to a DOM element of the
+    live page and returns its rectangle in screen coordinates.
+
+    The element index is built with one batched JavaScript call and reused
+    until the page state (URL, node count, scroll, viewport) changes.
+    """
+
+    def __init__(self, driver, min_score: float = 0.8):
+        """
+        Args:
+            driver: Selenium WebDriver of the controlled browser
+            min_score: Minimum match score (0..1) for a match to be trusted
+        """
+        self.driver = driver
+        self.min_score = min_score
+        self.elements = []
+        self.geometry = None
+        self._state = None
+        self.index_builds = 0
+
+    def refresh(self, force: bool = False):
+        """Rebuild the element index if the page state changed."""
+        state = self.driver.execute_script(PAGE_STATE_JS)
+        if not force and state == self._state and self.geometry is not None:
+            return
+        result = self.driver.execute_script(DOM_INDEX_JS)
+        self.elements = result["elements"]
+        self.geometry = result["geometry"]
+        self._state = state
+        self.index_builds += 1
+
+    def score(self, target: str, element: dict) -> float:
+        """Similarity in [0, 1] between a target name and a DOM element."""
+        raw_tokens = _tokens(target)
+        target_tokens = [t for t in raw_tokens if t not in _GENERIC_WORDS] \
+            or raw_tokens
+        if not target_tokens:
+            return 0.0
+        target_text = " ".join(target_tokens)
+
+        best = 0.0
+        for field in _DESCRIPTOR_FIELDS:
+            element_tokens = [t for t in _tokens(element.get(field, ""))
+                              if t not in _GENERIC_WORDS]
+            if not element_tokens:
+                continue
+            element_text = " ".join(element_tokens)
+            if element_text == target_text:
+                best = 1.0
+                break
+            overlap = len(set(target_tokens) & set(element_tokens))
+            jaccard = overlap / len(set(target_tokens) | set(element_tokens))
+            ratio = SequenceMatcher(None, target_text, element_text).ratio()
+            contained = 0.9 if overlap == len(set(target_tokens)) else 0.0
+            best = max(best, jaccard, ratio, contained)
+
+        # Small bonus when the requested widget kind matches the element kind
+        kinds = {element["tag"], element["role"], element["type"]}
+        if any(kinds & _ROLE_WORDS.get(word, set()) for word in raw_tokens):
+            best = min(1.0, best + 0.05)
+        return best
+
+    def find(self, target: str, ambiguity_margin: float = 0.02) -> Optional[DomMatch]:
+        """
+        Return the best-scoring element for the target, or None. When another,
+        non-overlapping element scores within `ambiguity_margin` of the best
+        one the match is ambiguous and its score is reported as 0.
+        """
+        self.refresh()
+        scores = [self.score(target, element) for element in self.elements]
+        if not scores:
+            return None
+        index = max(range(len(scores)), key=scores.__getitem__)
+        score = scores[index]
+        element = self.elements[index]
+        for other_index, other_score in enumerate(scores):
+            if other_index != index and other_score >= score - ambiguity_margin \
+                    and not self._overlaps(element, self.elements[other_index]):
+                logger.info(f"DOM grounding for '{target}' is ambiguous")
+                score = 0.0
+                break
+        return DomMatch(index=index, score=score, element=element,
+                        bounding_box=self._to_screen_box(element))
+
+    def candidates(self, target: str, limit: int = 5,
+                   min_score: float = 0.4) -> list:
+        """
+        Return up to `limit` plausible matches (best first), e.g. to focus a
+        visual grounding pass on the right part of the screen.
+        """
+        self.refresh()
+        scored = sorted(((self.score(target, element), index)
+                         for index, element in enumerate(self.elements)),
+                        reverse=True)
+        return [DomMatch(index=index, score=score, element=self.elements[index],
+                         bounding_box=self._to_screen_box(self.elements[index]))
+                for score, index in scored[:limit] if score >= min_score]
+
+    def ground(self, target: str) -> Optional[DomMatch]:
+        """
+        Return a confident match for the target, scrolled into view, or None
+        when the best score is below `min_score`.
+        """
+        match = self.find(target)
+        if match is None or match.score < self.min_score:
+            if match is not None:
+                logger.info(f"DOM grounding for '{target}' not confident "
+                            f"(score={match.score:.2f})")
+            return None
+        if not self._in_viewport(match.element):
+            rect = self.driver.execute_script(SCROLL_INTO_VIEW_JS, match.index)
+            if rect is None:
+                return None
+            self.geometry = self.driver.execute_script(WINDOW_GEOMETRY_JS)
+            match.element = {**match.element, **rect}
+            match.bounding_box = self._to_screen_box(match.element)
+            self._state = None
+        return match
+
+    @staticmethod
+    def _overlaps(a: dict, b: dict) -> bool:
+        return a["x"] < b["x"] + b["w"] and b["x"] < a["x"] + a["w"] and \
+            a["y"] < b["y"] + b["h"] and b["y"] < a["y"] + a["h"]
+
+    def _in_viewport(self, element: dict) -> bool:
+        return element["x"] >= 0 and element["y"] >= 0 and \
+            element["x"] + element["w"] <= self.geometry["innerWidth"] and \
+            element["y"] + element["h"] <= self.geometry["innerHeight"]
+
+    def _to_screen_box(self, element: dict) -> BoundingBox:
+        x1, y1 = viewport_to_screen(element["x"], element["y"], self.geometry)
+        x2, y2 = viewport_to_screen(element["x"] + element["w"],
+                                    element["y"] + element["h"], self.geometry)
+        return BoundingBox(x1, y1, x2 - x1, y2 - y1)
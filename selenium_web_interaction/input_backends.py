@@ -0,0 +1,136 @@
+import logging
+from typing import Callable, Tuple
+
+from selenium_web_interaction.viewport_geometry import screen_to_viewport
+
+logger = logging.getLogger(__name__)
+
+# PyAutoGUI key name -> (DOM key, DOM code, Windows virtual key code, text)
+# of the keys dispatched through CDP
+CDP_KEYS = {
+    "enter": ("Enter", "Enter", 13, "\r"),
+    "tab": ("Tab", "Tab", 9, None),
+    "escape": ("Escape", "Escape", 27, None),
+    "backspace": ("Backspace", "Backspace", 8, None),
+    "end": ("End", "End", 35, None),
+    "home": ("Home", "Home", 36, None),
+    "pageup": ("PageUp", "PageUp", 33, None),
+    "pagedown": ("PageDown", "PageDown", 34, None),
+    "up": ("ArrowUp", "ArrowUp", 38, None),
+    "down": ("ArrowDown", "ArrowDown", 40, None),
+    "left": ("ArrowLeft", "ArrowLeft", 37, None),
+    "right": ("ArrowRight", "ArrowRight", 39, None),
+}
+
+
+class HumanInputBackend:
+    """
+    Human-realistic input through the OS cursor and keyboard (PyAutoGUI):
+    animated cursor moves and per-key typing delays.
+    """
+    name = "human"
+
+    def __init__(self, move_duration: float = 0.3, key_interval: float = 0.05):
+        self.move_duration = move_duration
+        self.key_interval = key_interval
+
+    def move_to(self, x: int, y: int):
+        import pyautogui
+        pyautogui.moveTo(x, y, duration=self.move_duration)
+
+    def click(self, x: int, y: int, double_click: bool = False):
+        import pyautogui
+        if double_click:
+            pyautogui.doubleClick()
+        else:
+            pyautogui.click()
+
+    def type_text(self, text: str, delay_between_keys: float = None):
+        import pyautogui
+        interval = self.key_interval if delay_between_keys is None \
+            else delay_between_keys
+        pyautogui.typewrite(text, interval=interval)
+
+    def press_key(self, key: str):
+        """Press and release a named key (PyAutoGUI names: "enter", "end"...)."""
+        import pyautogui
+        pyautogui.press(key)
+
+
+class FastInputBackend:
+    """
+    High-throughput input dispatched straight into the page through the
+    Chrome DevTools Protocol: pointer events at viewport coordinates and a
+    single text insertion per string. The OS cursor is optionally teleported
+    along so screenshots still show where the pointer is.
+    """
+    name = "fast"
+
+    def __init__(self, driver, geometry: Callable[[], dict],
+                 move_os_cursor: bool = True):
+        """
+        Args:
+            driver: Selenium WebDriver of the controlled browser
+            geometry: Callable returning the current window geometry
+            move_os_cursor: Also move the OS cursor instantly (no animation)
+        """
+        self.driver = driver
+        self.geometry = geometry
+        self.move_os_cursor = move_os_cursor
+
+    def _to_viewport(self, x: int, y: int) -> Tuple[float, float]:
+        return screen_to_viewport(x, y, self.geometry())
+
+    def _mouse_event(self, event_type: str, x: float, y: float, **extra):
+        self.driver.execute_cdp_cmd("Input.dispatchMouseEvent",
+                                    {"type": event_type, "x": x, "y": y, **extra})
+
+    def move_to(self, x: int, y: int):
+        if self.move_os_cursor:
+            import pyautogui
+            pyautogui.moveTo(x, y, duration=0)
+        vx, vy = self._to_viewport(x, y)
+        self._mouse_event("mouseMoved", vx, vy)
+
+    def click(self, x: int, y: int, double_click: bool = False):
+        vx, vy = self._to_viewport(x, y)
+        for click_count in ((1, 2) if double_click else (1,)):
+            self._mouse_event("mousePressed", vx, vy, button="left",
+                              clickCount=click_count)
+            self._mouse_event("mouseReleased", vx, vy, button="left",
+                              clickCount=click_count)
+
+    def press_key(self, key: str):
+        """
+        Press and release a named key (the PyAutoGUI names of CDP_KEYS)
+        through Input.dispatchKeyEvent, in the focused element.
+        """
+        if key.lower() not in CDP_KEYS:
+            raise ValueError(f"Unsupported key: {key}")
+        dom_key, code, key_code, text = CDP_KEYS[key.lower()]
+        event = {"key": dom_key, "code": code, "windowsVirtualKeyCode": key_code,
+                 "nativeVirtualKeyCode": key_code}
+        # A key with text (Enter) needs a keyDown to produce it, others a rawKeyDown
+        down = dict(event, type="keyDown", text=text) if text \
+            else dict(event, type="rawKeyDown")
+        self.driver.execute_cdp_cmd("Input.dispatchKeyEvent", down)
+        self.driver.execute_cdp_cmd("Input.dispatchKeyEvent", dict(event, type="keyUp"))
+
+    def type_text(self, text: str, delay_between_keys: float = None):
+        """
+        Insert the text in one go; line breaks are pressed as Enter, as
+        PyAutoGUI does in human mode, so they submit forms.
+        """
+        for index, line in enumerate(text.split("\n")):
+            if index:
+                self.press_key("enter")
+            if line:
+                self._insert_text(line)
+
+    def _insert_text(self, text: str):
+        try:
+            self.driver.execute_cdp_cmd("Input.insertText", {"text": text})
+        except Exception as e:
+            logger.debug(f"CDP text insertion failed, using send_keys: {e}")
+            self.driver.switch_to.active_element.send_keys(text)
+
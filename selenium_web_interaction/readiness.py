@@ -0,0 +1,225 @@
+import logging
+import time
+from typing import Callable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Installs pending-request, DOM-mutation and UI-event counters once per
+# document. The event counter catches visual changes that do not mutate the
+# DOM, such as typing into an input or moving the focus.
+INSTRUMENTATION_JS = """
+(function() {
+    if (window.__readiness) return;
+    const state = window.__readiness = {
+        pending: 0, mutations: 0, events: 0,
+        lastMutation: performance.now(), lastNetwork: performance.now()
+    };
+    for (const type of ['input', 'change', 'focusin', 'focusout', 'scroll',
+                        'resize', 'transitionend', 'animationend', 'load']) {
+        window.addEventListener(type, () => { state.events++; }, true);
+    }
+    const begin = () => { state.pending++; state.lastNetwork = performance.now(); };
+    const end = () => { state.pending = Math.max(0, state.pending - 1);
+                        state.lastNetwork = performance.now(); };
+    if (window.fetch) {
+        const originalFetch = window.fetch;
+        window.fetch = function() {
+            begin();
+            return originalFetch.apply(this, arguments).finally(end);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        begin();
+        this.addEventListener('loadend', end, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+    const observe = () => new MutationObserver(records => {
+        state.mutations += records.length;
+        state.lastMutation = performance.now();
+    }).observe(document, {subtree: true, childList: true, attributes: true,
+                          characterData: true});
+    if (document.documentElement) observe();
+    else document.addEventListener('DOMContentLoaded', observe);
+})();
+"""
+
+READINESS_PROBE_JS = INSTRUMENTATION_JS + """
+const state = window.__readiness;
+const now = performance.now();
+return {
+    readyState: document.readyState,
+    timeOrigin: performance.timeOrigin,
+    pending: state.pending,
+    mutations: state.mutations,
+    events: state.events,
+    sinceMutationMs: now - state.lastMutation,
+    sinceNetworkMs: now - state.lastNetwork
+};
+"""
+
+
+class ReadinessWaiter:
+    """
+    Event-driven replacement for fixed sleeps.
+
+    Readiness is read from the page through the driver: document.readyState,
+    a pending fetch/XHR counter and a DOM mutation counter installed by
+    INSTRUMENTATION_JS. Every wait has a timeout ceiling and is recorded in
+    `wait_log` with the time it actually took.
+
+    A wait runs right after an action whose effect may not have started yet
+    (the click handler has not fired its request, the navigation is still
+    pending), so a page that was quiet before the action must not count as
+    ready. The first probe of a wait is kept as a baseline: the page is ready
+    once it is quiet *and* either some activity (navigation, mutation, UI
+    event, request) happened since the baseline, or it stayed quiet for
+    `settle_ms` measured from the start of the wait.
+    """
+
+    def __init__(self, driver, poll_interval: float = 0.05,
+                 network_idle_ms: float = 250, dom_quiet_ms: float = 150,
+                 settle_ms: float = 300):
+        """
+        Args:
+            driver: Selenium WebDriver of the controlled browser
+            poll_interval: Delay between two readiness probes
+            network_idle_ms: Time without network activity considered idle
+            dom_quiet_ms: Time without DOM mutations considered stable
+            settle_ms: Quiet time from the start of a wait after which a page
+                showing no activity at all is considered ready
+        """
+        self.driver = driver
+        self.poll_interval = poll_interval
+        self.network_idle_ms = network_idle_ms
+        self.dom_quiet_ms = dom_quiet_ms
+        self.settle_ms = settle_ms
+        self.wait_log = []
+        self._install_on_new_documents()
+
+    def _install_on_new_documents(self):
+        """Register the instrumentation for every future document via CDP."""
+        try:
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument",
+                                        {"source": INSTRUMENTATION_JS})
+        except Exception as e:
+            # Non-Chromium drivers: the probe installs it lazily instead
+            logger.debug(f"CDP instrumentation unavailable: {e}")
+
+    def probe(self) -> dict:
+        return self.driver.execute_script(READINESS_PROBE_JS)
+
+    def is_ready(self, state: dict, baseline: dict = None,
+                 waited_ms: float = float("inf")) -> bool:
+        """
+        Args:
+            state: Current probe
+            baseline: First probe of the wait; without it only quietness is checked
+            waited_ms: Time since the start of the wait
+        """
+        quiet = state["readyState"] == "complete" and state["pending"] == 0 \
+            and state["sinceNetworkMs"] >= self.network_idle_ms \
+            and state["sinceMutationMs"] >= self.dom_quiet_ms
+        if not quiet or baseline is None:
+            return quiet
+        activity = state.get("timeOrigin") != baseline.get("timeOrigin") \
+            or state["mutations"] > baseline["mutations"] \
+            or state.get("events", 0) > baseline.get("events", 0) \
+            or state["sinceNetworkMs"] < waited_ms
+        return activity or waited_ms >= self.settle_ms
+
+    def wait_until_ready(self, timeout: float, reason: str = "") -> float:
+        """
+        Block until the document is loaded, the network is idle and the DOM
+        has stopped changing, or until `timeout` seconds have passed.
+
+        Returns:
+            The time actually waited, in seconds
+        """
+        start = time.perf_counter()
+        baseline = None
+        ready = False
+        while True:
+            try:
+                state = self.probe()
+                baseline = baseline or state
+                ready = self.is_ready(state, baseline,
+                                      1000 * (time.perf_counter() - start))
+            except Exception as e:
+                # Usually the document being replaced: counts as activity
+                logger.debug(f"Readiness probe failed: {e}")
+                baseline = baseline or {"timeOrigin": None, "mutations": -1, "events": -1}
+            if ready or time.perf_counter() - start >= timeout:
+                break
+            time.sleep(self.poll_interval)
+        return self._record("page_ready", reason, start, timeout, not ready)
+
+    def wait_for_frame_stable(self, capture: Callable, timeout: float,
+                              reason: str = "", threshold: float = 1.0,
+                              size: int = 64) -> float:
+        """
+        Block until two consecutive captured frames are visually the same
+        (mean absolute difference of downscaled grayscale below `threshold`),
+        or until `timeout` seconds have passed.
+
+        Args:
+            capture: Callable returning the current frame as a PIL image
+        """
+        start = time.perf_counter()
+        previous = None
+        stable = False
+        while True:
+            frame = np.asarray(capture().convert("L").resize((size, size)),
+                               dtype=np.int16)
+            if previous is not None:
+                stable = float(np.abs(frame - previous).mean()) < threshold
+            previous = frame
+            if stable or time.perf_counter() - start >= timeout:
+                break
+            time.sleep(self.poll_interval)
+        return self._record("frame_stable", reason, start, timeout, not stable)
+
+    def summary(self) -> dict:
+        """Total waited time and time saved against the fixed-sleep budgets."""
+        waited = sum(w["elapsed_sec"] for w in self.wait_log)
+        budget = sum(w["budget_sec"] for w in self.wait_log)
+        return {
+            "waits": len(self.wait_log),
+            "timeouts": sum(1 for w in self.wait_log if w["timed_out"]),
+            "waited_sec": waited,
+            "budget_sec": budget,
+            "saved_sec": budget - waited,
+        }
+
+    def _record(self, kind: str, reason: str, start: float, budget: float,
+                timed_out: bool) -> float:
+        elapsed = time.perf_counter() - start
+        self.wait_log.append({"kind": kind, "reason": reason,
+                              "elapsed_sec": elapsed, "budget_sec": budget,
+                              "timed_out": timed_out})
+        return elapsed
+
+
+class FixedWaiter:
+    """Fixed-sleep fallback with the same interface as ReadinessWaiter."""
+
+    def __init__(self):
+        self.wait_log = []
+
+    def wait_until_ready(self, timeout: float, reason: str = "") -> float:
+        time.sleep(timeout)
+        self.wait_log.append({"kind": "fixed", "reason": reason,
+                              "elapsed_sec": timeout, "budget_sec": timeout,
+                              "timed_out": True})
+        return timeout
+
+    def wait_for_frame_stable(self, capture: Callable, timeout: float,
+                              reason: str = "", **kwargs) -> float:
+        return self.wait_until_ready(timeout, reason)
+
+    def summary(self) -> dict:
+        waited = sum(w["elapsed_sec"] for w in self.wait_log)
+        return {"waits": len(self.wait_log), "timeouts": len(self.wait_log),
+                "waited_sec": waited, "budget_sec": waited, "saved_sec": 0.0}
@@ -0,0 +1,131 @@
+"""
+Browser stand-in for cassette replay: serves the screenshots recorded by
+SeleniumExecutorDriver, in order, with the same interface.
+"""
+import os
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from selenium_web_interaction.readiness import FixedWaiter
+from selenium_web_interaction.screen_capture import CaptureMetrics
+from utils.BoundingBox import BoundingBox
+from utils.cassette import Cassette, CassetteMiss
+from utils.tracing import span
+
+
+class _ReplayInput:
+    name = "replay"
+
+
+class ReplayExecutorDriver:
+    """
+    Each screenshot or full-page capture returns the next recorded frame;
+    the last one is repeated once the recording is exhausted. Input actions
+    and waits return at once, and boxes are kept in frame coordinates.
+    """
+
+    def __init__(self, cassette: Cassette, test_run_folder: str):
+        """
+        Args:
+            cassette: Cassette opened in replay mode
+            test_run_folder: Folder of the run
+        """
+        if not cassette.replaying:
+            raise ValueError("ReplayExecutorDriver needs a cassette in replay mode")
+        self.cassette = cassette
+        self.test_run_folder = test_run_folder
+        self.driver = None
+        self.capture_mode = "replay"
+        self.input_backend = _ReplayInput()
+        self.waiter = FixedWaiter()
+        self.capture_metrics = CaptureMetrics()
+        self.action_timings = []
+        self.cursor_position = None
+        self.current_frame = None
+
+    def _next_frame(self) -> np.ndarray:
+        start = time.perf_counter()
+        try:
+            self.current_frame = self.cassette.next_frame()
+        except CassetteMiss:
+            if self.current_frame is None:
+                raise
+        self.capture_metrics.record(time.perf_counter() - start,
+                                    self.current_frame.nbytes)
+        return self.current_frame
+
+    def _record_action(self, action: str, **details):
+        self.action_timings.append({"action": action, "mode": "replay",
+                                    "duration_sec": 0.0, **details})
+
+    # Browser control
+    def load_url(self, url: str):
+        pass
+
+    def quit(self):
+        pass
+
+    # Input
+    def move_cursor_to(self, bounding_box: Optional[BoundingBox] = None, **kwargs):
+        if bounding_box:
+            self.cursor_position = bounding_box.center()
+        self._record_action("move")
+
+    def click(self, double_click: bool = False):
+        self._record_action("click")
+
+    def type_string(self, text: str, delay_between_keys: float = None):
+        self._record_action("type", characters=len(text))
+
+    def press_key(self, key: str):
+        self._record_action("key", key=key)
+
+    def scroll_to_end(self):
+        self.press_key("end")
+
+    # Waits
+    def wait(self, seconds: float = 2.0):
+        pass
+
+    def wait_until_ready(self, timeout: float = 2.0, reason: str = "") -> float:
+        return 0.0
+
+    def wait_for_frame_stable(self, timeout: float = 1.0, reason: str = "") -> float:
+        return 0.0
+
+    # Capture
+    def capture_frame(self, region: Optional[Tuple[float, float, float, float]] = None) -> np.ndarray:
+        frame = self.current_frame if self.current_frame is not None else self._next_frame()
+        if region is not None:
+            x, y, width, height = (int(v) for v in region)
+            frame = frame[y:y + height, x:x + width]
+        return frame
+
+    def screenshot(self, draw_cursor=False, region=None):
+        with span("screenshot", "capture", mode="replay"):
+            return Image.fromarray(self._next_frame())
+
+    def capture_full_page(self) -> np.ndarray:
+        with span("capture_full_page", "capture", mode="replay"):
+            return self._next_frame()
+
+    def scroll_page_box_into_view(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def frame_to_screen(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def screen_to_frame(self, bounding_box: BoundingBox) -> BoundingBox:
+        return bounding_box
+
+    def window_geometry(self) -> dict:
+        height, width = self.capture_frame().shape[:2]
+        return {"screenX": 0, "screenY": 0, "outerWidth": width,
+                "outerHeight": height, "innerWidth": width, "innerHeight": height,
+                "scrollX": 0, "scrollY": 0, "devicePixelRatio": 1}
+
+    def save_screenshot(self, image, filename: str):
+        image.save(os.path.join(self.test_run_folder, filename))
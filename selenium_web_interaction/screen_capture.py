@@ -0,0 +1,144 @@
+import base64
+import io
+import logging
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from selenium_web_interaction.readiness import INSTRUMENTATION_JS
+
+logger = logging.getLogger(__name__)
+
+# Everything that changes what the viewport shows. The counters come from the
+# readiness instrumentation, installed here as well if it is missing.
+PAINT_STATE_JS = INSTRUMENTATION_JS + """
+const state = window.__readiness;
+return [location.href, state.mutations, state.events, window.scrollX,
+        window.scrollY, window.innerWidth, window.innerHeight,
+        window.devicePixelRatio || 1].join('|');
+"""
+
+
+def capture_full_page(driver, max_height: int = 16384) -> tuple:
+    """
+    Capture the whole scrollable page (not only the viewport) through CDP.
+
+    Returns:
+        Tuple of (RGB array, device pixels per CSS pixel, PNG byte size)
+    """
+    metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+    size = metrics.get("cssContentSize") or metrics["contentSize"]
+    width = int(np.ceil(size["width"]))
+    height = int(min(np.ceil(size["height"]), max_height))
+    params = {"format": "png", "fromSurface": True, "captureBeyondViewport": True,
+              "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1}}
+    data = base64.b64decode(driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"])
+    with Image.open(io.BytesIO(data)) as image:
+        frame = np.asarray(image.convert("RGB"))
+    return frame, frame.shape[1] / max(width, 1), len(data)
+
+
+class CaptureMetrics:
+    """Latency and payload size of captured frames."""
+
+    def __init__(self):
+        self.captures = 0
+        self.skipped = 0
+        self.total_latency_sec = 0.0
+        self.total_bytes = 0
+        self.last_latency_sec = 0.0
+        self.last_bytes = 0
+
+    def record(self, latency_sec: float, n_bytes: int):
+        self.captures += 1
+        self.total_latency_sec += latency_sec
+        self.total_bytes += n_bytes
+        self.last_latency_sec = latency_sec
+        self.last_bytes = n_bytes
+
+    def summary(self) -> dict:
+        return {
+            "captures": self.captures,
+            "skipped": self.skipped,
+            "avg_latency_ms": 1000 * self.total_latency_sec / self.captures
+            if self.captures else 0.0,
+            "avg_bytes_per_frame": self.total_bytes / self.captures
+            if self.captures else 0.0,
+            "last_latency_ms": 1000 * self.last_latency_sec,
+            "last_bytes": self.last_bytes,
+        }
+
+
+class ViewportCapture:
+    """
+    Captures only the browser viewport (or a region of it) through the Chrome
+    DevTools Protocol, without the OS desktop and browser chrome.
+
+    Frames are returned as RGB NumPy arrays decoded straight from the CDP
+    screenshot; treat them as read-only, since an unchanged page returns the
+    same array again. When the page has not changed since the last capture
+    (same URL, scroll, viewport, no DOM mutation or UI event and no pointer
+    move, which can change hover styles) the previous frame is returned
+    without capturing again.
+    """
+
+    def __init__(self, driver, image_format: str = "png", quality: int = 90,
+                 max_frame_age_sec: float = 2.0):
+        """
+        Args:
+            driver: Selenium WebDriver of the controlled browser
+            image_format: Transfer format of CDP screenshots ("png" or "jpeg")
+            quality: JPEG quality, ignored for PNG
+            max_frame_age_sec: Recapture after this age even without changes,
+                to pick up repaints the counters do not see (e.g. animations)
+        """
+        self.driver = driver
+        self.image_format = image_format
+        self.quality = quality
+        self.max_frame_age_sec = max_frame_age_sec
+        self.metrics = CaptureMetrics()
+        self.pointer_moves = 0
+        self._frame = None
+        self._last_key = None
+        self._last_time = 0.0
+
+    def capture(self, region: Optional[Tuple[float, float, float, float]] = None,
+                force: bool = False) -> np.ndarray:
+        """
+        Capture the viewport, or `region` = (x, y, width, height) in viewport
+        CSS pixels, as an RGB array of shape (height, width, 3).
+        """
+        try:
+            paint_state = self.driver.execute_script(PAINT_STATE_JS)
+        except Exception as e:
+            logger.debug(f"Paint state probe failed: {e}")
+            paint_state = None
+        key = (paint_state, self.pointer_moves, region)
+        if not force and paint_state is not None and key == self._last_key \
+                and time.perf_counter() - self._last_time < self.max_frame_age_sec:
+            self.metrics.skipped += 1
+            return self._frame
+
+        start = time.perf_counter()
+        params = {"format": self.image_format, "fromSurface": True}
+        if self.image_format == "jpeg":
+            params["quality"] = self.quality
+        if region is not None:
+            x, y, width, height = region
+            params["clip"] = {"x": x, "y": y, "width": width, "height": height,
+                              "scale": 1}
+        data = base64.b64decode(
+            self.driver.execute_cdp_cmd("Page.captureScreenshot", params)["data"])
+        with Image.open(io.BytesIO(data)) as image:
+            self._frame = np.asarray(image.convert("RGB"))
+
+        self.metrics.record(time.perf_counter() - start, len(data))
+        self._last_key = key
+        self._last_time = time.perf_counter()
+        return self._frame
+
+    def pointer_moved(self):
+        """Note a pointer move or click, so the next capture is not skipped."""
+        self.pointer_moves += 1
@@ -2,12 +2,21 @@ import time
 import math
 from datetime import datetime
 from typing import Optional, Tuple
-import pyautogui
+import numpy as np
 from PIL import Image
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
 from selenium.webdriver.chrome.options import Options
+from selenium_web_interaction.input_backends import HumanInputBackend, \
+    FastInputBackend
+from selenium_web_interaction.readiness import ReadinessWaiter, FixedWaiter
+from selenium_web_interaction.screen_capture import ViewportCapture, \
+    CaptureMetrics, capture_full_page
+from selenium_web_interaction.viewport_geometry import WINDOW_GEOMETRY_JS, \
+    viewport_to_screen, screen_to_viewport
 from utils.BoundingBox import BoundingBox
+from utils.cassette import Cassette
+from utils.tracing import span
 import os
 
 
@@ -19,9 +28,23 @@ class SeleniumExecutorDriver:
 
     def __init__(self, chromedriver_path: str, chrome_binary_path: str,
                  start_url: str,
-                 test_run_folder):
+                 test_run_folder,
+                 adaptive_waits: bool = True,
+                 input_mode: str = "human",
+                 instant_cursor: bool = False,
+                 capture_mode: str = "desktop",
+                 cassette: Cassette = None):
         """
         Initialize ChromeDriver with a visible window and optional starting URL.
+        With adaptive_waits, waits end as soon as the page is ready instead of
+        always sleeping for their full duration.
+        input_mode selects "human" (PyAutoGUI, animated and paced like a
+        person) or "fast" (CDP pointer events and text insertion) input;
+        instant_cursor removes the cursor animation of the human mode.
+        capture_mode selects "desktop" (full OS screen) or "viewport" (page
+        content only, through CDP) screenshots.
+        With a recording cassette, every screenshot and full-page capture is
+        stored so ReplayExecutorDriver can serve it again.
         """
 
         # --- Configure Chrome
@@ -38,11 +61,39 @@ class SeleniumExecutorDriver:
         self.arrow_cursor_img = self.arrow_img.resize((32, 32),
                                                              Image.LANCZOS)
         self.test_run_folder = test_run_folder
+        self.cassette = cassette
+        self.waiter = ReadinessWaiter(self.driver) if adaptive_waits \
+            else FixedWaiter()
+        if input_mode == "fast":
+            self.input_backend = FastInputBackend(self.driver,
+                                                  self.window_geometry)
+        elif input_mode == "human":
+            self.input_backend = HumanInputBackend(
+                move_duration=0 if instant_cursor else 0.3)
+        else:
+            raise ValueError(f"Unknown input mode: {input_mode}")
+        # Per-action input timings, to compare the input modes
+        self.action_timings = []
+        # Last position the cursor was sent to (None until the first move)
+        self.cursor_position = None
+        if capture_mode not in ("desktop", "viewport"):
+            raise ValueError(f"Unknown capture mode: {capture_mode}")
+        self.capture_mode = capture_mode
+        self.viewport_capture = ViewportCapture(self.driver) \
+            if capture_mode == "viewport" else None
+        self.capture_metrics = self.viewport_capture.metrics \
+            if self.viewport_capture else CaptureMetrics()
+        # Region and window geometry of the last viewport capture
+        self._capture_region = None
+        self._capture_geometry = None
+        # Device pixels per CSS pixel of the last full-page capture
+        self._full_page_scale = 1
         # Load optional start URL
         if start_url:
             self.load_url(start_url)
 
         # Store screen size for safety bounds
+        import pyautogui
         self.screen_width, self.screen_height = pyautogui.size()
 
     # ----------------------------------------------------------
@@ -52,12 +103,22 @@ class SeleniumExecutorDriver:
     def load_url(self, url: str):
         """Open a given URL in the controlled Chrome instance."""
         self.driver.get(url)
-        time.sleep(2)  # wait for layout to load
+        self.wait_until_ready(2.0, reason="load_url")  # wait for layout to load
 
     def quit(self):
         """Gracefully close the browser."""
         self.driver.quit()
 
+    def window_geometry(self) -> dict:
+        """Window position, viewport size, scroll and device pixel ratio."""
+        return self.driver.execute_script(WINDOW_GEOMETRY_JS)
+
+    def _record_action(self, action: str, start: float, **details):
+        self.action_timings.append({"action": action,
+                                    "mode": self.input_backend.name,
+                                    "duration_sec": time.perf_counter() - start,
+                                    **details})
+
     # ----------------------------------------------------------
     # 🖱️ CURSOR CONTROL
     # ----------------------------------------------------------
@@ -75,13 +136,18 @@ class SeleniumExecutorDriver:
         - Or in a direction vector by a given distance
         """
 
+        start = time.perf_counter()
         if bounding_box:
             # Move to the center of a specific region
             x, y = bounding_box.center()
             if offset:
                 x += offset[0]
                 y += offset[1]
-            pyautogui.moveTo(x, y, duration=0.3)
+            with span("input.move", "input", mode=self.input_backend.name):
+                self.input_backend.move_to(x, y)
+            self._pointer_moved()
+            self.cursor_position = (x, y)
+            self._record_action("move", start)
             return
 
         elif direction and distance:
@@ -96,9 +162,14 @@ class SeleniumExecutorDriver:
             move_x = dx_norm * distance
             move_y = dy_norm * distance
 
-            current_x, current_y = pyautogui.position()
-            pyautogui.moveTo(current_x + move_x, current_y + move_y,
-                             duration=0.3)
+            import pyautogui
+            current_x, current_y = self.cursor_position or pyautogui.position()
+            target = (int(current_x + move_x), int(current_y + move_y))
+            with span("input.move", "input", mode=self.input_backend.name):
+                self.input_backend.move_to(*target)
+            self._pointer_moved()
+            self.cursor_position = target
+            self._record_action("move", start)
             return
 
         else:
@@ -110,14 +181,39 @@ class SeleniumExecutorDriver:
 
     def click(self, double_click: bool = False):
         """Perform a left mouse click (or double click) at current cursor position."""
-        if double_click:
-            pyautogui.doubleClick()
-        else:
-            pyautogui.click()
+        import pyautogui
+        start = time.perf_counter()
+        x, y = self.cursor_position or pyautogui.position()
+        with span("input.click", "input", mode=self.input_backend.name):
+            self.input_backend.click(x, y, double_click=double_click)
+        self._pointer_moved()
+        self._record_action("click", start)
+
+    def _pointer_moved(self):
+        if self.viewport_capture is not None:
+            self.viewport_capture.pointer_moved()
+
+    def type_string(self, text: str, delay_between_keys: float = None):
+        """
+        Type a string into the currently focused input field. The key delay
+        only applies to the human input mode (default 0.05 s).
+        """
+        start = time.perf_counter()
+        with span("input.type", "input", mode=self.input_backend.name,
+                  characters=len(text)):
+            self.input_backend.type_text(text, delay_between_keys)
+        self._record_action("type", start, characters=len(text))
+
+    def press_key(self, key: str):
+        """Press a named key ("enter", "end", "tab"...) in the focused element."""
+        start = time.perf_counter()
+        with span("input.key", "input", mode=self.input_backend.name, key=key):
+            self.input_backend.press_key(key)
+        self._record_action("key", start, key=key)
 
-    def type_string(self, text: str, delay_between_keys: float = 0.05):
-        """Type a string into the currently focused input field."""
-        pyautogui.typewrite(text, interval=delay_between_keys)
+    def scroll_to_end(self):
+        """Press End to scroll the page to the bottom."""
+        self.press_key("end")
 
     # ----------------------------------------------------------
     # ⏳ WAIT
@@ -125,15 +221,156 @@ class SeleniumExecutorDriver:
 
     def wait(self, seconds: float = 2.0):
         """Pause execution for a number of seconds."""
-        time.sleep(seconds)
+        with span("wait", "wait", seconds=seconds):
+            time.sleep(seconds)
+
+    def wait_until_ready(self, timeout: float = 2.0, reason: str = "") -> float:
+        """
+        Wait until the page is loaded, the network is idle and the DOM is
+        stable, at most `timeout` seconds. Returns the time actually waited.
+        """
+        with span("wait_until_ready", "wait", reason=reason, timeout=timeout) as wait:
+            waited = self.waiter.wait_until_ready(timeout, reason=reason)
+            wait.set(waited_sec=waited)
+        return waited
+
+    def wait_for_frame_stable(self, timeout: float = 1.0, reason: str = "") -> float:
+        """
+        Wait until consecutive screenshots stop changing (e.g. after a scroll),
+        at most `timeout` seconds. Returns the time actually waited.
+        The polled frames are not recorded to the cassette: replay skips
+        waits, so only the frames the agents look at may be recorded.
+        """
+        with span("wait_for_frame_stable", "wait", reason=reason, timeout=timeout) as wait:
+            waited = self.waiter.wait_for_frame_stable(
+                lambda: self._screenshot(False, None), timeout, reason=reason)
+            wait.set(waited_sec=waited)
+        return waited
+
+    # ----------------------------------------------------------
+    # 📷 CAPTURE
+    # ----------------------------------------------------------
+
+    def capture_frame(self, region: Optional[Tuple[float, float, float, float]] = None) -> np.ndarray:
+        """
+        Capture the screen as an RGB NumPy array.
+        In viewport mode the array may be shared with later captures of an
+        unchanged page, so treat it as read-only, and `region` is (x, y, width, height) in viewport CSS pixels;
+        in desktop mode `region` is in screen pixels.
+        """
+        with span("capture_frame", "capture", mode=self.capture_mode):
+            if self.viewport_capture is not None:
+                self._capture_region = region
+                self._capture_geometry = self.window_geometry()
+                return self.viewport_capture.capture(region)
+            import pyautogui
+            start = time.perf_counter()
+            frame = np.asarray(pyautogui.screenshot(
+                region=tuple(int(v) for v in region) if region else None))
+            self.capture_metrics.record(time.perf_counter() - start, frame.nbytes)
+            return frame
+
+    def screenshot(self, draw_cursor=False, region=None):
+        with span("screenshot", "capture", mode=self.capture_mode):
+            image = self._screenshot(draw_cursor, region)
+        if self.cassette is not None:
+            self.cassette.record_frame(np.asarray(image.convert("RGB")))
+        return image
 
-    def screenshot(self, draw_cursor=False):
-        image_shoted = pyautogui.screenshot()
+    def _screenshot(self, draw_cursor, region):
+        if self.viewport_capture is None:
+            import pyautogui
+            start = time.perf_counter()
+            image_shoted = pyautogui.screenshot(
+                region=tuple(int(v) for v in region) if region else None)
+            self.capture_metrics.record(time.perf_counter() - start,
+                                        image_shoted.width * image_shoted.height * 3)
+        else:
+            image_shoted = Image.fromarray(self.capture_frame(region))
         if draw_cursor:
-            mouse_x, mouse_y = pyautogui.position()
+            mouse_x, mouse_y = self._cursor_in_frame()
             image_shoted.paste(self.arrow_cursor_img, (mouse_x, mouse_y), self.arrow_cursor_img)
         return image_shoted
 
+    def frame_to_screen(self, bounding_box: BoundingBox) -> BoundingBox:
+        """
+        Map a box detected on the last captured frame to screen coordinates,
+        as expected by move_cursor_to. Identity in desktop mode.
+        """
+        if self.viewport_capture is None or self._capture_geometry is None:
+            return bounding_box
+        geometry = self._capture_geometry
+        scale = geometry.get("devicePixelRatio", 1)
+        offset_x, offset_y = self._capture_region[:2] if self._capture_region else (0, 0)
+        x_min, y_min, width, height = bounding_box
+        x1, y1 = viewport_to_screen(offset_x + x_min / scale,
+                                    offset_y + y_min / scale, geometry)
+        x2, y2 = viewport_to_screen(offset_x + (x_min + width) / scale,
+                                    offset_y + (y_min + height) / scale, geometry)
+        return BoundingBox(x1, y1, x2 - x1, y2 - y1)
+
+    def screen_to_frame(self, bounding_box: BoundingBox) -> BoundingBox:
+        """Inverse of frame_to_screen. Identity in desktop mode."""
+        if self.viewport_capture is None or self._capture_geometry is None:
+            return bounding_box
+        geometry = self._capture_geometry
+        scale = geometry.get("devicePixelRatio", 1)
+        offset_x, offset_y = self._capture_region[:2] if self._capture_region else (0, 0)
+        x1, y1, x2, y2 = bounding_box.to_xyxy()
+        vx1, vy1 = screen_to_viewport(x1, y1, geometry)
+        vx2, vy2 = screen_to_viewport(x2, y2, geometry)
+        return BoundingBox.from_xyxy((vx1 - offset_x) * scale, (vy1 - offset_y) * scale,
+                                     (vx2 - offset_x) * scale, (vy2 - offset_y) * scale)
+
+    def capture_full_page(self) -> np.ndarray:
+        """
+        Capture the whole scrollable page as an RGB array. Boxes found on it
+        are turned into screen boxes with scroll_page_box_into_view.
+        """
+        start = time.perf_counter()
+        with span("capture_full_page", "capture"):
+            frame, self._full_page_scale, n_bytes = capture_full_page(self.driver)
+        self.capture_metrics.record(time.perf_counter() - start, n_bytes)
+        if self.cassette is not None:
+            self.cassette.record_frame(frame)
+        return frame
+
+    def scroll_page_box_into_view(self, bounding_box: BoundingBox) -> BoundingBox:
+        """
+        Scroll so a box found on the full-page capture is visible (centered
+        when it was outside the viewport) and return it in screen coordinates.
+        """
+        scale = self._full_page_scale or 1
+        x1, y1, x2, y2 = (v / scale for v in bounding_box.to_xyxy())
+        geometry = self.window_geometry()
+        visible = geometry["scrollY"] <= y1 and \
+            y2 <= geometry["scrollY"] + geometry["innerHeight"] and \
+            geometry["scrollX"] <= x1 and \
+            x2 <= geometry["scrollX"] + geometry["innerWidth"]
+        if not visible:
+            self.driver.execute_script(
+                "window.scrollTo(arguments[0], arguments[1]);",
+                max(0, (x1 + x2 - geometry["innerWidth"]) / 2),
+                max(0, (y1 + y2 - geometry["innerHeight"]) / 2))
+            self.wait_for_frame_stable(0.5, reason="scroll_into_view")
+            geometry = self.window_geometry()
+        sx1, sy1 = viewport_to_screen(x1 - geometry["scrollX"], y1 - geometry["scrollY"], geometry)
+        sx2, sy2 = viewport_to_screen(x2 - geometry["scrollX"], y2 - geometry["scrollY"], geometry)
+        return BoundingBox.from_xyxy(sx1, sy1, sx2, sy2)
+
+    def _cursor_in_frame(self) -> Tuple[int, int]:
+        import pyautogui
+        mouse_x, mouse_y = self.cursor_position or pyautogui.position()
+        if self.viewport_capture is None or self._capture_geometry is None:
+            return int(mouse_x), int(mouse_y)
+        geometry = self._capture_geometry
+        scale = geometry.get("devicePixelRatio", 1)
+        x, y = screen_to_viewport(mouse_x, mouse_y, geometry)
+        if self._capture_region:
+            x -= self._capture_region[0]
+            y -= self._capture_region[1]
+        return int(x * scale), int(y * scale)
+
     def save_screenshot(self, image, filename: str):
         now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         path = os.path.join(self.test_run_folder, f'{now}_{filename}')
@@ -0,0 +1,39 @@
+from typing import Tuple
+
+# Window metrics needed to map viewport (CSS) coordinates to screen pixels
+WINDOW_GEOMETRY_JS = """
+return {
+    screenX: window.screenX, screenY: window.screenY,
+    outerWidth: window.outerWidth, outerHeight: window.outerHeight,
+    innerWidth: window.innerWidth, innerHeight: window.innerHeight,
+    scrollX: window.scrollX, scrollY: window.scrollY,
+    devicePixelRatio: window.devicePixelRatio || 1
+};
+"""
+
+
+def viewport_origin(geometry: dict) -> Tuple[float, float]:
+    """
+    Screen position (in CSS pixels) of the viewport's top-left corner.
+    The browser chrome (tabs, address bar) sits above the viewport; the
+    window border is assumed to be the same on the left, right and bottom.
+    """
+    border = (geometry["outerWidth"] - geometry["innerWidth"]) / 2
+    origin_x = geometry["screenX"] + border
+    origin_y = geometry["screenY"] + geometry["outerHeight"] \
+        - geometry["innerHeight"] - border
+    return origin_x, origin_y
+
+
+def viewport_to_screen(x: float, y: float, geometry: dict) -> Tuple[int, int]:
+    """Map a viewport point to the physical screen pixel used by pyautogui."""
+    origin_x, origin_y = viewport_origin(geometry)
+    scale = geometry.get("devicePixelRatio", 1)
+    return int(round((origin_x + x) * scale)), int(round((origin_y + y) * scale))
+
+
+def screen_to_viewport(x: float, y: float, geometry: dict) -> Tuple[float, float]:
+    """Inverse of viewport_to_screen."""
+    origin_x, origin_y = viewport_origin(geometry)
+    scale = geometry.get("devicePixelRatio", 1)
+    return x / scale - origin_x, y / scale - origin_y
@@ -0,0 +1,165 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+openai = pytest.importorskip("openai")
+
+from openai_integration.api_session import ApiSession, ApiSessionConfig, TokenBucket
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request("POST", "http://test"))
+
+
+def session(**config):
+    config.setdefault("backoff_base_sec", 0.001)
+    config.setdefault("backoff_max_sec", 0.002)
+    return ApiSession(api_key="test", config=ApiSessionConfig(**config),
+                      base_url="http://127.0.0.1:9")
+
+
+class FlakyCall:
+    """Stub client call failing `failures` times before answering."""
+
+    def __init__(self, failures, error=connection_error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error()
+        return kwargs["answer"]
+
+
+def test_retries_retryable_errors_then_succeeds():
+    api = session(max_retries=3)
+    call = FlakyCall(failures=2)
+    assert api.call(call, answer="ok") == "ok"
+    assert call.calls == 3
+    assert api.stats() == {"requests": 3, "retries": 2, "errors": 0,
+                           "hedges": 0, "hedge_wins": 0}
+    api.close()
+
+
+def test_gives_up_after_max_retries():
+    api = session(max_retries=1)
+    call = FlakyCall(failures=5)
+    with pytest.raises(openai.APIConnectionError):
+        api.call(call, answer="ok")
+    assert call.calls == 2
+    assert api.stats()["errors"] == 1
+    api.close()
+
+
+def test_other_errors_are_not_retried():
+    api = session(max_retries=3)
+    call = FlakyCall(failures=5, error=lambda: ValueError("bad request"))
+    with pytest.raises(ValueError):
+        api.call(call, answer="ok")
+    assert call.calls == 1
+    api.close()
+
+
+def test_backoff_is_capped():
+    api = session(backoff_base_sec=1.0, backoff_max_sec=2.0)
+    assert all(0 <= api._backoff(attempt) <= 2.0 for attempt in range(10))
+    api.close()
+
+
+def test_hedge_answers_when_primary_stalls():
+    api = session(hedge_after_sec=0.05)
+    release = threading.Event()
+    calls = []
+
+    def stalls_first(**kwargs):
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            release.wait(2)
+            return "primary"
+        return "hedge"
+
+    start = time.perf_counter()
+    assert api.call(stalls_first) == "hedge"
+    assert time.perf_counter() - start < 1.0
+    release.set()
+    assert api.stats()["hedges"] == 1 and api.stats()["hedge_wins"] == 1
+    api.close()
+
+
+def test_async_hedge_cancels_the_loser():
+    api = session(hedge_after_sec=0.05)
+    cancelled = []
+
+    async def stalls_first(**kwargs):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(2)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+            return "primary"
+        return "hedge"
+
+    async def run():
+        answer = await api.call_async(stalls_first)
+        await asyncio.sleep(0)
+        return answer
+
+    assert asyncio.run(run()) == "hedge"
+    assert cancelled == [True]
+    api.close()
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=20.0, capacity=2)
+    start = time.perf_counter()
+    for _ in range(4):
+        bucket.acquire()
+    # Two tokens of burst, then two more at 20/s
+    assert 0.08 <= time.perf_counter() - start < 0.5
+
+
+def test_async_client_and_semaphore_per_event_loop():
+    api = session(max_concurrency=1)
+
+    async def answer(**kwargs):
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def run():
+        # Contended semaphore: fails if it belongs to another loop
+        results = await asyncio.gather(api.call_async(answer), api.call_async(answer))
+        return results, api.async_client
+
+    first, client_one = asyncio.run(run())
+    second, client_two = asyncio.run(run())
+    assert first == second == ["ok", "ok"]
+    assert client_one is not client_two
+    api.close()
+
+
+def test_aclose_and_close_release_async_clients():
+    api = session()
+    loop = asyncio.new_event_loop()
+    try:
+        client = loop.run_until_complete(_client_of(api))
+        api.close()
+        assert client.is_closed()
+    finally:
+        loop.close()
+
+    async def reopen():
+        client = api.async_client
+        await api.aclose()
+        return client
+    assert asyncio.run(reopen()).is_closed()
+
+
+async def _client_of(api):
+    return api.async_client
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from models import benchmark_detector
+from models.widget_detector import WidgetDetector
+from utils.cassette import Cassette
+
+
+class StubModel:
+    def predict(self, source, **kwargs):
+        return []
+
+
+@pytest.fixture
+def loads_only_torch(monkeypatch):
+    """Optimized backends fail to load, as without onnxruntime/openvino."""
+    def load(self):
+        if self.backend != "torch":
+            raise ImportError(f"{self.backend} runtime not installed")
+        return StubModel()
+    monkeypatch.setattr(WidgetDetector, "_load_model", load)
+
+
+@pytest.mark.parametrize("backend", ["onnx", "openvino"])
+def test_optimized_backend_falls_back_to_torch(loads_only_torch, backend):
+    detector = WidgetDetector(backend=backend, warmup=False)
+    assert detector.backend == "torch"
+    assert isinstance(detector.model, StubModel)
+
+
+def test_backend_from_environment(loads_only_torch, monkeypatch):
+    monkeypatch.setenv("YOLO_BACKEND", "torch")
+    assert WidgetDetector(warmup=False).backend == "torch"
+    monkeypatch.setenv("YOLO_BACKEND", "tensorrt")
+    with pytest.raises(ValueError):
+        WidgetDetector(warmup=False)
+
+
+def test_torch_load_failure_is_not_hidden(monkeypatch):
+    def load(self):
+        raise ImportError("ultralytics not installed")
+    monkeypatch.setattr(WidgetDetector, "_load_model", load)
+    with pytest.raises(ImportError):
+        WidgetDetector(backend="torch", warmup=False)
+
+
+def test_benchmark_reports_the_backend_actually_used(loads_only_torch):
+    frame = np.zeros((32, 32, 3), dtype=np.uint8)
+    result = benchmark_detector.benchmark("onnx", [frame], repeats=2, warmup=False)
+    assert result["requested_backend"] == "onnx"
+    assert result["backend"] == "torch"
+    assert result["runs"] == 2
+
+
+def test_only_raw_cassette_frames_are_loaded(tmp_path):
+    run = tmp_path / "runs" / "2026-01-01_00-00-00"
+    cassette = Cassette(str(run / "cassette"), "record")
+    first = np.zeros((8, 8, 3), dtype=np.uint8)
+    second = np.full((8, 8, 3), 200, dtype=np.uint8)
+    for frame in (second, first, second):
+        cassette.record_frame(frame)
+    cassette.close()
+    # Annotated grounding artifact next to the cassette
+    from PIL import Image
+    Image.new("RGB", (8, 8), (255, 0, 0)).save(run / "YOLO_detection_0.png")
+
+    images = benchmark_detector.load_screenshots(str(tmp_path / "runs"), limit=10)
+    assert [np.asarray(image)[0, 0, 0] for image in images] == [200, 0]
@@ -0,0 +1,92 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("PIL")
+
+from benchmarks.fake_driver import FakeExecutorDriver
+from selenium_web_interaction.replay_driver import ReplayExecutorDriver
+from utils.cassette import Cassette, CassetteMiss, request_key
+
+
+def make_frames(n=3, size=(48, 64)):
+    return [np.full(size + (3,), 40 * (i + 1), dtype=np.uint8) for i in range(n)]
+
+
+def run_session(driver):
+    """The capture and wait calls of a grounding, a scroll retry and a full-page pass."""
+    seen = [np.asarray(driver.screenshot())]
+    driver.wait_for_frame_stable(1.0, reason="scroll_retry")
+    driver.click()
+    driver.wait_until_ready(1.5, reason="after_click")
+    seen.append(np.asarray(driver.screenshot()))
+    driver.wait_for_frame_stable(0.5, reason="scroll_into_view")
+    driver.click()
+    seen.append(driver.capture_full_page())
+    return seen
+
+
+def test_record_then_replay_serves_the_same_frames(tmp_path):
+    frames = make_frames()
+    cassette = Cassette(str(tmp_path / "cassette"), "record")
+    recorded = run_session(FakeExecutorDriver(frames, str(tmp_path), cassette=cassette))
+    key = request_key("gpt-4o", None, "which box?")
+    cassette.record("chat", key, "2")
+    cassette.close()
+
+    replay = Cassette(str(tmp_path / "cassette"), "replay")
+    replayed = run_session(ReplayExecutorDriver(replay, str(tmp_path)))
+
+    assert len(replayed) == len(recorded)
+    for expected, actual in zip(recorded, replayed):
+        assert np.array_equal(expected, actual)
+    assert replay.next("chat", key) == "2"
+    assert replay.remaining() == {}
+
+
+def test_keyed_lookup_does_not_fall_back_to_another_answer(tmp_path):
+    cassette = Cassette(str(tmp_path), "record")
+    cassette.record("whisper", "a", "click login")
+    cassette.close()
+    replay = Cassette(str(tmp_path), "replay")
+    with pytest.raises(CassetteMiss):
+        replay.next("whisper", "b")
+    assert replay.next("whisper", "a") == "click login"
+
+
+def test_frame_stability_polls_are_not_recorded():
+    driver_module = pytest.importorskip("selenium_web_interaction.selenium_executor_driver")
+
+    class Waiter:
+        def wait_for_frame_stable(self, capture, timeout, reason=""):
+            for _ in range(3):
+                capture()
+            return 0.0
+
+    class Stub:
+        waiter = Waiter()
+        polled = 0
+        recorded = 0
+
+        def _screenshot(self, draw_cursor, region):
+            self.polled += 1
+
+        def screenshot(self, draw_cursor=False, region=None):
+            self.recorded += 1
+
+    stub = Stub()
+    driver_module.SeleniumExecutorDriver.wait_for_frame_stable(stub, 1.0)
+    assert stub.polled == 3 and stub.recorded == 0
+
+
+def test_fake_driver_loads_only_recorded_frames(tmp_path):
+    from PIL import Image
+    from benchmarks.fake_driver import load_frames
+
+    cassette = Cassette(str(tmp_path / "run" / "cassette"), "record")
+    cassette.record_frame(np.full((6, 6, 3), 10, dtype=np.uint8))
+    cassette.record_frame(np.full((6, 6, 3), 20, dtype=np.uint8))
+    cassette.close()
+    Image.new("RGB", (6, 6), (255, 0, 0)).save(tmp_path / "run" / "YOLO_batch_0.png")
+
+    frames = load_frames(str(tmp_path))
+    assert [int(frame[0, 0, 0]) for frame in frames] == [10, 20]
@@ -0,0 +1,49 @@
+import pytest
+
+from agents.command_parser import parse_command
+
+
+def detect_click(target):
+    return [{"action": "detect", "target": target},
+            {"action": "click", "target": target}]
+
+
+def type_into(target, value):
+    return detect_click(target) + [{"action": "type", "target": target, "value": value}]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("click login", detect_click("login")),
+    ("Click on the login button", detect_click("login")),
+    ("press the login button", detect_click("login")),
+    ("Type standard_user in the username field", type_into("username", "standard_user")),
+    ('type "Sauce Labs" into the search box', type_into("search", "Sauce Labs")),
+    ("fill the password field with secret_sauce", type_into("password", "secret_sauce")),
+    ("type hello", [{"action": "type", "value": "hello"}]),
+    ("wait a second", [{"action": "wait"}]),
+    ("type standard_user in username and then click login",
+     type_into("username", "standard_user") + detect_click("login")),
+    # Lowercasing "İ" adds a character; the value must not shift
+    ("type İstanbul into the city field", type_into("city", "İstanbul")),
+    ("type İİ_user in username", type_into("username", "İİ_user")),
+    ('type "rock and roll" into the search box', type_into("search", "rock and roll")),
+    ('type "now then" into the search box and then click search',
+     type_into("search", "now then") + detect_click("search")),
+])
+def test_parses_simple_commands(text, expected):
+    assert parse_command(text) == expected
+
+
+@pytest.mark.parametrize("text", [
+    "Put the Sauce Labs Backpack in the cart",
+    "Type standard_user in the username field and secret_sauce in the password field",
+    "Type in the username",
+    "type the password",
+    "Press enter",
+    "hit the tab key",
+    "fill username with standard_user and password with secret_sauce",
+    "click it",
+    "",
+])
+def test_unsure_commands_go_to_the_llm(text):
+    assert parse_command(text) is None
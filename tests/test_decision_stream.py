@@ -0,0 +1,81 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+
+from agents.decision_maker_agent import DecisionMaker, DecisionStreamError
+
+PLAN = [{"action": "detect", "target": "cart"}, {"action": "click", "target": "cart"}]
+
+
+class StreamingClient:
+    def stream_message_with_images(self, **kwargs):
+        text = json.dumps(PLAN)
+        for i in range(0, len(text), 8):
+            time.sleep(0.005)
+            yield text[i:i + 8]
+
+
+class Driver:
+    def screenshot(self, **kwargs):
+        return None
+
+
+def test_stream_timing_excludes_execution_time():
+    decision_maker = DecisionMaker(Driver(), client=StreamingClient(), use_plan_cache=False)
+    actions = []
+    for action in decision_maker.decide_stream("open my shopping cart now"):
+        actions.append(action)
+        time.sleep(0.2)  # executing the action
+    assert actions == PLAN
+    timing = decision_maker.last_stream_timing
+    assert timing["actions"] == 2
+    assert timing["first_action_sec"] <= timing["total_sec"] < 0.2
+
+
+def test_stream_timing_is_reset_without_llm_call():
+    decision_maker = DecisionMaker(Driver(), client=StreamingClient(), use_plan_cache=False)
+    list(decision_maker.decide_stream("open my shopping cart now"))
+    assert decision_maker.last_stream_timing is not None
+    list(decision_maker.decide_stream("click login"))
+    assert decision_maker.last_stream_timing is None
+
+
+class ChunksClient:
+    def __init__(self, chunks, error=None):
+        self.chunks = chunks
+        self.error = error
+
+    def stream_message_with_images(self, **kwargs):
+        yield from self.chunks
+        if self.error is not None:
+            raise self.error
+
+
+def test_stream_failure_is_raised_after_parsed_actions():
+    client = ChunksClient([json.dumps(PLAN)[:-20]], error=ConnectionError("reset"))
+    decision_maker = DecisionMaker(Driver(), client=client, use_plan_cache=False)
+    actions = []
+    with pytest.raises(DecisionStreamError) as error:
+        for action in decision_maker.decide_stream("open my shopping cart now"):
+            actions.append(action)
+    assert actions == PLAN[:1]
+    assert isinstance(error.value.__cause__, ConnectionError)
+    assert decision_maker.last_stream_timing["actions"] == 1
+
+
+def test_cut_off_plan_is_raised():
+    client = ChunksClient([json.dumps(PLAN)[:-20]])
+    decision_maker = DecisionMaker(Driver(), client=client, use_plan_cache=False)
+    with pytest.raises(DecisionStreamError, match="mid-plan"):
+        list(decision_maker.decide_stream("open my shopping cart now"))
+
+
+def test_plan_without_action_is_raised():
+    client = ChunksClient(["Sorry, I cannot help with that."])
+    decision_maker = DecisionMaker(Driver(), client=client, use_plan_cache=False)
+    with pytest.raises(DecisionStreamError, match="no action"):
+        list(decision_maker.decide_stream("open my shopping cart now"))
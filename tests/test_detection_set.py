@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from models.detection_set import DetectionSet
+from utils.BoundingBox import BoundingBox
+
+
+def detections(*rows):
+    """Rows of (x1, y1, x2, y2, conf[, cls])."""
+    rows = [row if len(row) == 6 else (*row, 0) for row in rows]
+    array = np.asarray(rows, dtype=np.float32)
+    return DetectionSet(array[:, :4], array[:, 4], array[:, 5])
+
+
+def test_nms_keeps_most_confident_of_overlapping_boxes():
+    found = detections((0, 0, 100, 100, 0.6), (5, 5, 105, 105, 0.9),
+                       (300, 300, 350, 350, 0.5))
+    kept = found.nms(iou_threshold=0.5)
+    assert sorted(kept.conf.tolist()) == pytest.approx([0.5, 0.9])
+
+
+def test_nms_keeps_overlapping_boxes_of_other_classes():
+    found = detections((0, 0, 100, 100, 0.6, 0), (5, 5, 105, 105, 0.9, 1))
+    assert len(found.nms(iou_threshold=0.5)) == 2
+
+
+def test_nms_overlap_threshold_drops_tile_fragments():
+    # Fragment of the widget cut at a tile border: low IoU, fully covered
+    found = detections((0, 0, 200, 50, 0.9), (150, 0, 200, 50, 0.8))
+    assert len(found.nms(iou_threshold=0.5)) == 2
+    assert len(found.nms(iou_threshold=0.5, overlap_threshold=0.8)) == 1
+
+
+def test_nms_of_empty_set():
+    assert len(DetectionSet.empty().nms()) == 0
+
+
+def test_overlap_fraction_is_relative_to_smaller_box():
+    found = detections((0, 0, 100, 100, 0.9))
+    fraction = found.overlap_fraction([[50, 50, 70, 70], [90, 0, 110, 10],
+                                       [200, 200, 210, 210]])
+    assert fraction.shape == (1, 3)
+    assert fraction[0].tolist() == pytest.approx([1.0, 0.5, 0.0])
+
+
+def test_ranked_orders_by_confidence_stably():
+    found = detections((0, 0, 1, 1, 0.5), (0, 0, 1, 1, 0.9), (0, 0, 1, 1, 0.5))
+    assert found.ranked().tolist() == [1, 0, 2]
+
+
+def test_xyxy_bounding_box_round_trip():
+    found = detections((10, 20, 110, 70, 0.9), (0, 0, 5, 5, 0.4))
+    for index, (x1, y1, x2, y2) in enumerate(found.xyxy.tolist()):
+        box = found.box(index)
+        assert isinstance(box, BoundingBox)
+        assert box.to_xyxy() == (x1, y1, x2, y2)
+        assert BoundingBox.from_xyxy(*box.to_xyxy()).to_tuple() == box.to_tuple()
+    assert found.xywh.tolist() == [[10, 20, 100, 50], [0, 0, 5, 5]]
@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("selenium")
+
+from agents.executor_agent import ExecutorAgent
+from benchmarks.fake_driver import FakeExecutorDriver
+from utils.artifact_writer import ArtifactWriter
+
+
+def agent(tmp_path, **kwargs):
+    driver = FakeExecutorDriver([np.zeros((4, 4, 3), dtype=np.uint8)],
+                                test_run_folder=str(tmp_path))
+    return ExecutorAgent(driver, use_dom_grounding=False, client=object(),
+                         detector=object(), **kwargs)
+
+
+def test_shutdown_closes_an_owned_artifact_writer(tmp_path):
+    with agent(tmp_path) as executor:
+        writer = executor.artifacts
+        assert writer._thread is not None
+    assert writer._thread is None
+
+
+def test_shutdown_leaves_an_injected_writer_open(tmp_path):
+    writer = ArtifactWriter(str(tmp_path))
+    agent(tmp_path, artifact_writer=writer).shutdown()
+    assert writer._thread is not None
+    writer.close()
+
+
+class CountingDetector:
+    detection_cache = None
+
+    def __init__(self):
+        self.frames = []
+
+    def predict(self, image):
+        from models.detection_set import DetectionSet
+        self.frames.append(image)
+        return DetectionSet([[0, 0, 2, 2]], [0.9])
+
+
+def test_single_target_batch_grounding_captures_once(tmp_path, monkeypatch):
+    detector = CountingDetector()
+    driver = FakeExecutorDriver([np.zeros((4, 4, 3), dtype=np.uint8)],
+                                test_run_folder=str(tmp_path))
+    captures = []
+    original = driver.screenshot
+    monkeypatch.setattr(driver, "screenshot",
+                        lambda *a, **k: captures.append(1) or original(*a, **k))
+    executor = ExecutorAgent(driver, use_dom_grounding=False, client=object(),
+                             detector=detector, batch_grounding=True,
+                             artifact_writer=ArtifactWriter(str(tmp_path), policy="none"))
+    monkeypatch.setattr(executor, "_grounding_image", lambda boxes, targets=None: None)
+    monkeypatch.setattr(executor, "_ask_for_box_id",
+                        lambda prompt, image, boxes: boxes.box(0))
+    executor.planned_actions = [{"action": "detect", "target": "login_button"}]
+    executor.action_index = 0
+    executor.target = "login_button"
+
+    assert executor.detect_ui_using_batch() == (False, None)
+    assert captures == []
+    executor.detect_ui_using_YOLO()
+    assert len(captures) == 1 and len(detector.frames) == 1
+    assert executor.grounding_stats["yolo"] == 1
+
+
+def test_failed_plan_stream_is_reported_as_an_error(tmp_path):
+    from agents.decision_maker_agent import DecisionStreamError
+
+    def plan():
+        yield {"action": "wait", "value": 0}
+        raise DecisionStreamError("Plan stream ended mid-plan after 1 actions")
+
+    with agent(tmp_path) as executor:
+        assert executor.execute(plan()) == "Error while executing actions"
+        assert executor.executed_actions == [{"action": "wait", "value": 0}]
+
+
+class FlakyDomGrounding:
+    def __init__(self):
+        self.calls = 0
+
+    def ground(self, target):
+        from types import SimpleNamespace
+        from utils.BoundingBox import BoundingBox
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("stale element")
+        return SimpleNamespace(bounding_box=BoundingBox(1, 2, 3, 4),
+                               element={"tag": "button"}, score=0.9)
+
+
+def test_failed_dom_grounding_is_recorded_for_replay(tmp_path):
+    from utils.cassette import Cassette
+    cassette = Cassette(str(tmp_path / "cassette"), "record")
+    with agent(tmp_path, cassette=cassette) as executor:
+        executor.dom_grounding = FlakyDomGrounding()
+        executor.target = "login_button"
+        assert executor.detect_ui_using_DOM() is False
+        assert executor.detect_ui_using_DOM() is True
+    cassette.close()
+
+    replay = Cassette(str(tmp_path / "cassette"), "replay")
+    with agent(tmp_path, cassette=replay) as executor:
+        executor.target = "login_button"
+        assert executor.detect_ui_using_DOM() is False
+        assert executor.detect_ui_using_DOM() is True
+        assert list(executor.last_bounding_box) == [1, 2, 3, 4]
@@ -0,0 +1,64 @@
+import numpy as np
+
+from agents.grounding_map import GroundingMap
+from utils.BoundingBox import BoundingBox
+
+# 160x120 frame on the default 16x12 grid: 10x10 pixel tiles
+HEIGHT, WIDTH = 120, 160
+USERNAME = BoundingBox(10, 10, 30, 10)
+PASSWORD = BoundingBox(10, 90, 30, 10)
+
+
+def blank():
+    return np.full((HEIGHT, WIDTH, 3), 255, dtype=np.uint8)
+
+
+def grounded_map():
+    grounding = GroundingMap()
+    grounding.reset(blank(), {"username": USERNAME, "password": PASSWORD,
+                              "logo": None})
+    return grounding
+
+
+def test_unchanged_screen_hits():
+    grounding = grounded_map()
+    assert grounding.lookup("username", blank()) is USERNAME
+    assert grounding.stats() == {"batches": 1, "hits": 1, "misses": 0}
+
+
+def test_missing_or_invisible_target_misses():
+    grounding = grounded_map()
+    assert grounding.lookup("logo", blank()) is None
+    assert grounding.lookup("submit", blank()) is None
+    assert grounding.misses == 2
+
+
+def test_local_change_only_drops_the_boxes_it_touches():
+    grounding = grounded_map()
+    typed = blank()
+    typed[12:18, 12:30] = 0  # text typed into the username field
+    assert grounding.lookup("username", typed) is None
+    assert "username" not in grounding
+    assert grounding.lookup("password", typed) is PASSWORD
+
+
+def test_changes_up_to_threshold_keep_the_map():
+    grounding = grounded_map()
+    frame = blank()
+    frame[:40, 60:] = 0  # 4 of 12 rows over 10 of 16 columns: 21% of the tiles
+    assert grounding.lookup("password", frame) is PASSWORD
+
+
+def test_more_than_40_percent_changed_drops_the_whole_map():
+    grounding = grounded_map()
+    frame = blank()
+    frame[:HEIGHT // 2 + 10] = 0  # 7 of 12 rows: 58% of the tiles
+    assert grounding.lookup("password", frame) is None
+    assert "password" not in grounding and "username" not in grounding
+    assert grounding.lookup("password", blank()) is None
+
+
+def test_resized_frame_drops_the_map():
+    grounding = grounded_map()
+    assert grounding.lookup("username", np.full((100, 160, 3), 255, np.uint8)) is None
+    assert "password" not in grounding
@@ -0,0 +1,53 @@
+import pytest
+
+from selenium_web_interaction.input_backends import FastInputBackend
+
+GEOMETRY = {"screenX": 0, "screenY": 0, "outerWidth": 800, "outerHeight": 700,
+            "innerWidth": 800, "innerHeight": 600, "scrollX": 0, "scrollY": 0,
+            "devicePixelRatio": 1}
+
+
+class StubBrowser:
+    def __init__(self):
+        self.cdp = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+
+
+def backend():
+    browser = StubBrowser()
+    return FastInputBackend(browser, lambda: GEOMETRY, move_os_cursor=False), browser
+
+
+def test_press_end_dispatches_key_down_and_up():
+    fast, browser = backend()
+    fast.press_key("end")
+    assert [(cmd, params["type"], params["key"], params["windowsVirtualKeyCode"])
+            for cmd, params in browser.cdp] == [
+        ("Input.dispatchKeyEvent", "rawKeyDown", "End", 35),
+        ("Input.dispatchKeyEvent", "keyUp", "End", 35)]
+
+
+def test_enter_carries_its_text():
+    fast, browser = backend()
+    fast.press_key("Enter")
+    assert browser.cdp[0][1]["type"] == "keyDown"
+    assert browser.cdp[0][1]["text"] == "\r"
+
+
+def test_unknown_key_is_rejected():
+    fast, _ = backend()
+    with pytest.raises(ValueError):
+        fast.press_key("f13")
+
+
+def test_line_breaks_in_typed_text_press_enter():
+    fast, browser = backend()
+    fast.type_text("admin\nsecret")
+    assert [(cmd, params.get("text") or params.get("key"))
+            for cmd, params in browser.cdp
+            if cmd == "Input.insertText" or params.get("type") != "keyUp"] == [
+        ("Input.insertText", "admin"),
+        ("Input.dispatchKeyEvent", "\r"),
+        ("Input.insertText", "secret")]
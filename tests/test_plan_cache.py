@@ -0,0 +1,70 @@
+import pytest
+
+import agents.plan_cache as plan_cache
+from agents.plan_cache import PlanCache, normalize_command
+
+PLAN = [{"action_type": "click", "target": "login"}]
+
+
+@pytest.fixture(autouse=True)
+def hash_is_screen(monkeypatch):
+    """Screens are given directly as their hash, so distances are exact."""
+    monkeypatch.setattr(plan_cache, "perceptual_hash", lambda screen: screen)
+
+
+def flip(screen_hash: int, bits: int) -> int:
+    return screen_hash ^ ((1 << bits) - 1)
+
+
+def test_hit_within_distance_threshold():
+    cache = PlanCache(path=None, max_distance=10)
+    cache.put("Click the login button.", 0xABCDEF, PLAN)
+    assert cache.get("click the login button", flip(0xABCDEF, 10)) == PLAN
+    assert cache.get("click the login button", flip(0xABCDEF, 11)) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_other_command_misses():
+    cache = PlanCache(path=None)
+    cache.put("click login", 0, PLAN)
+    assert cache.get("click logout", 0) is None
+
+
+def test_closest_screen_wins():
+    cache = PlanCache(path=None, max_distance=10)
+    cache.put("open menu", flip(0, 6), [{"action_type": "far"}])
+    cache.put("open menu", flip(0, 2), [{"action_type": "near"}])
+    assert cache.get("open menu", 0) == [{"action_type": "near"}]
+
+
+def test_expired_entries_miss():
+    cache = PlanCache(path=None, ttl_sec=-1)
+    cache.put("click login", 0, PLAN)
+    assert cache.get("click login", 0) is None
+
+
+def test_lru_eviction():
+    cache = PlanCache(path=None, max_entries=2)
+    cache.put("one", 1, PLAN)
+    cache.put("two", 2, PLAN)
+    cache.get("one", 1)
+    cache.put("three", 3, PLAN)
+    assert cache.get("two", 2) is None
+    assert cache.get("one", 1) == PLAN
+
+
+def test_persistence_round_trip(tmp_path):
+    path = str(tmp_path / "plans.json")
+    PlanCache(path=path).put("Click login!", 0x1234, PLAN)
+    reloaded = PlanCache(path=path)
+    assert reloaded.get("click login", 0x1234) == PLAN
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    path = tmp_path / "plans.json"
+    path.write_text("{not json")
+    assert PlanCache(path=str(path)).stats()["entries"] == 0
+
+
+def test_normalize_command():
+    assert normalize_command("  Click,  the LOGIN button! ") == "click the login button"
@@ -0,0 +1,54 @@
+import itertools
+
+from selenium_web_interaction.readiness import ReadinessWaiter
+
+
+class StubPage:
+    """WebDriver stand-in returning scripted readiness probes."""
+
+    def __init__(self, states):
+        self.states = iter(states)
+        self.last = None
+
+    def execute_cdp_cmd(self, cmd, params):
+        pass
+
+    def execute_script(self, script):
+        self.last = next(self.states, self.last)
+        return dict(self.last)
+
+
+def quiet(**changes):
+    state = {"readyState": "complete", "timeOrigin": 1.0, "pending": 0,
+             "mutations": 10, "events": 3, "sinceMutationMs": 5000,
+             "sinceNetworkMs": 5000}
+    state.update(changes)
+    return state
+
+
+def test_quiet_page_is_not_ready_before_settle_window():
+    waiter = ReadinessWaiter(StubPage(itertools.repeat(quiet())),
+                             poll_interval=0.01, settle_ms=150)
+    waited = waiter.wait_until_ready(2.0)
+    assert 0.15 <= waited < 1.0
+    assert not waiter.wait_log[-1]["timed_out"]
+
+
+def test_activity_after_wait_start_ends_wait_once_quiet():
+    states = [quiet(), quiet(mutations=12, sinceMutationMs=0),
+              quiet(mutations=12)]
+    waiter = ReadinessWaiter(StubPage(states), poll_interval=0.01, settle_ms=10_000)
+    assert waiter.wait_until_ready(2.0) < 0.5
+
+
+def test_navigation_counts_as_activity():
+    states = [quiet(), quiet(readyState="loading", timeOrigin=2.0),
+              quiet(timeOrigin=2.0, mutations=0)]
+    waiter = ReadinessWaiter(StubPage(states), poll_interval=0.01, settle_ms=10_000)
+    assert waiter.wait_until_ready(2.0) < 0.5
+
+
+def test_no_baseline_only_checks_quietness():
+    waiter = ReadinessWaiter(StubPage([]))
+    assert waiter.is_ready(quiet())
+    assert not waiter.is_ready(quiet(pending=1))
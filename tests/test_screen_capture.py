@@ -0,0 +1,45 @@
+import base64
+import io
+
+import numpy as np
+from PIL import Image
+
+from selenium_web_interaction.screen_capture import ViewportCapture
+
+
+class StubBrowser:
+    """WebDriver stand-in whose screenshot colour changes on every capture."""
+
+    def __init__(self):
+        self.screenshots = 0
+
+    def execute_script(self, script):
+        return "https://example.test|0|0|0|0|800|600|1"
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.screenshots += 1
+        image = Image.new("RGB", (4, 3), (self.screenshots, 0, 0))
+        data = io.BytesIO()
+        image.save(data, format="PNG")
+        return {"data": base64.b64encode(data.getvalue()).decode()}
+
+
+def test_unchanged_page_is_not_recaptured():
+    browser = StubBrowser()
+    capture = ViewportCapture(browser)
+    first = capture.capture()
+    assert capture.capture() is first
+    assert browser.screenshots == 1
+    assert capture.metrics.skipped == 1
+
+
+def test_pointer_move_invalidates_skip():
+    browser = StubBrowser()
+    capture = ViewportCapture(browser)
+    first = capture.capture()
+    capture.pointer_moved()
+    second = capture.capture()
+    assert browser.screenshots == 2
+    # Earlier frames are not overwritten by later captures
+    assert first[0, 0, 0] == 1 and second[0, 0, 0] == 2
+    assert second.shape == (3, 4, 3) and second.dtype == np.uint8
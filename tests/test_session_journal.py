@@ -0,0 +1,51 @@
+import json
+import os
+
+from utils.session_journal import SessionJournal, aggregate, iter_records, journal_files
+
+
+def test_records_are_on_disk_before_close(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False)
+    journal.write("command", transcript="click login", timings={"decision": 0.5})
+    # Read while the writer is still open, as after a crash
+    with open(journal.path, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert record["type"] == "command" and record["transcript"] == "click login"
+    journal.close()
+
+
+def test_truncated_last_line_is_skipped(tmp_path):
+    journal = SessionJournal(str(tmp_path), fsync=False)
+    journal.write("command", timings={"decision": 0.5})
+    journal.write("command", timings={"decision": 1.5})
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "command", "timings": {"deci')
+
+    records = list(iter_records([str(tmp_path)], "command"))
+    assert [r["timings"]["decision"] for r in records] == [0.5, 1.5]
+    assert aggregate([str(tmp_path)])["decision"]["count"] == 2
+
+
+def test_rotation_keeps_every_record_in_order(tmp_path):
+    journal = SessionJournal(str(tmp_path), max_bytes=300, fsync=False)
+    for index in range(20):
+        journal.write("command", index=index, timings={"total": 0.1})
+    journal.close()
+
+    paths = journal_files(str(tmp_path))
+    assert journal.rotations > 0
+    assert len(paths) == journal.rotations + 1
+    assert all(os.path.getsize(path) <= 300 for path in paths)
+    assert [r["index"] for r in iter_records([str(tmp_path)])] == list(range(20))
+
+
+def test_aggregate_counts_failures(tmp_path):
+    journal = SessionJournal(str(tmp_path / "run-1"), fsync=False)
+    journal.write("command", timings={"total": 1.0})
+    journal.write("command", timings={"total": 2.0}, error="boom")
+    journal.write("startup", timings={"total": 9.0})
+    journal.close()
+    summary = aggregate([str(tmp_path)])
+    assert summary["failed_commands"] == 1
+    assert summary["total"]["count"] == 2
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from utils.streaming_recorder import RingBuffer, StreamingRecorder
+
+RATE = 8000
+
+
+def blocks(signal, recorder):
+    for start in range(0, signal.shape[0], recorder.block_size):
+        recorder.process_block(signal[start:start + recorder.block_size])
+
+
+def test_ring_read_wraps_around():
+    ring = RingBuffer(8)
+    ring.write(np.arange(6, dtype=np.float32))
+    ring.write(np.arange(6, 11, dtype=np.float32))
+    assert ring.read(4, 11).tolist() == [4, 5, 6, 7, 8, 9, 10]
+    assert ring.read(0, 11).tolist() == list(range(3, 11))
+    assert ring.read(7, 7).shape == (0,)
+
+
+def test_loud_background_is_calibrated_away():
+    rng = np.random.default_rng(0)
+    # Background around -30 dB, far above floor_db + margin_db
+    noise = (0.03 * rng.standard_normal(RATE * 3)).astype(np.float32)
+    speech = noise.copy()
+    speech[RATE:RATE * 2] += 0.5 * np.sin(np.arange(RATE) * 0.3).astype(np.float32)
+    recorder = StreamingRecorder(sample_rate=RATE)
+    blocks(speech, recorder)
+    recorder.stop()
+    assert recorder.noise_floor_db > -40
+    utterance = recorder._segments.get_nowait()
+    assert 0.9 < utterance.shape[0] / RATE < 2.0
+    assert recorder._segments.empty()
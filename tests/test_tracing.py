@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+
+from utils.tracing import Tracer
+
+
+def test_spans_nest_and_record_errors():
+    tracer = Tracer()
+    try:
+        with tracer.span("outer") as outer:
+            with tracer.span("inner"):
+                raise ValueError("boom")
+    except ValueError:
+        pass
+    inner, recorded_outer = tracer.spans
+    assert inner.parent_id == outer.span_id
+    assert recorded_outer.attributes["error"] == "ValueError: boom"
+
+
+def test_failing_profiler_leaves_the_stack_clean(tmp_path):
+    @contextmanager
+    def broken(path):
+        raise ImportError("no profiler")
+        yield
+
+    tracer = Tracer()
+    tracer.start_run(str(tmp_path))
+    tracer.profile("stage", broken)
+    with tracer.span("stage"):
+        pass
+    with tracer.span("next") as following:
+        pass
+    assert [s.name for s in tracer.spans] == ["stage", "next"]
+    assert following.parent_id is None
@@ -0,0 +1,50 @@
+import json
+import os
+
+from openai_integration.transcription_cache import TranscriptionCache
+
+AUDIO = b"RIFF....WAVEfmt "
+
+
+def test_round_trip_and_persistence(tmp_path):
+    key = TranscriptionCache.make_key(AUDIO, "whisper-1", "en")
+    TranscriptionCache(str(tmp_path)).put(key, "click login")
+    reloaded = TranscriptionCache(str(tmp_path))
+    assert reloaded.get(key) == "click login"
+    assert reloaded.stats()["hits"] == 1
+
+
+def test_empty_transcripts_are_not_stored(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    key = TranscriptionCache.make_key(AUDIO, "whisper-1", "en")
+    cache.put(key, "")
+    cache.put(key, "   ")
+    assert cache.get(key) is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_empty_entries_left_on_disk_are_misses(tmp_path):
+    key = TranscriptionCache.make_key(AUDIO, "whisper-1", "en")
+    with open(tmp_path / f"{key}.json", "w", encoding="utf-8") as f:
+        json.dump({"text": ""}, f)
+    cache = TranscriptionCache(str(tmp_path))
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_key_covers_settings_and_preprocessing():
+    keys = {TranscriptionCache.make_key(AUDIO, "whisper-1", "en"),
+            TranscriptionCache.make_key(AUDIO, "whisper-1", "fr"),
+            TranscriptionCache.make_key(AUDIO, "whisper-1", "en", "raw"),
+            TranscriptionCache.make_key(AUDIO, "whisper-1", "en", "16000Hz|trim|wav"),
+            TranscriptionCache.make_key(AUDIO, "whisper-1", "en", "16000Hz|trim|flac")}
+    assert len(keys) == 5
+
+
+def test_eviction_keeps_size_bound(tmp_path):
+    cache = TranscriptionCache(str(tmp_path), max_bytes=60)
+    for index in range(5):
+        cache.put(f"key{index}", f"transcript number {index}")
+    assert cache.stats()["bytes"] <= 60
+    assert cache.get("key4") == "transcript number 4"
+    assert cache.get("key0") is None
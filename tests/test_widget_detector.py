@@ -0,0 +1,149 @@
+import numpy as np
+import pytest
+
+from models.widget_detector import WidgetDetector
+
+
+class Array:
+    """Stand-in for a torch tensor."""
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values.copy()
+
+
+class Boxes:
+    def __init__(self, xyxy):
+        self.xyxy = Array(xyxy)
+        self.conf = Array([0.9] * len(xyxy))
+        self.cls = Array([0] * len(xyxy))
+
+    def __len__(self):
+        return len(self.xyxy.values)
+
+
+class Result:
+    def __init__(self, xyxy):
+        self.boxes = Boxes(xyxy)
+
+
+class StubModel:
+    """Finds one 10x10 widget at the top-left corner of every tile."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, **kwargs):
+        self.calls.append(len(source))
+        return [Result([[0, 0, 10, 10]]) for _ in source]
+
+
+def test_full_page_tiles_are_batched_on_the_shared_model(monkeypatch):
+    model = StubModel()
+    monkeypatch.setattr(WidgetDetector, "_load_model", lambda self: model)
+    detector = WidgetDetector(imgsz=64, warmup=False, use_detection_cache=False)
+    page = np.zeros((400, 128, 3), dtype=np.uint8)
+
+    detections = detector.predict_full_page(page, overlap=0.5, batch_size=4)
+
+    # 128x128 tiles every 64 px, the last aligned to the bottom: 6 tiles
+    assert model.calls == [4, 2]
+    assert sorted(detections.xyxy[:, 1].tolist()) == [0, 64, 128, 192, 256, 272]
+
+
+class BlobModel:
+    """Finds every dark rectangle of the source, like a perfect detector."""
+
+    def __init__(self):
+        self.sources = []
+        self.found = []
+
+    def predict(self, source, **kwargs):
+        from scipy import ndimage
+        self.sources.append(source.shape[:2])
+        labels, _ = ndimage.label(source.min(axis=2) < 128)
+        found = [[s[1].start, s[0].start, s[1].stop, s[0].stop]
+                 for s in ndimage.find_objects(labels)]
+        self.found.append(len(found))
+        return [Result(found)]
+
+
+def screen(*rects):
+    """White 320x240 frame (20 px fingerprint tiles) with black rectangles."""
+    frame = np.full((240, 320, 3), 255, dtype=np.uint8)
+    for x1, y1, x2, y2 in rects:
+        frame[y1:y2, x1:x2] = 0
+    return frame
+
+
+def boxes(detections):
+    return sorted(map(tuple, detections.xyxy.astype(int).tolist()))
+
+
+FIELD = (20, 20, 60, 40)
+BUTTON = (200, 160, 260, 200)
+
+
+def cached_detector(monkeypatch):
+    pytest.importorskip("scipy")
+    model = BlobModel()
+    monkeypatch.setattr(WidgetDetector, "_load_model", lambda self: model)
+    return WidgetDetector(warmup=False), model
+
+
+def test_identical_frame_is_a_full_hit(monkeypatch):
+    detector, model = cached_detector(monkeypatch)
+    first = detector.predict(screen(FIELD, BUTTON))
+    again = detector.predict(screen(FIELD, BUTTON))
+    assert boxes(again) == boxes(first) == [FIELD, BUTTON]
+    assert len(model.sources) == 1
+    assert detector.detection_cache.stats()["hits"] == 1
+
+
+def test_partial_change_redetects_only_the_changed_region(monkeypatch):
+    detector, model = cached_detector(monkeypatch)
+    detector.predict(screen(FIELD, BUTTON))
+    moved = (200, 180, 260, 220)
+    result = detector.predict(screen(FIELD, moved))
+
+    assert boxes(result) == [FIELD, moved]
+    assert detector.detection_cache.stats()["partial_hits"] == 1
+    # Second pass ran on a crop around the button, not on the whole frame
+    height, width = model.sources[1]
+    assert height * width < 0.4 * 240 * 320
+    # The field outside the region was kept from the cache, not re-detected
+    assert model.found == [2, 1]
+
+
+def test_whole_screen_change_is_a_miss(monkeypatch):
+    detector, model = cached_detector(monkeypatch)
+    detector.predict(screen(FIELD, BUTTON))
+    dialog = (10, 10, 310, 230)
+    result = detector.predict(screen(dialog))
+    assert boxes(result) == [dialog]
+    assert model.sources == [(240, 320), (240, 320)]
+    assert detector.detection_cache.stats()["misses"] == 2
+
+
+def test_new_frame_evicts_the_cached_one(monkeypatch):
+    detector, model = cached_detector(monkeypatch)
+    detector.predict(screen(FIELD))
+    detector.predict(screen((10, 10, 310, 230)))
+    # Single-entry cache: the first frame is gone and must be detected again
+    assert boxes(detector.predict(screen(FIELD))) == [FIELD]
+    assert len(model.sources) == 3
+    assert detector.detection_cache.stats()["hits"] == 0
+
+
+def test_invalidate_and_parameter_change_force_a_miss(monkeypatch):
+    detector, model = cached_detector(monkeypatch)
+    detector.predict(screen(FIELD))
+    detector.predict(screen(FIELD), confidence_threshold=0.25)
+    detector.detection_cache.invalidate()
+    detector.predict(screen(FIELD), confidence_threshold=0.25)
+    assert len(model.sources) == 3
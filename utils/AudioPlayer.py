@@ -1,11 +1,11 @@
-import pygame
-
 def play_audio(file_path: str):
     """
     Play a .wav or .mp3 file using pygame.
     This blocks until the sound finishes.
     """
     try:
+        # Imported on first use so runs without playback never load pygame
+        import pygame
         pygame.mixer.init()
         pygame.mixer.music.load(file_path)
         pygame.mixer.music.play()
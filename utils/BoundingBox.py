@@ -7,6 +7,7 @@ class BoundingBox:
     x_min, y_min = top-left corner
     width, height = dimensions
     """
+    __slots__ = ("x_min", "y_min", "width", "height")
 
     def __init__(self, x_min: int, y_min: int, width: int, height: int):
         self.x_min = x_min
@@ -14,6 +15,10 @@ class BoundingBox:
         self.width = width
         self.height = height
 
+    @classmethod
+    def from_xyxy(cls, x1, y1, x2, y2) -> "BoundingBox":
+        return cls(x1, y1, x2 - x1, y2 - y1)
+
     def __repr__(self):
         return f"BoundingBox(x={self.x_min}, y={self.y_min}, w={self.width}, h={self.height})"
 
@@ -31,3 +36,6 @@ class BoundingBox:
 
     def to_tuple(self) -> Tuple[int, int, int, int]:
         return self.x_min, self.y_min, self.width, self.height
+
+    def to_xyxy(self) -> Tuple[int, int, int, int]:
+        return self.x_min, self.y_min, self.x_min + self.width, self.y_min + self.height
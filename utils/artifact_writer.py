@@ -0,0 +1,155 @@
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("all", "on-failure", "none")
+IMAGE_FORMATS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp"}
+
+
+class ArtifactWriter:
+    """
+    Writes run artifacts (grounding screenshots) from a background thread,
+    so image encoding and disk I/O stay out of the timed actions.
+
+    save() only enqueues the image; a single worker thread encodes and
+    writes it. The queue is bounded: when the worker falls behind, save()
+    blocks for up to `put_timeout_sec` (back-pressure) and then drops the
+    artifact rather than stalling the run. close() flushes everything queued.
+    """
+
+    def __init__(self, output_dir: str, policy: str = "all",
+                 image_format: str = "PNG", compress_level: int = 1,
+                 quality: int = 85, max_queue: int = 16,
+                 put_timeout_sec: float = 2.0):
+        """
+        Args:
+            output_dir: Folder the artifacts are written to
+            policy: "all" writes every artifact, "on-failure" only those of
+                failed steps, "none" disables artifacts
+            image_format: "PNG", "JPEG" or "WEBP"
+            compress_level: PNG zlib level, 0 (fastest) to 9 (smallest)
+            quality: JPEG/WEBP quality
+            max_queue: Artifacts waiting to be written before save() blocks
+            put_timeout_sec: Longest save() blocks on a full queue before the
+                artifact is dropped
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown artifact policy: {policy}")
+        image_format = image_format.upper()
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unsupported artifact format: {image_format}")
+        self.output_dir = output_dir
+        self.policy = policy
+        self.image_format = image_format
+        self.compress_level = compress_level
+        self.quality = quality
+        self.put_timeout_sec = put_timeout_sec
+        self.counts = {"written": 0, "skipped": 0, "dropped": 0, "errors": 0}
+        self.bytes_written = 0
+        self.write_sec = 0.0
+        self.blocked_sec = 0.0
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._thread = None
+        if policy != "none":
+            self._thread = threading.Thread(target=self._drain, name="artifact-writer",
+                                            daemon=True)
+            self._thread.start()
+
+    def save(self, image, filename: str, failed: bool = False) -> bool:
+        """
+        Queue an image (PIL or RGB array) for writing under `filename`,
+        prefixed with the current time like the driver's screenshots.
+
+        Args:
+            failed: Whether the step the image belongs to failed, for the
+                "on-failure" policy
+
+        Returns:
+            True when the artifact was queued
+        """
+        if self._thread is None or (self.policy == "on-failure" and not failed):
+            self._count("skipped")
+            return False
+        if isinstance(image, np.ndarray):
+            # The caller may keep mutating its array after save() returns
+            image = image.copy()
+        now = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        stem = os.path.splitext(filename)[0]
+        path = os.path.join(self.output_dir,
+                            f"{now}_{stem}{IMAGE_FORMATS[self.image_format]}")
+        start = time.perf_counter()
+        try:
+            self._queue.put((image, path), timeout=self.put_timeout_sec)
+            return True
+        except queue.Full:
+            logger.warning(f"Artifact queue full, dropping {filename}")
+            self._count("dropped")
+            return False
+        finally:
+            with self._lock:
+                self.blocked_sec += time.perf_counter() - start
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, image, path: str):
+        start = time.perf_counter()
+        try:
+            if isinstance(image, np.ndarray):
+                image = Image.fromarray(image)
+            if self.image_format != "PNG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            if self.image_format == "PNG":
+                image.save(path, format="PNG", compress_level=self.compress_level)
+            else:
+                image.save(path, format=self.image_format, quality=self.quality)
+            size = os.path.getsize(path)
+        except Exception as e:
+            logger.warning(f"Could not write artifact {path}: {e}")
+            self._count("errors")
+            return
+        with self._lock:
+            self.counts["written"] += 1
+            self.bytes_written += size
+            self.write_sec += time.perf_counter() - start
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
+
+    def flush(self):
+        """Block until every queued artifact is written."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def close(self):
+        """Flush the queue and stop the worker thread."""
+        if self._thread is None:
+            return
+        self.flush()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counts, policy=self.policy,
+                        bytes_written=self.bytes_written,
+                        write_sec=round(self.write_sec, 3),
+                        blocked_sec=round(self.blocked_sec, 3))
@@ -0,0 +1,179 @@
+import io
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from scipy.io import wavfile
+
+logger = logging.getLogger(__name__)
+
+try:
+    import soundfile
+except ImportError:  # optional, only needed for compressed output formats
+    soundfile = None
+
+TARGET_SAMPLE_RATE = 16000
+
+# soundfile format name -> (file extension, mime type)
+COMPRESSED_FORMATS = {
+    "FLAC": ("flac", "audio/flac"),
+    "OGG": ("ogg", "audio/ogg"),
+}
+
+
+@dataclass
+class PreprocessedAudio:
+    """
+    Result of the preprocessing stage, ready to be uploaded to Whisper.
+    """
+    data: bytes
+    filename: str
+    mime_type: str
+    original_bytes: int
+    original_duration_sec: float
+    duration_sec: float
+
+    @property
+    def processed_bytes(self) -> int:
+        return len(self.data)
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.processed_bytes
+
+
+def to_mono_float(audio: np.ndarray) -> np.ndarray:
+    """
+    Convert WAV samples of any integer/float dtype and channel count to a
+    mono float32 signal in [-1, 1].
+    """
+    if np.issubdtype(audio.dtype, np.integer):
+        info = np.iinfo(audio.dtype)
+        # unsigned 8-bit WAV is offset around 128
+        offset = (info.max + info.min + 1) / 2
+        audio = (audio.astype(np.float32) - offset) / (info.max - offset + 1)
+    else:
+        audio = audio.astype(np.float32, copy=False)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1, dtype=np.float32)
+    return audio
+
+
+def resample(audio: np.ndarray, source_rate: int,
+             target_rate: int = TARGET_SAMPLE_RATE, taps: int = 63) -> np.ndarray:
+    """
+    Resample a mono signal with a windowed-sinc anti-aliasing filter followed
+    by linear interpolation onto the target time grid.
+    """
+    if source_rate == target_rate or audio.size == 0:
+        return audio
+    if target_rate < source_rate:
+        cutoff = 0.45 * target_rate / source_rate
+        n = np.arange(taps) - (taps - 1) / 2
+        kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(taps)
+        kernel /= kernel.sum()
+        audio = np.convolve(audio, kernel.astype(np.float32), mode="same")
+    target_length = int(round(audio.size * target_rate / source_rate))
+    source_positions = np.arange(target_length) * (source_rate / target_rate)
+    return np.interp(source_positions, np.arange(audio.size),
+                     audio).astype(np.float32)
+
+
+def frame_energy_db(audio: np.ndarray, frame_length: int) -> np.ndarray:
+    """Return the RMS energy in dBFS of consecutive, non-overlapping frames."""
+    n_frames = int(np.ceil(audio.size / frame_length))
+    padded = np.zeros(n_frames * frame_length, dtype=np.float32)
+    padded[:audio.size] = audio
+    frames = padded.reshape(n_frames, frame_length)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def trim_silence(audio: np.ndarray, sample_rate: int,
+                 frame_ms: float = 20.0, relative_db: float = 35.0,
+                 floor_db: float = -50.0, padding_ms: float = 200.0) -> np.ndarray:
+    """
+    Trim leading and trailing silence using an energy-based detector.
+
+    A frame counts as speech when its energy is above `floor_db` and within
+    `relative_db` of the loudest frame. `padding_ms` of audio is kept around
+    the detected speech. Audio without any speech frame is returned as-is.
+    """
+    frame_length = max(1, int(sample_rate * frame_ms / 1000))
+    energy = frame_energy_db(audio, frame_length)
+    if energy.size == 0:
+        return audio
+    threshold = max(floor_db, energy.max() - relative_db)
+    voiced = np.flatnonzero(energy > threshold)
+    if voiced.size == 0:
+        return audio
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, voiced[0] * frame_length - padding)
+    end = min(audio.size, (voiced[-1] + 1) * frame_length + padding)
+    return audio[start:end]
+
+
+def encode_audio(audio: np.ndarray, sample_rate: int,
+                 compress_format: Optional[str] = None) -> tuple[bytes, str, str]:
+    """
+    Encode a mono float signal as 16-bit PCM WAV, or in a compressed format
+    (FLAC/OGG) when requested and `soundfile` is available.
+
+    Returns:
+        Tuple of (encoded bytes, file extension, mime type)
+    """
+    buffer = io.BytesIO()
+    if compress_format:
+        compress_format = compress_format.upper()
+        if compress_format not in COMPRESSED_FORMATS:
+            raise ValueError(f"Unsupported compressed format: {compress_format}")
+        if soundfile is not None:
+            soundfile.write(buffer, audio, sample_rate, format=compress_format)
+            extension, mime_type = COMPRESSED_FORMATS[compress_format]
+            return buffer.getvalue(), extension, mime_type
+        logger.warning("soundfile is not installed, falling back to 16-bit WAV")
+    pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+    wavfile.write(buffer, sample_rate, pcm)
+    return buffer.getvalue(), "wav", "audio/wav"
+
+
+def preprocess_audio(audio_path: str, audio_bytes: Optional[bytes] = None,
+                     target_rate: int = TARGET_SAMPLE_RATE, trim: bool = True,
+                     compress_format: Optional[str] = None) -> PreprocessedAudio:
+    """
+    Downmix, resample, trim silence and encode an audio file for upload.
+
+    Args:
+        audio_path: Path of the WAV file to preprocess
+        audio_bytes: Contents of the file, if already read by the caller
+        target_rate: Output sample rate (Whisper works at 16 kHz internally)
+        trim: Remove leading/trailing silence
+        compress_format: Optional compressed output format ("FLAC" or "OGG")
+
+    Returns:
+        PreprocessedAudio with the encoded payload and size statistics
+    """
+    if audio_bytes is None:
+        with open(audio_path, "rb") as f:
+            audio_bytes = f.read()
+    original_bytes = len(audio_bytes)
+    source_rate, samples = wavfile.read(io.BytesIO(audio_bytes))
+    audio = to_mono_float(samples)
+    original_duration = audio.size / source_rate
+
+    audio = resample(audio, source_rate, target_rate)
+    if trim:
+        audio = trim_silence(audio, target_rate)
+
+    data, extension, mime_type = encode_audio(audio, target_rate, compress_format)
+    stem = os.path.splitext(os.path.basename(audio_path))[0]
+    return PreprocessedAudio(
+        data=data,
+        filename=f"{stem}.{extension}",
+        mime_type=mime_type,
+        original_bytes=original_bytes,
+        original_duration_sec=original_duration,
+        duration_sec=audio.size / target_rate,
+    )
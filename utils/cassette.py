@@ -0,0 +1,178 @@
+"""
+Record/replay of the model answers and screen frames of a run.
+
+A run recorded with Coordinator(cassette_mode="record") can be replayed with
+cassette_mode="replay": Whisper, the chat model, YOLO and the browser are
+then served from the cassette, without network, model weights or waits.
+"""
+import hashlib
+import json
+import logging
+import os
+import glob
+import threading
+from collections import defaultdict, deque
+from typing import Any, Optional
+
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.jsonl"
+FRAMES_DIR = "frames"
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when the cassette has no answer for a request."""
+
+
+def request_key(*parts) -> str:
+    """Short stable fingerprint of a request (its text parts)."""
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def recorded_frame_paths(root: str) -> list:
+    """
+    PNG paths of the raw screen frames recorded by the cassettes found under
+    `root`, in recording order, each distinct frame once. Unlike the other
+    PNGs of a run folder (annotated grounding artifacts), these are exactly
+    what the browser showed.
+    """
+    paths = []
+    for index_path in sorted(glob.glob(os.path.join(root, "**", INDEX_FILE),
+                                       recursive=True)):
+        folder = os.path.dirname(index_path)
+        seen = set()
+        with open(index_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("channel") != "frames" or entry["response"] in seen:
+                    continue
+                seen.add(entry["response"])
+                path = os.path.join(folder, FRAMES_DIR, f"{entry['response']}.png")
+                if os.path.exists(path):
+                    paths.append(path)
+    return paths
+
+
+class Cassette:
+    """
+    Recording of everything a run depended on: Whisper transcripts, chat
+    answers, DOM grounding and YOLO results, and the screen frames.
+
+    Records are appended to one index.jsonl file, each tagged with a channel
+    ("whisper", "chat", "dom", "yolo", "frames") and a request key. Frames
+    are stored once per distinct content under frames/<hash>.png.
+
+    In replay mode each channel is consumed in order; a request with a key
+    takes the first remaining record with that key, so requests issued
+    concurrently (e.g. prefetched transcriptions) still get their own answer,
+    and a request the recording never saw raises CassetteMiss.
+    """
+
+    def __init__(self, path: str, mode: str = "record"):
+        """
+        Args:
+            path: Cassette folder (created when recording)
+            mode: "record" or "replay"
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._frames_written = set()
+        self._channels = defaultdict(deque)
+        self.counts = defaultdict(int)
+        if mode == "record":
+            os.makedirs(os.path.join(path, FRAMES_DIR), exist_ok=True)
+            self._index = open(os.path.join(path, INDEX_FILE), "a", encoding="utf-8")
+        else:
+            self._index = None
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self):
+        with open(os.path.join(self.path, INDEX_FILE), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._channels[entry["channel"]].append(entry)
+        logger.info(f"📼 Loaded cassette {self.path}: "
+                    f"{ {name: len(q) for name, q in self._channels.items()} }")
+
+    def record(self, channel: str, key: Optional[str], response: Any):
+        """Append one request/response record (recording mode only)."""
+        if not self.recording:
+            return
+        line = json.dumps({"channel": channel, "key": key, "response": response},
+                          default=str)
+        with self._lock:
+            self._index.write(line + "\n")
+            self._index.flush()
+            self.counts[channel] += 1
+
+    def next(self, channel: str, key: Optional[str] = None) -> Any:
+        """Return the next recorded response of a channel (replay mode only)."""
+        with self._lock:
+            records = self._channels[channel]
+            if key is None:
+                entry = records[0] if records else None
+            else:
+                entry = next((candidate for candidate in records
+                              if candidate["key"] == key), None)
+            if entry is None:
+                raise CassetteMiss(f"Cassette has no {channel} record"
+                                   + (f" for key {key}" if key is not None else ""))
+            records.remove(entry)
+            self.counts[channel] += 1
+        return entry["response"]
+
+    # ----------------------------------------------------------
+    # Frames
+    # ----------------------------------------------------------
+
+    def record_frame(self, frame: np.ndarray):
+        """Store a screen frame (RGB array) and append it to the frame sequence."""
+        if not self.recording:
+            return
+        frame = np.ascontiguousarray(frame)
+        digest = hashlib.sha1(frame.tobytes()).hexdigest()[:16] + f"-{frame.shape[1]}x{frame.shape[0]}"
+        with self._lock:
+            new = digest not in self._frames_written
+            self._frames_written.add(digest)
+        if new:
+            Image.fromarray(frame).save(
+                os.path.join(self.path, FRAMES_DIR, f"{digest}.png"), compress_level=1)
+        self.record("frames", None, digest)
+
+    def next_frame(self) -> np.ndarray:
+        digest = self.next("frames")
+        return self.load_frame(digest)
+
+    def load_frame(self, digest: str) -> np.ndarray:
+        with Image.open(os.path.join(self.path, FRAMES_DIR, f"{digest}.png")) as image:
+            return np.asarray(image.convert("RGB"))
+
+    def remaining(self) -> dict:
+        with self._lock:
+            return {name: len(records) for name, records in self._channels.items() if records}
+
+    def close(self):
+        if self._index is not None:
+            self._index.close()
+            self._index = None
@@ -0,0 +1,20 @@
+import numpy as np
+from PIL import Image
+
+
+def perceptual_hash(image: Image.Image, hash_size: int = 16) -> int:
+    """
+    Difference hash (dHash) of an image: downscale to a small grayscale grid
+    and encode whether each pixel is brighter than its right neighbour.
+    Visually similar images produce hashes with a small Hamming distance.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size),
+                                      Image.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(hash_a: int, hash_b: int) -> int:
+    """Number of differing bits between two integer hashes."""
+    return bin(hash_a ^ hash_b).count("1")
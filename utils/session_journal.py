@@ -0,0 +1,178 @@
+"""
+Append-only JSONL journal of a voice session.
+
+The Coordinator writes one record per command as soon as it finishes
+(transcript, plan, result and per-stage timings), flushed and fsynced, so a
+crash loses at most the command in flight. Journals rotate by size.
+
+The reader streams records line by line and aggregates stage latencies into
+fixed-size log histograms, so percentiles over many runs take constant memory:
+
+    python -m utils.session_journal runs/
+"""
+import glob
+import json
+import logging
+import math
+import os
+import sys
+import time
+from typing import Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_NAME = "session"
+
+
+class SessionJournal:
+    """Writer of session.jsonl, rotated to session.<n>.jsonl past `max_bytes`."""
+
+    def __init__(self, folder: str, max_bytes: int = 8 * 1024 * 1024,
+                 fsync: bool = True):
+        """
+        Args:
+            folder: Run folder the journal is written to
+            max_bytes: Size after which the journal is rotated
+            fsync: Force every record to disk, not only to the OS
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.fsync = fsync
+        self.path = os.path.join(folder, f"{JOURNAL_NAME}.jsonl")
+        self.rotations = 0
+        os.makedirs(folder, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, record_type: str, **fields):
+        """Append one record and make it durable before returning."""
+        line = json.dumps({"type": record_type, "time": time.time(), **fields},
+                          default=str)
+        if self._file.tell() and self._file.tell() + len(line) > self.max_bytes:
+            self._rotate()
+        self._file.write(line + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        self._file.close()
+        self.rotations += 1
+        os.replace(self.path, os.path.join(self.folder,
+                                           f"{JOURNAL_NAME}.{self.rotations}.jsonl"))
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def paths(self) -> list:
+        """Files of this journal, oldest first."""
+        return journal_files(self.folder)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def journal_files(folder: str) -> list:
+    """Journal files of one run folder, oldest first (rotated parts, then the active one)."""
+    rotated = glob.glob(os.path.join(folder, f"{JOURNAL_NAME}.*.jsonl"))
+    rotated.sort(key=lambda path: int(path.rsplit(".", 2)[-2]))
+    active = os.path.join(folder, f"{JOURNAL_NAME}.jsonl")
+    return rotated + ([active] if os.path.exists(active) else [])
+
+
+def iter_records(roots: Iterable[str], record_type: str = None) -> Iterator[dict]:
+    """
+    Stream the records of every journal found under `roots` (run folders or
+    parents of run folders). A truncated last line, left by a crash, is skipped.
+    """
+    for root in roots:
+        folders = sorted({os.path.dirname(path) for path in glob.glob(
+            os.path.join(root, "**", f"{JOURNAL_NAME}*.jsonl"), recursive=True)})
+        for folder in folders:
+            for path in journal_files(folder):
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            logger.warning(f"Skipping corrupt journal line in {path}")
+                            continue
+                        if record_type is None or record.get("type") == record_type:
+                            yield record
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram: constant memory, percentiles within
+    `precision` (relative) of the exact value.
+    """
+
+    def __init__(self, min_sec: float = 1e-4, max_sec: float = 3600.0,
+                 precision: float = 0.02):
+        self.min_sec = min_sec
+        self.log_base = math.log1p(precision)
+        self.buckets = [0] * (int(math.log(max_sec / min_sec) / self.log_base) + 2)
+        self.count = 0
+        self.total_sec = 0.0
+        self.max_seen_sec = 0.0
+
+    def add(self, seconds: float):
+        index = 0 if seconds <= self.min_sec else \
+            int(math.log(seconds / self.min_sec) / self.log_base) + 1
+        self.buckets[min(index, len(self.buckets) - 1)] += 1
+        self.count += 1
+        self.total_sec += seconds
+        self.max_seen_sec = max(self.max_seen_sec, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Approximate q-th percentile (0-100) in seconds."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * (self.count - 1)
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen > rank:
+                if index == 0:
+                    return self.min_sec
+                # Geometric middle of the bucket
+                return min(self.min_sec * math.exp((index - 0.5) * self.log_base),
+                           self.max_seen_sec)
+        return self.max_seen_sec
+
+    def summary(self) -> dict:
+        return {"count": self.count,
+                "mean_ms": 1000 * self.total_sec / self.count if self.count else 0.0,
+                "p50_ms": 1000 * self.percentile(50),
+                "p95_ms": 1000 * self.percentile(95),
+                "p99_ms": 1000 * self.percentile(99),
+                "max_ms": 1000 * self.max_seen_sec}
+
+
+def aggregate(roots: Iterable[str]) -> dict:
+    """
+    Per-stage latency percentiles of every command journaled under `roots`.
+
+    Returns:
+        {stage: {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}},
+        with "failed_commands" counting commands that raised
+    """
+    histograms = {}
+    failed = 0
+    for record in iter_records(roots, "command"):
+        if record.get("error"):
+            failed += 1
+        for stage, seconds in (record.get("timings") or {}).items():
+            histograms.setdefault(stage, LatencyHistogram()).add(seconds)
+    result = {stage: histogram.summary()
+              for stage, histogram in sorted(histograms.items())}
+    result["failed_commands"] = failed
+    return result
+
+
+if __name__ == "__main__":
+    summary = aggregate(sys.argv[1:] or ["runs"])
+    failed = summary.pop("failed_commands")
+    print(f"{'stage':<16} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage, stats in summary.items():
+        print(f"{stage:<16} {stats['count']:>6} {stats['p50_ms']:>9.1f} "
+              f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"Failed commands: {failed}")
@@ -0,0 +1,245 @@
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from scipy.io.wavfile import write
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Utterance:
+    """
+    One finished, voice-activity-segmented utterance.
+    """
+    index: int
+    audio: np.ndarray
+    sample_rate: int
+    path: Optional[str] = None
+
+    @property
+    def duration_sec(self) -> float:
+        return self.audio.shape[0] / self.sample_rate
+
+
+class RingBuffer:
+    """
+    Preallocated mono float32 ring buffer addressed by an absolute,
+    ever-increasing sample position.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.buffer = np.zeros(capacity, dtype=np.float32)
+        self.position = 0
+
+    def write(self, samples: np.ndarray):
+        n = samples.shape[0]
+        if n >= self.capacity:
+            samples = samples[-self.capacity:]
+            self.position += n - self.capacity
+            n = self.capacity
+        start = self.position % self.capacity
+        first = min(n, self.capacity - start)
+        self.buffer[start:start + first] = samples[:first]
+        self.buffer[:n - first] = samples[first:]
+        self.position += n
+
+    def read(self, start: int, end: int) -> np.ndarray:
+        """Copy out the samples in the absolute range [start, end)."""
+        start = max(start, self.position - self.capacity, 0)
+        end = min(end, self.position)
+        if end <= start:
+            return np.zeros(0, dtype=np.float32)
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self.buffer[first:last].copy()
+        return np.concatenate((self.buffer[first:],
+                               self.buffer[:last - self.capacity]))
+
+
+class StreamingRecorder:
+    """
+    Continuous microphone capture with energy-based voice activity detection.
+
+    Audio is written into a preallocated ring buffer from the sounddevice
+    callback. The noise floor is first calibrated on every block of the
+    initial `calibration_ms`, whatever its level, so a background louder than
+    `floor_db + margin_db` is not mistaken for endless speech; afterwards it
+    tracks silent blocks. Each block is classified as speech or silence
+    against that floor; once speech is followed by `hangover_ms` of silence
+    the utterance (plus a short pre-roll) is emitted to `self.utterances`,
+    optionally after being saved as a numbered WAV file.
+    """
+
+    def __init__(self, sample_rate: int = 44100, block_ms: float = 30.0,
+                 output_dir: Optional[str] = None, start_index: int = 1,
+                 margin_db: float = 12.0, floor_db: float = -55.0,
+                 min_speech_ms: float = 150.0, hangover_ms: float = 700.0,
+                 pre_roll_ms: float = 300.0, max_utterance_sec: float = 20.0,
+                 calibration_ms: float = 500.0,
+                 utterance_queue: Optional[queue.Queue] = None):
+        """
+        Args:
+            sample_rate: Capture sample rate
+            block_ms: Duration of each callback block used for VAD decisions
+            output_dir: If set, each utterance is written as <index>.wav here
+            start_index: Number of the first emitted utterance
+            margin_db: Energy above the noise floor that counts as speech
+            floor_db: Absolute energy below which a block is always silence
+            min_speech_ms: Speech needed before an utterance is started
+            hangover_ms: Silence needed before an utterance is closed
+            pre_roll_ms: Audio kept before the detected speech onset
+            max_utterance_sec: Utterances longer than this are force-closed
+            calibration_ms: Initial audio used to measure the noise floor, during
+                which no speech is detected
+            utterance_queue: Queue receiving finished Utterance objects
+        """
+        self.sample_rate = sample_rate
+        self.block_size = int(sample_rate * block_ms / 1000)
+        self.output_dir = output_dir
+        self.next_index = start_index
+        self.margin_db = margin_db
+        self.floor_db = floor_db
+        self.min_speech_samples = int(sample_rate * min_speech_ms / 1000)
+        self.hangover_samples = int(sample_rate * hangover_ms / 1000)
+        self.pre_roll_samples = int(sample_rate * pre_roll_ms / 1000)
+        self.max_utterance_samples = int(sample_rate * max_utterance_sec)
+        self.calibration_samples = int(sample_rate * calibration_ms / 1000)
+        self.utterances = utterance_queue or queue.Queue()
+
+        capacity = self.max_utterance_samples + self.pre_roll_samples \
+            + 2 * self.hangover_samples
+        self.ring = RingBuffer(capacity)
+
+        self.noise_floor_db = floor_db
+        self._calibration_blocks = 0
+        self._speech_run = 0
+        self._silence_run = 0
+        self._utterance_start = None
+        self._segments = queue.Queue()
+        self._stream = None
+        self._writer = None
+        self._stopped = threading.Event()
+
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+
+    # ----------------------------------------------------------
+    # Capture control
+    # ----------------------------------------------------------
+
+    def start(self):
+        """Open the input stream and start emitting utterances."""
+        import sounddevice as sd
+
+        self._stopped.clear()
+        self._writer = threading.Thread(target=self._drain_segments,
+                                        name="utterance-writer", daemon=True)
+        self._writer.start()
+        self._stream = sd.InputStream(samplerate=self.sample_rate, channels=1,
+                                      dtype="float32",
+                                      blocksize=self.block_size,
+                                      callback=self._callback)
+        self._stream.start()
+
+    def stop(self):
+        """Stop capture, close any open utterance and flush pending output."""
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._utterance_start is not None:
+            self._close_utterance(self.ring.position)
+        self._stopped.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._writer = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ----------------------------------------------------------
+    # Voice activity detection
+    # ----------------------------------------------------------
+
+    def _callback(self, indata, frames, time_info, status):
+        if status:
+            logger.debug(f"Input stream status: {status}")
+        self.process_block(indata[:, 0] if indata.ndim > 1 else indata)
+
+    def process_block(self, block: np.ndarray):
+        """
+        Append one block of samples and advance the VAD state machine.
+        Separated from the sounddevice callback so it can be fed offline.
+        """
+        self.ring.write(block)
+        n = block.shape[0]
+        energy_db = 10 * np.log10(max(float(np.mean(block * block)), 1e-12))
+        if self.ring.position <= self.calibration_samples:
+            # Running mean of the first blocks, speech or not
+            self._calibration_blocks += 1
+            self.noise_floor_db = energy_db if self._calibration_blocks == 1 else \
+                self.noise_floor_db + (energy_db - self.noise_floor_db) / self._calibration_blocks
+            return
+        is_speech = energy_db > max(self.floor_db,
+                                    self.noise_floor_db + self.margin_db)
+
+        if is_speech:
+            self._speech_run += n
+            self._silence_run = 0
+        else:
+            self._silence_run += n
+            self._speech_run = 0
+            # Track the background level only while nobody is speaking
+            self.noise_floor_db = 0.95 * self.noise_floor_db + 0.05 * energy_db
+
+        if self._utterance_start is None:
+            if self._speech_run >= self.min_speech_samples:
+                onset = self.ring.position - self._speech_run
+                self._utterance_start = max(0, onset - self.pre_roll_samples)
+            return
+
+        length = self.ring.position - self._utterance_start
+        if self._silence_run >= self.hangover_samples:
+            self._close_utterance(self.ring.position - self._silence_run
+                                  + self.hangover_samples // 2)
+        elif length >= self.max_utterance_samples:
+            self._close_utterance(self.ring.position)
+
+    def _close_utterance(self, end: int):
+        audio = self.ring.read(self._utterance_start, end)
+        self._utterance_start = None
+        self._speech_run = 0
+        if audio.shape[0]:
+            self._segments.put(audio)
+
+    # ----------------------------------------------------------
+    # Output
+    # ----------------------------------------------------------
+
+    def _drain_segments(self):
+        while not (self._stopped.is_set() and self._segments.empty()):
+            try:
+                audio = self._segments.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            utterance = Utterance(index=self.next_index, audio=audio,
+                                  sample_rate=self.sample_rate)
+            self.next_index += 1
+            if self.output_dir:
+                utterance.path = os.path.join(self.output_dir,
+                                              f"{utterance.index}.wav")
+                write(utterance.path, self.sample_rate, audio)
+            logger.info(f"Utterance #{utterance.index} "
+                        f"({utterance.duration_sec:.2f}s) ready")
+            self.utterances.put(utterance)
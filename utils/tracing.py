@@ -0,0 +1,257 @@
+"""
+Lightweight span tracing for the voice-to-action pipeline.
+
+Every stage opens a span with `span(name, category, **attributes)`; spans
+record wall time and the CPU time of the calling thread, nest per thread and
+are exported per run as JSONL and as a Chrome trace-event file (open it in
+chrome://tracing or https://ui.perfetto.dev).
+
+A single stage can be profiled by attaching a profiler hook to its span
+name, either with Tracer.profile or with the TRACE_PROFILE environment
+variable, e.g. TRACE_PROFILE=yolo_inference:cprofile,decision_llm:sampling
+"""
+import cProfile
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One timed stage. Attributes can be added while the span is open."""
+    __slots__ = ("span_id", "parent_id", "name", "category", "thread_id",
+                 "start", "wall_sec", "cpu_sec", "attributes")
+
+    def __init__(self, span_id, parent_id, name, category, attributes):
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.category = category
+        self.thread_id = threading.get_ident()
+        self.start = 0.0
+        self.wall_sec = 0.0
+        self.cpu_sec = 0.0
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self, epoch: float) -> dict:
+        return {
+            "id": self.span_id,
+            "parent": self.parent_id,
+            "name": self.name,
+            "category": self.category,
+            "thread": self.thread_id,
+            "start_sec": self.start - epoch,
+            "wall_sec": self.wall_sec,
+            "cpu_sec": self.cpu_sec,
+            "attributes": self.attributes,
+        }
+
+
+@contextmanager
+def cprofile_hook(path: str):
+    """Deterministic profile of the span, saved as a .prof file for pstats/snakeviz."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path + ".prof")
+
+
+@contextmanager
+def sampling_hook(path: str):
+    """Sampling profile of the span with pyinstrument, saved as HTML."""
+    from pyinstrument import Profiler
+    profiler = Profiler(interval=0.001)
+    profiler.start()
+    try:
+        yield
+    finally:
+        profiler.stop()
+        with open(path + ".html", "w", encoding="utf-8") as f:
+            f.write(profiler.output_html())
+
+
+PROFILER_HOOKS = {"cprofile": cprofile_hook, "sampling": sampling_hook}
+
+
+class Tracer:
+    """
+    Collects spans from every thread of the process.
+
+    Spans are kept in memory for the run and written by export(); tracing
+    costs two clock reads per span, so it is always on.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.output_dir = None
+        self.epoch = time.perf_counter()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._local = threading.local()
+        # Span name -> profiler hook (a context manager factory taking the
+        # output path without extension)
+        self._profilers = {}
+        self._profile_counts = {}
+        self._load_env_profilers()
+
+    def _load_env_profilers(self):
+        for entry in filter(None, os.getenv("TRACE_PROFILE", "").split(",")):
+            name, _, kind = entry.strip().partition(":")
+            self.profile(name, kind or "cprofile")
+
+    def start_run(self, output_dir: str):
+        """Reset the collected spans; exports and profiles go to `output_dir`."""
+        with self._lock:
+            self.spans = []
+            self.output_dir = output_dir
+            self.epoch = time.perf_counter()
+            self._profile_counts = {}
+
+    def profile(self, span_name: str, hook="cprofile"):
+        """
+        Profile every span named `span_name`.
+
+        Args:
+            hook: "cprofile", "sampling" (requires pyinstrument) or a callable
+                returning a context manager for a given output path
+        """
+        if isinstance(hook, str):
+            if hook not in PROFILER_HOOKS:
+                raise ValueError(f"Unknown profiler: {hook}")
+            hook = PROFILER_HOOKS[hook]
+        self._profilers[span_name] = hook
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", **attributes):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        current = Span(next(self._ids), stack[-1].span_id if stack else None,
+                       name, category, attributes)
+        # Started before the span is pushed: a profiler that fails to start
+        # (e.g. pyinstrument missing) leaves the stack untouched and the
+        # stage runs unprofiled
+        profiler = None
+        hook = self._profilers.get(name)
+        if hook is not None:
+            try:
+                profiler = hook(self._profile_path(name))
+                profiler.__enter__()
+            except Exception as e:
+                logger.warning(f"Could not start the {name} profiler: {e}")
+                profiler = None
+        stack.append(current)
+        current.start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield current
+        except BaseException as e:
+            current.set(error=f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            current.wall_sec = time.perf_counter() - current.start
+            current.cpu_sec = time.thread_time() - cpu_start
+            stack.pop()
+            with self._lock:
+                self.spans.append(current)
+            if profiler is not None:
+                try:
+                    profiler.__exit__(None, None, None)
+                except Exception as e:
+                    logger.warning(f"Could not save the {name} profile: {e}")
+
+    def record(self, name: str, category: str, start: float, wall_sec: float,
+               cpu_sec: float = 0.0, **attributes) -> Span:
+        """
+        Add a span measured by the caller (`start` from time.perf_counter),
+        for stages that cannot be wrapped in a block, such as a generator
+        that yields to other stages while it runs.
+        """
+        stack = getattr(self._local, "stack", None)
+        recorded = Span(next(self._ids), stack[-1].span_id if stack else None,
+                        name, category, attributes)
+        recorded.start = start
+        recorded.wall_sec = wall_sec
+        recorded.cpu_sec = cpu_sec
+        with self._lock:
+            self.spans.append(recorded)
+        return recorded
+
+    def _profile_path(self, name: str) -> str:
+        folder = os.path.join(self.output_dir or ".", "profiles")
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            count = self._profile_counts.get(name, 0)
+            self._profile_counts[name] = count + 1
+        return os.path.join(folder, f"{name}-{count}")
+
+    def summary(self) -> dict:
+        """Per span name: count, total and mean wall time, total CPU time."""
+        with self._lock:
+            spans = list(self.spans)
+        summary = {}
+        for s in spans:
+            entry = summary.setdefault(s.name, {"count": 0, "wall_sec": 0.0,
+                                                "cpu_sec": 0.0})
+            entry["count"] += 1
+            entry["wall_sec"] += s.wall_sec
+            entry["cpu_sec"] += s.cpu_sec
+        for entry in summary.values():
+            entry["mean_wall_ms"] = 1000 * entry["wall_sec"] / entry["count"]
+        return summary
+
+    def export(self, output_dir: Optional[str] = None) -> Optional[str]:
+        """
+        Write trace.jsonl (one span per line) and trace.chrome.json
+        (Chrome trace-event format) to the run folder.
+
+        Returns:
+            The run folder, or None when there is nowhere to write
+        """
+        output_dir = output_dir or self.output_dir
+        if output_dir is None:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+            epoch = self.epoch
+
+        with open(os.path.join(output_dir, "trace.jsonl"), "w", encoding="utf-8") as f:
+            for s in spans:
+                f.write(json.dumps(s.to_dict(epoch), default=str) + "\n")
+
+        pid = os.getpid()
+        events = [{
+            "name": s.name,
+            "cat": s.category,
+            "ph": "X",
+            "ts": round((s.start - epoch) * 1e6, 1),
+            "dur": round(s.wall_sec * 1e6, 1),
+            "pid": pid,
+            "tid": s.thread_id,
+            "args": dict(s.attributes, cpu_ms=round(s.cpu_sec * 1000, 3)),
+        } for s in spans]
+        with open(os.path.join(output_dir, "trace.chrome.json"), "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, default=str)
+        logger.info(f"📊 Exported {len(spans)} spans to {output_dir}")
+        return output_dir
+
+
+tracer = Tracer()
+
+
+def span(name: str, category: str = "pipeline", **attributes):
+    """Open a span on the process-wide tracer."""
+    return tracer.span(name, category, **attributes)